@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Merging k sorted run files and dropping adjacent duplicates: the
+streaming pipeline iter_remove_adjacent(merge_sorted(read_sorted_file
+...)) versus materializing every run as a list, sorting the
+concatenation and calling remove_adjacent(). heapq.merge is timed as
+a reference. Runs hold random integers in a range of half the total
+size, so about 40% of the merged elements are duplicates.
+
+Time is measured without tracing; peak memory is measured by
+tracemalloc in a separate run on the same files.
+
+Usage: ./bench_list_task.py [total elements [k ...]]
+"""
+import heapq
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from list_task import (
+    iter_remove_adjacent, merge_sorted, read_sorted_file, remove_adjacent)
+
+
+def make_runs(work_dir, total, k, seed=0):
+    rng = random.Random(seed)
+    filenames = []
+    for index in range(k):
+        size = total // k + (index < total % k)
+        run = sorted(rng.randrange(total // 2 + 1) for _ in range(size))
+        filenames.append(os.path.join(work_dir, 'run{}'.format(index)))
+        with open(filenames[-1], 'w') as f:
+            f.write(''.join('{}\n'.format(value) for value in run))
+    return filenames
+
+
+def count(iterable):
+    return sum(1 for _ in iterable)
+
+
+def streaming(filenames):
+    return count(iter_remove_adjacent(merge_sorted(
+        *map(read_sorted_file, filenames))))
+
+
+def with_heapq(filenames):
+    return count(iter_remove_adjacent(heapq.merge(
+        *map(read_sorted_file, filenames))))
+
+
+def materialized(filenames):
+    lists = [list(read_sorted_file(filename)) for filename in filenames]
+    return len(remove_adjacent(sorted(itertools.chain(*lists))))
+
+
+def measure(function, filenames):
+    start = time.perf_counter()
+    result = function(filenames)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(filenames)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    ks = [int(arg) for arg in sys.argv[2:]] or [2, 16, 256]
+    print('{:>10} {:>5} {:<14} {:>9} {:>10}'.format(
+        'elements', 'k', 'method', 'seconds', 'peak MiB'))
+    for k in ks:
+        with tempfile.TemporaryDirectory() as work_dir:
+            filenames = make_runs(work_dir, total, k)
+            expected = None
+            for name, function in [('materialized', materialized),
+                                   ('heapq.merge', with_heapq),
+                                   ('streaming', streaming)]:
+                result, elapsed, peak = measure(function, filenames)
+                expected = expected or result
+                assert result == expected
+                print('{:>10} {:>5} {:<14} {:>9.3f} {:>10.1f}'.format(
+                    total, k, name, elapsed, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
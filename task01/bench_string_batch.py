@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Time of the batch functions from string_batch.py on a list, a NumPy
+array and a pandas Series versus calling the scalar function from
+string_task.py once per string. Strings are random words of 0 to 20
+characters with 'not', 'bad' and 'ing' mixed in, so all branches of
+the functions are taken. Every batch result is checked to be equal to
+the scalar one. The inputs and the expected results are kept in lists,
+so 10^7 strings need more than 5 GiB of RAM.
+
+Usage: ./bench_string_batch.py [number of strings ...]
+"""
+import random
+import sys
+import time
+import numpy as np
+import pandas as pd  # type: ignore
+import string_batch
+import string_task
+
+PIECES = ['not', 'bad', 'ing', ' ', 'a', 'b', 'c', 'd', 'e', 'o', 'x']
+
+
+def make_strings(count, seed=0):
+    rng = random.Random(seed)
+    return [''.join(rng.choices(PIECES, k=rng.randrange(8)))
+            for _ in range(count)]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10 ** 6]
+    print('{:>10} {:<11} {:<7} {:>9}'.format(
+        'strings', 'function', 'input', 'seconds'))
+    functions = [('verbing', 1), ('not_bad', 1), ('front_back', 2)]
+    for count in counts:
+        a = make_strings(count, seed=0)
+        b = make_strings(count, seed=1)
+        expected = {}
+        for name, arity in functions:
+            scalar = getattr(string_task, name)
+            expected[name], elapsed = timed(
+                lambda: list(map(scalar, *[a, b][:arity])))
+            print('{:>10} {:<11} {:<7} {:>9.3f}'.format(
+                count, name, 'scalar', elapsed))
+        # One kind of input at a time, so that 10^7 strings fit in RAM.
+        for kind, convert in [('list', list), ('numpy', np.array),
+                              ('pandas', pd.Series)]:
+            x, y = convert(a), convert(b)
+            for name, arity in functions:
+                result, elapsed = timed(getattr(string_batch, name),
+                                        *[x, y][:arity])
+                if not isinstance(result, list):
+                    result = result.tolist()
+                assert result == expected[name]
+                del result
+                print('{:>10} {:<11} {:<7} {:>9.3f}'.format(
+                    count, name, kind, elapsed))
+            del x, y
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Memory and time of count_words() versus the former approach that built
+a list of all words with read_words() and counted it afterwards.
+
+For every file size a text of random words from a fixed vocabulary is
+generated; peak memory is measured by tracemalloc in a separate run.
+
+Usage: ./bench_wordcount.py [size in MiB ...]
+"""
+import collections
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from wordcount import count_words
+
+
+def list_count(filename):
+    words = []
+    with open(filename, 'r') as f:
+        for line in f:
+            words.extend(line.split())
+    return collections.Counter(word.lower() for word in words)
+
+
+def make_text(filename, size, seed=0):
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyzABC')
+                          for _ in range(rng.randrange(1, 12)))
+                  for _ in range(50000)]
+    with open(filename, 'w') as f:
+        written = 0
+        while written < size:
+            line = ' '.join(rng.choices(vocabulary, k=12)) + '\n'
+            f.write(line)
+            written += len(line)
+
+
+def measure(function, filename):
+    start = time.perf_counter()
+    counts = function(filename)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(filename)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return counts, elapsed, peak
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [16, 64]
+    print('{:>8} {:<12} {:>9} {:>10}'.format(
+        'MiB', 'method', 'seconds', 'peak MiB'))
+    with tempfile.TemporaryDirectory() as work_dir:
+        filename = os.path.join(work_dir, 'text')
+        for size in sizes:
+            make_text(filename, size * 1024 * 1024)
+            expected = None
+            for name, function in [('list', list_count),
+                                   ('streaming', count_words)]:
+                counts, elapsed, peak = measure(function, filename)
+                expected = expected or counts
+                assert counts == expected
+                print('{:>8} {:<12} {:>9.3f} {:>10.1f}'.format(
+                    size, name, elapsed, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
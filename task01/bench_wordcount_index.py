@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Latency of --topcount and --word queries answered from the index
+(--index) versus a full rescan of a growing log.
+
+The log is generated as in bench_wordcount; after the first indexed run
+one percent of its size is appended, and the queries are repeated.
+
+Usage: ./bench_wordcount_index.py [size in MiB]
+"""
+import os
+import sys
+import tempfile
+import time
+from wordcount import count_files, get_counts, top_words
+from bench_wordcount import make_text
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    with tempfile.TemporaryDirectory() as work_dir:
+        log = os.path.join(work_dir, 'log')
+        index = os.path.join(work_dir, 'log.index')
+        make_text(log, size * 1024 * 1024)
+        appended = os.path.join(work_dir, 'appended')
+        make_text(appended, size * 1024 * 1024 // 100, seed=1)
+        print('{:<28} {:>9}'.format('query', 'seconds'))
+
+        def report(name, function, *args):
+            result, elapsed = timed(function, *args)
+            print('{:<28} {:>9.3f}'.format(name, elapsed))
+            return result
+
+        expected = report('full rescan', count_files, [log])
+        counts = report('first run, building index', get_counts,
+                        log, 1, index)
+        assert counts == expected
+        word = top_words(expected, 1)[0]
+        top = report('top-20 from index', lambda: top_words(
+            get_counts(log, 1, index)))
+        assert top == top_words(expected)
+        count = report('one word from index',
+                       lambda: get_counts(log, 1, index)[word])
+        assert count == expected[word]
+        with open(log, 'ab') as f, open(appended, 'rb') as tail:
+            f.write(tail.read())
+        expected = report('full rescan after append', count_files, [log])
+        counts = report('index after 1% append', get_counts, log, 1, index)
+        assert counts == expected
+        print('index size: {} bytes'.format(os.path.getsize(index)))
+
+
+if __name__ == '__main__':
+    main()
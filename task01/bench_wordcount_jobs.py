@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Scaling of count_files() with the number of processes: one big file
+that is cut into byte ranges and the same amount of text in 16 files,
+for several file sizes. Every result is checked against jobs=1.
+
+Usage: ./bench_wordcount_jobs.py [size in MiB ...]
+"""
+import os
+import sys
+import tempfile
+import time
+from wordcount import count_files
+from bench_wordcount import make_text
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [16, 64]
+    print('cpus: {}'.format(os.cpu_count()))
+    print('{:>6} {:>6} {:>5} {:>9} {:>8}'.format(
+        'MiB', 'files', 'jobs', 'seconds', 'speedup'))
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in sizes:
+            single = [os.path.join(work_dir, 'single')]
+            make_text(single[0], size * 1024 * 1024)
+            many = [os.path.join(work_dir, 'part{:02}'.format(index))
+                    for index in range(16)]
+            for index, filename in enumerate(many):
+                make_text(filename, size * 1024 * 1024 // 16, seed=index)
+            for filenames in (single, many):
+                expected = None
+                base = None
+                for jobs in (1, 2, 4, 8):
+                    start = time.perf_counter()
+                    counts = count_files(filenames, jobs)
+                    elapsed = time.perf_counter() - start
+                    if expected is None:
+                        expected, base = counts, elapsed
+                    assert counts == expected
+                    print('{:>6} {:>6} {:>5} {:>9.3f} {:>8.2f}'.format(
+                        size, len(filenames), jobs, elapsed,
+                        base / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,25 @@
+import heapq
+import itertools
+
+
+def iter_remove_adjacent(iterable, key=None):
+    """
+    Lazily yields the elements of iterable, skipping every element
+    that is equal to the previous one (compared by key if given).
+    Works on streams of any length in constant memory, e.g. after
+    merge_sorted().
+
+    >>> list(iter_remove_adjacent([]))
+    []
+    >>> list(iter_remove_adjacent('aaabccd'))
+    ['a', 'b', 'c', 'd']
+    >>> list(iter_remove_adjacent(['a', 'A', 'b', 'a'], key=str.lower))
+    ['a', 'b', 'a']
+    """
+    for _, group in itertools.groupby(iterable, key):
+        yield next(group)
+
+
 def remove_adjacent(lst):
     """
     Removes equal adjacent elements.
@@ -5,8 +27,65 @@ def remove_adjacent(lst):
 
     >>> remove_adjacent([1, 2, 2, 3])
     [1, 2, 3]
+    >>> remove_adjacent([])
+    []
+    >>> remove_adjacent([5, 5, 1, 1, 5])
+    [5, 1, 5]
+    """
+    return list(iter_remove_adjacent(lst))
+
+
+def merge_sorted(*iterables, key=None):
+    """
+    Lazily merges any number of sorted iterables into one sorted
+    stream (sorted by key if given). Equal elements come in the order
+    of the iterables they are taken from. The current head of every
+    iterable is kept in a binary heap, so n elements from k iterables
+    take O(n log k) comparisons and O(k) memory.
+
+    >>> list(merge_sorted())
+    []
+    >>> list(merge_sorted([1, 4], [], [2, 3], [0, 5]))
+    [0, 1, 2, 3, 4, 5]
+    >>> list(merge_sorted(['b', 'C'], ['a', 'D'], key=str.lower))
+    ['a', 'b', 'C', 'D']
+    """
+    # Entries are lists [key, index, value, iterator], updated in place,
+    # so that moving to the next element of an iterable allocates nothing.
+    heap = []
+    for index, iterable in enumerate(iterables):
+        iterator = iter(iterable)
+        try:
+            value = next(iterator)
+        except StopIteration:
+            continue
+        heap.append([value if key is None else key(value), index, value,
+                     iterator])
+    heapq.heapify(heap)
+    while len(heap) > 1:
+        entry = heap[0]
+        yield entry[2]
+        try:
+            value = entry[2] = next(entry[3])
+        except StopIteration:
+            heapq.heappop(heap)
+            continue
+        entry[0] = value if key is None else key(value)
+        heapq.heapreplace(heap, entry)
+    if heap:
+        _, _, value, iterator = heap[0]
+        yield value
+        yield from iterator
+
+
+def read_sorted_file(filename, parse=int):
+    """
+    Lazily yields parse(line) for every line of a file, e.g. a sorted
+    run of numbers to be passed to merge_sorted(). The file stays open
+    until the generator is exhausted or closed.
     """
-    return []
+    with open(filename) as f:
+        yield from map(parse, f)
 
 
 def linear_merge(lst1, lst2):
@@ -17,5 +96,9 @@ def linear_merge(lst1, lst2):
 
     >>> linear_merge([2, 4, 6], [1, 3, 5])
     [1, 2, 3, 4, 5, 6]
+    >>> linear_merge([], [])
+    []
+    >>> linear_merge([1, 1], [0, 1, 7])
+    [0, 1, 1, 1, 7]
     """
-    return []
+    return list(merge_sorted(lst1, lst2))
@@ -0,0 +1,191 @@
+"""
+Batch versions of verbing(), not_bad() and front_back() from
+string_task.py for column-sized inputs.
+
+Every function takes a sequence of strings, a NumPy array of strings
+or a pandas Series of strings. It returns a list for a sequence and a
+value of the same kind for an array or a Series, equal element by
+element to applying the scalar function.
+
+NumPy arrays are processed by np.strings ufuncs without a Python-level
+loop; cutting at per-string positions needs np.strings.slice from
+NumPy 2.3. With an older NumPy arrays are processed by the scalar
+functions element by element. Object arrays are converted to str_ and
+back; missing values (None, NaN, pd.NA) in them raise ValueError
+instead of turning into 'None' or 'nan'. A Series goes through the
+NumPy path and keeps its index, name and dtype; a categorical Series
+gets new categories. A plain sequence is processed by the scalar
+functions: converting it to an array and back costs more than the
+calls save.
+"""
+import numpy as np
+import pandas as pd  # type: ignore
+import string_task
+
+
+def _vectorized():
+    """Tells whether this NumPy has np.strings.slice (NumPy 2.3+)."""
+    return hasattr(getattr(np, 'strings', None), 'slice')
+
+
+def _to_array(strings):
+    """
+    Returns strings as an array of str_ or of the variable-width
+    StringDType, which np.strings handle natively. Object arrays are
+    converted to str_: for object arrays and Series this is faster
+    than StringDType both ways.
+    """
+    # A Series knows whether it has missing values without a pass over
+    # an object array.
+    if (strings.hasnans if isinstance(strings, pd.Series)
+            else np.asarray(strings).dtype.kind == 'O' and
+            pd.isna(strings).any()):
+        raise ValueError('missing values are not strings')
+    array = np.asarray(strings)
+    if array.dtype.kind in 'UT':
+        return array
+    if array.dtype.kind != 'O':
+        raise TypeError('expected strings, got {}'.format(array.dtype))
+    return array.astype(str)
+
+
+def _like(result, original):
+    """
+    Returns result, made by np.strings from _to_array(original), as
+    the same kind of object as original, a NumPy array or a Series.
+    A categorical Series gets categories rebuilt from the result: the
+    original ones would turn every new string into NaN.
+    """
+    if isinstance(original, pd.Series):
+        dtype = original.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtype = 'category'
+        return pd.Series(result, index=original.index, name=original.name,
+                         dtype=dtype)
+    if original.dtype.kind not in 'UT':
+        return result.astype(original.dtype)
+    return result
+
+
+def _map_scalar(function, original, *arrays):
+    """
+    Applies the scalar function to every element (every tuple of
+    broadcast elements) of arrays, made by _to_array(original) and the
+    like; used when np.strings cannot do the job.
+
+    >>> a = np.array(['ab'])
+    >>> _map_scalar(string_task.front_back, a, a, np.array(['xyz', '']))
+    array(['axybz', 'ab'], dtype='<U5')
+    """
+    arrays = np.broadcast_arrays(*arrays)
+    columns = [array.ravel().tolist() for array in arrays]
+    result = np.array(list(map(function, *columns)), dtype=str)
+    return _like(result.reshape(arrays[0].shape), original)
+
+
+def _narrow(halves, rounding):
+    """
+    Casts halves of strings of an array of str_ to half of its width,
+    rounded up if rounding is 1 and down if it is 0.
+    """
+    if halves.dtype.kind != 'U':
+        return halves
+    return halves.astype('U{}'.format(
+        (halves.dtype.itemsize // 4 + rounding) // 2))
+
+
+def verbing(strings):
+    """
+    verbing() for every string.
+
+    >>> verbing(['read', 'do', 'swimming'])
+    ['reading', 'do', 'swimmingly']
+    >>> verbing(np.array([['read', ''], ['sing', 'go']]))
+    array([['reading', ''],
+           ['singly', 'go']], dtype='<U7')
+    >>> verbing(pd.Series(['run', 'ing'], index=[3, 1])).to_dict()
+    {3: 'runing', 1: 'ingly'}
+    >>> verbing(pd.Series(['read', 'x'], dtype='category')).tolist()
+    ['reading', 'x']
+    >>> verbing(pd.Series(['go', None]))
+    Traceback (most recent call last):
+    ...
+    ValueError: missing values are not strings
+    """
+    if isinstance(strings, (np.ndarray, pd.Series)):
+        array = _to_array(strings)
+        if not _vectorized():
+            return _map_scalar(string_task.verbing, strings, array)
+        suffix = np.where(np.strings.endswith(array, 'ing'), 'ly', 'ing')
+        suffix[np.strings.str_len(array) < 3] = ''
+        return _like(np.strings.add(array, suffix), strings)
+    return list(map(string_task.verbing, strings))
+
+
+def not_bad(strings):
+    """
+    not_bad() for every string.
+
+    >>> not_bad(('not bad', 'bad, not bad', 'no'))
+    ['good', 'bad, not bad', 'no']
+    >>> not_bad(np.array(['is not that bad!', 'notbad', '']))
+    array(['is good!', 'good', ''], dtype='<U16')
+    >>> not_bad(pd.Series(['not so bad', 'bad not'])).tolist()
+    ['good', 'bad not']
+    """
+    if isinstance(strings, (np.ndarray, pd.Series)):
+        array = _to_array(strings)
+        if not _vectorized():
+            return _map_scalar(string_task.not_bad, strings, array)
+        not_index = np.strings.find(array, 'not')
+        bad_index = np.strings.find(array, 'bad')
+        replace = (not_index != -1) & (bad_index > not_index)
+        # 'good' is shorter than any 'not'...'bad', so the replaced
+        # strings fit into the dtype of the input.
+        result = array.copy()
+        cut = array[replace]
+        result[replace] = np.strings.add(
+            np.strings.add(np.strings.slice(cut, not_index[replace]),
+                           'good'),
+            np.strings.slice(cut, bad_index[replace] + 3, None))
+        return _like(result, strings)
+    return list(map(string_task.not_bad, strings))
+
+
+def front_back(a, b):
+    """
+    front_back() for every pair of strings from a and b, which must
+    have the same length (for arrays, broadcast to the same shape).
+    The result is a list for a sequence a, else of the same kind as a.
+
+    >>> front_back(['abcd', ''], ['xy', ''])
+    ['abxcdy', '']
+    >>> front_back(np.array(['abcde', 'a']), np.array(['xyz', '']))
+    array(['abcxydez', 'a'], dtype='<U8')
+    >>> front_back(pd.Series(['ab']), pd.Series(['cde'])).tolist()
+    ['acdbe']
+    >>> front_back(['ab', 'cd'], ['xy'])
+    Traceback (most recent call last):
+    ...
+    ValueError: a and b have different lengths: 2 and 1
+    """
+    if isinstance(a, (np.ndarray, pd.Series)):
+        a_array = _to_array(a)
+        b_array = _to_array(b)
+        if not _vectorized():
+            return _map_scalar(string_task.front_back, a, a_array, b_array)
+        a_middle = (np.strings.str_len(a_array) + 1) // 2
+        b_middle = (np.strings.str_len(b_array) + 1) // 2
+        # Slices of str_ keep the width of the input: narrowing them to
+        # the longest possible half makes the concatenations cheaper.
+        fronts = np.strings.add(
+            _narrow(np.strings.slice(a_array, a_middle), 1),
+            _narrow(np.strings.slice(b_array, b_middle), 1))
+        backs = np.strings.add(
+            _narrow(np.strings.slice(a_array, a_middle, None), 0),
+            _narrow(np.strings.slice(b_array, b_middle, None), 0))
+        return _like(np.strings.add(fronts, backs), a)
+    if len(a) != len(b):
+        raise ValueError('a and b have different lengths: {} and {}'.format(
+            len(a), len(b)))
+    return list(map(string_task.front_back, a, b))
@@ -7,8 +7,16 @@ def verbing(s):
 
     >>> verbing('read')
     'reading'
+    >>> verbing('')
+    ''
+    >>> verbing('do')
+    'do'
+    >>> verbing('swimming')
+    'swimmingly'
     """
-    return ''
+    if len(s) < 3:
+        return s
+    return s + ('ly' if s.endswith('ing') else 'ing')
 
 
 def not_bad(s):
@@ -21,8 +29,20 @@ def not_bad(s):
 
     >>> not_bad('This dinner is not that bad!')
     'This dinner is good!'
+    >>> not_bad('')
+    ''
+    >>> not_bad('This tea is not hot')
+    'This tea is not hot'
+    >>> not_bad('bad, not bad')
+    'bad, not bad'
+    >>> not_bad('notbad')
+    'good'
     """
-    return ''
+    not_index = s.find('not')
+    bad_index = s.find('bad')
+    if not_index == -1 or bad_index < not_index:
+        return s
+    return s[:not_index] + 'good' + s[bad_index + 3:]
 
 
 def front_back(a, b):
@@ -37,5 +57,13 @@ def front_back(a, b):
 
     >>> front_back('abcd', 'xy')
     'abxcdy'
+    >>> front_back('', '')
+    ''
+    >>> front_back('abcde', 'xyz')
+    'abcxydez'
+    >>> front_back('a', '')
+    'a'
     """
-    return ''
+    a_middle = (len(a) + 1) // 2
+    b_middle = (len(b) + 1) // 2
+    return a[:a_middle] + b[:b_middle] + a[a_middle:] + b[b_middle:]
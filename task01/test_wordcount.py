@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+import collections
+import os
+import pytest
+from wordcount import *
+
+TEXT = ('The quick brown fox\tjumps over\n\nthe lazy dog.  THE END\n'
+        'Σίσυφος ΣΊΣΥΦΟΣ straße\r\nlast')
+
+
+def naive_counts(text):
+    return collections.Counter(word.lower() for word in text.split())
+
+
+def write(path, text, encoding='utf-8'):
+    with open(str(path), 'w', encoding=encoding, newline='') as f:
+        f.write(text)
+    return str(path)
+
+
+@pytest.fixture
+def utf8(monkeypatch):
+    monkeypatch.setattr('locale.getpreferredencoding',
+                        lambda do_setlocale=True: 'utf-8')
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 64, 1 << 20])
+def test_read_chunks_keeps_words_whole(tmp_path, chunk_size):
+    filename = write(tmp_path / 'text', TEXT)
+    pieces = list(read_chunks(filename, chunk_size, encoding='utf-8'))
+    assert ''.join(pieces) == TEXT
+    assert [word for piece in pieces for word in piece.split()] == \
+        TEXT.split()
+
+
+def test_read_chunks_range(tmp_path):
+    filename = write(tmp_path / 'text', 'aa bb cc dd')
+    assert ''.join(read_chunks(filename, 2, encoding='utf-8',
+                               start=3, end=8)) == 'bb cc'
+
+
+@pytest.mark.parametrize('text', ['', ' \n ', 'word', 'a b\na\n', TEXT])
+def test_count_words(tmp_path, text, utf8):
+    filename = write(tmp_path / 'text', text)
+    assert count_words(filename) == naive_counts(text)
+    assert count_words(filename, chunk_size=3) == naive_counts(text)
+
+
+def test_read_words(tmp_path, utf8):
+    filename = write(tmp_path / 'text', TEXT)
+    assert list(read_words(filename)) == TEXT.split()
+
+
+@pytest.mark.parametrize('parts', [1, 2, 3, 7, 100])
+def test_split_file(tmp_path, parts, utf8):
+    filename = write(tmp_path / 'text', TEXT)
+    ranges = split_file(filename, parts)
+    assert 1 <= len(ranges) <= parts
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(TEXT.encode())
+    assert all(end == start for (_, end), (start, _) in
+               zip(ranges, ranges[1:]))
+    assert sum((count_words(filename, start=start, end=end)
+                for start, end in ranges), collections.Counter()) == \
+        naive_counts(TEXT)
+
+
+def test_split_file_utf16(tmp_path, monkeypatch):
+    monkeypatch.setattr('locale.getpreferredencoding',
+                        lambda do_setlocale=True: 'utf-16')
+    filename = write(tmp_path / 'text', TEXT, 'utf-16')
+    assert split_file(filename, 4) == [(0, len(TEXT.encode('utf-16')))]
+
+
+def test_make_shards(tmp_path):
+    sizes = [1000, 1, 1, 1, 300]
+    filenames = [write(tmp_path / str(i), 'word ' * size)
+                 for i, size in enumerate(sizes)]
+    shards = make_shards(filenames, 3)
+    assert 2 <= len(shards) <= 4
+    covered = collections.Counter()
+    for shard in shards:
+        for filename, start, end in shard:
+            covered[filename] += end - start
+    assert covered == {filename: 5 * size
+                       for filename, size in zip(filenames, sizes)}
+
+
+@pytest.mark.parametrize('jobs', [2, 3])
+def test_count_files_jobs(tmp_path, jobs, utf8):
+    texts = [TEXT * 50, '', 'one two two\n' * 1000, TEXT]
+    filenames = [write(tmp_path / str(i), text)
+                 for i, text in enumerate(texts)]
+    expected = naive_counts(''.join(text + '\n' for text in texts))
+    assert count_files(filenames) == expected
+    assert count_files(filenames, jobs) == expected
+
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+
+def test_index_follows_changes(tmp_path, utf8):
+    filler = 'filler ' * 20
+    log = write(tmp_path / 'log', 'alpha ' + filler + 'beta\ngam')
+    index = str(tmp_path / 'index')
+    assert count_indexed([log], index) == count_files([log])
+    entry = load_index(index)[os.path.abspath(log)]
+    assert scan_file(log, entry) is entry
+    append(log, 'ma delta\n')
+    text = 'alpha ' + filler + 'beta\ngamma delta\n'
+    assert count_indexed([log], index) == naive_counts(text)
+    # The start is rewritten and the file grows: the bytes right before
+    # the stored offset stay the same, the sampled start does not.
+    text = 'omega ' + filler + 'beta\ngamma delta\nepsilon\n'
+    write(log, text)
+    assert count_indexed([log], index) == naive_counts(text)
+    write(log, 'short\n')
+    assert count_indexed([log], index) == naive_counts('short\n')
+    os.rename(log, log + '.1')
+    write(log, 'rotated rotated')
+    assert count_indexed([log, log + '.1'], index) == naive_counts(
+        'rotated rotated short')
+
+
+def test_index_verify(tmp_path, utf8):
+    filler = 'filler ' * (SAMPLE_SIZE // 7 * 3)
+    log = write(tmp_path / 'log', filler + 'alpha ' + filler)
+    index = str(tmp_path / 'index')
+    count_indexed([log], index)
+    # The middle is rewritten past both samples, and the file grows.
+    text = filler + 'omega ' + filler + 'tail\n'
+    write(log, text)
+    stale = count_indexed([log], index)
+    assert stale['alpha'] == 1 and stale['omega'] == 0
+    append(log, 'more\n')
+    assert count_indexed([log], index, verify=True) == naive_counts(
+        text + 'more\n')
+
+
+def test_index_matches_jobs(tmp_path, utf8):
+    log = write(tmp_path / 'log', TEXT * 100)
+    index = str(tmp_path / 'index')
+    assert count_indexed([log], index, jobs=3) == count_files([log])
+    append(log, ' tail words ' + TEXT)
+    assert count_indexed([log], index, jobs=3) == count_files([log])
+
+
+def run_main(monkeypatch, capsys, *args):
+    monkeypatch.setattr('sys.argv', ['wordcount.py'] + list(args))
+    main()
+    return capsys.readouterr().out
+
+
+def test_command_line(tmp_path, monkeypatch, capsys, utf8):
+    monkeypatch.chdir(str(tmp_path))
+    write(tmp_path / 'a', 'b a c a b a\n')
+    # A file named like a number is not taken for the count of words.
+    write(tmp_path / '5', 'd d d d\n')
+    assert run_main(monkeypatch, capsys, '--count', 'a') == 'a 3\nb 2\nc 1\n'
+    assert run_main(monkeypatch, capsys, '--topcount', 'a') == 'a\nb\nc\n'
+    assert run_main(monkeypatch, capsys, '--topcount', '5') == 'd\n'
+    assert run_main(monkeypatch, capsys, '--topcount', '--top', '1',
+                    'a', '5') == 'd\n'
+    assert run_main(monkeypatch, capsys, '--word', 'A', 'a') == '3\n'
+    assert run_main(monkeypatch, capsys, '--top', '2', '--jobs', '2',
+                    '--index', 'index', '--topcount', 'a') == 'a\nb\n'
+    with pytest.raises(SystemExit):
+        run_main(monkeypatch, capsys, '--count', '--topcount', 'a')
+    with pytest.raises(SystemExit):
+        run_main(monkeypatch, capsys, 'a')
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """Wordcount exercise
-The main() below is already defined and complete. It calls print_words()
-and print_top() functions which you write.
+main() below parses the command line (see --help) and calls print_words(),
+print_top() or print_word().
 
 1. For the --count flag, implement a print_words(filename) function that counts
 how often each word appears in the text and prints:
@@ -14,8 +14,8 @@ come before letters -- that's fine). Store all the words as lowercase,
 so 'The' and 'the' count as the same word.
 
 2. For the --topcount flag, implement a print_top(filename) which prints just
-the top 20 most common words sorted so the most common word is first, then the
-next most common, and so on:
+the top 20 (or --top N) most common words sorted so the most common word is
+first, then the next most common, and so on:
 word1
 word2
 ...
@@ -31,41 +31,412 @@ print_words() and print_top().
 
 """
 
+import argparse
+import codecs
+import collections
+import concurrent.futures
+import heapq
+import locale
+import os
+import pickle
+import re
 import sys
+import tempfile
+import zlib
 
 
 def read_words(filename):
-    words = []
-    with open(filename, "r") as f:
-        for line in f:
-            words.extend(line.split())
-    return words
+    """Yields the words of the file one by one, see read_chunks()."""
+    for text in read_chunks(filename):
+        yield from text.split()
+
+
+def read_chunks(filename, chunk_size=1 << 20, encoding=None, start=0,
+                end=None):
+    """
+    Reads the file in binary chunks of chunk_size bytes and yields its
+    text piece by piece. A word is never split between two pieces: the
+    part of a chunk after its last whitespace is carried over to the next
+    one. So only one chunk (and the longest word) is in memory at a time.
+    The file is decoded as open() in text mode would do it.
+    Only bytes from start to end (the end of file by default) are read.
+    """
+    if encoding is None:
+        encoding = locale.getpreferredencoding(False)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    tail = ''
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        left = end - start if end is not None else -1
+        while True:
+            data = f.read(chunk_size if left < 0 else min(chunk_size, left))
+            left -= len(data)
+            text = tail + decoder.decode(data, final=not data)
+            tail = ''
+            if data and text and not text[-1].isspace():
+                tail = text.rsplit(None, 1)[-1]
+                text = text[:len(text) - len(tail)]
+            if text:
+                yield text
+            if not data:
+                return
+
+
+def count_words(filename, chunk_size=1 << 20, start=0, end=None):
+    """
+    Returns a Counter of lowercased words in the file (or in its bytes
+    from start to end, see read_chunks()). Each piece from read_chunks()
+    is lowercased and split as a whole: whitespace stops the context of
+    str.lower() (e.g. the final sigma), so this equals lowercasing every
+    word separately.
+    """
+    counts = collections.Counter()
+    for text in read_chunks(filename, chunk_size, start=start, end=end):
+        counts.update(text.lower().split())
+    return counts
+
+
+def is_ascii_compatible(encoding):
+    """
+    Tells whether ASCII whitespace is encoded as the same single bytes,
+    so a file can be cut right after such a byte (true for UTF-8 and
+    single-byte encodings, false for UTF-16).
+
+    >>> is_ascii_compatible('utf-8'), is_ascii_compatible('utf-16')
+    (True, False)
+    """
+    text = ' \t\n\x0b\x0c\r\x1c\x1d\x1e\x1f'
+    try:
+        return text.encode(encoding) == text.encode('ascii')
+    except UnicodeError:
+        return False
+
+
+def split_file(filename, parts, encoding=None):
+    """
+    Splits the file into at most parts byte ranges (start, end) of about
+    equal size. Every range but the last ends right after an ASCII
+    whitespace byte, so no word and no character is cut. If the encoding
+    does not allow such cuts, the whole file is one range.
+    """
+    if encoding is None:
+        encoding = locale.getpreferredencoding(False)
+    size = os.path.getsize(filename)
+    if parts <= 1 or not is_ascii_compatible(encoding):
+        return [(0, size)]
+    whitespace = re.compile(rb'[\t-\r\x1c- ]')
+    boundaries = [0]
+    with open(filename, 'rb') as f:
+        for part in range(1, parts):
+            position = max(size * part // parts, boundaries[-1])
+            f.seek(position)
+            while position < size:
+                data = f.read(1 << 16)
+                match = whitespace.search(data)
+                if match:
+                    position += match.end()
+                    break
+                position += len(data)
+            boundaries.append(min(position, size))
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:])
+            if start < end]
+
+
+def make_shards(filenames, jobs):
+    """
+    Distributes the files between at most jobs shards of about equal size.
+    A shard is a list of (filename, start, end) ranges: big files are cut
+    by split_file(), small ones are taken whole, several per shard, so that
+    a worker sends back one Counter however many files there are.
+    """
+    sizes = [os.path.getsize(filename) for filename in filenames]
+    target = max(1, -(-sum(sizes) // max(1, jobs)))
+    shards = [[]]
+    filled = 0
+    for filename, size in zip(filenames, sizes):
+        for start, end in split_file(filename, -(-size // target)):
+            if filled >= target:
+                shards.append([])
+                filled = 0
+            shards[-1].append((filename, start, end))
+            filled += end - start
+    return shards
+
+
+def count_shard(shard):
+    counts = collections.Counter()
+    for filename, start, end in shard:
+        counts.update(count_words(filename, start=start, end=end))
+    return counts
+
+
+def merge_tree(counters):
+    """
+    Merges Counters pairwise, level by level, always the smaller Counter
+    into the bigger one.
+
+    >>> merge_tree([collections.Counter(s) for s in ['ab', 'b', 'c']])
+    Counter({'b': 2, 'a': 1, 'c': 1})
+    """
+    counters = list(counters)
+    if not counters:
+        return collections.Counter()
+    while len(counters) > 1:
+        merged = []
+        for first, second in zip(counters[0::2], counters[1::2]):
+            if len(first) < len(second):
+                first, second = second, first
+            first.update(second)
+            merged.append(first)
+        if len(counters) % 2:
+            merged.append(counters[-1])
+        counters = merged
+    return counters[0]
+
+
+def count_files(filenames, jobs=1):
+    """
+    Returns a Counter of lowercased words in all the files. With jobs > 1
+    the files are cut by make_shards(), the shards are counted in a pool of
+    jobs processes and the partial Counters are merged by merge_tree().
+    Merging happens in this process: sending Counters to the pool to merge
+    them there costs more pickling than the merge itself.
+    """
+    if jobs <= 1:
+        return merge_tree(count_words(filename) for filename in filenames)
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        return merge_tree(executor.map(count_shard,
+                                       make_shards(filenames, jobs)))
+
+
+def last_boundary(filename, start, end):
+    """
+    Returns the position right after the last ASCII whitespace byte in
+    bytes start..end of the file, or start if there is none. The file is
+    read backwards in blocks, so only the last word is read.
+    """
+    whitespace = re.compile(rb'[\t-\r\x1c- ]')
+    with open(filename, 'rb') as f:
+        position = end
+        while position > start:
+            block_start = max(start, position - (1 << 16))
+            f.seek(block_start)
+            data = f.read(position - block_start)
+            matches = list(whitespace.finditer(data))
+            if matches:
+                return block_start + matches[-1].end()
+            position = block_start
+    return start
+
+
+def checksum(filename, start, end, value=0, block_size=1 << 20):
+    """
+    CRC-32 of bytes start..end of the file, continuing value, the CRC-32
+    of the bytes before start.
+    """
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        left = end - start
+        while left > 0:
+            data = f.read(min(block_size, left))
+            if not data:
+                break
+            value = zlib.crc32(data, value)
+            left -= len(data)
+    return value
+
+
+SAMPLE_SIZE = 1 << 16
+
+
+def sample_checksum(filename, end, size=SAMPLE_SIZE):
+    """
+    CRC-32 of the first and the last size bytes before end (of all of
+    them if there are fewer than 2 * size): reads a bounded amount
+    however long the file grows.
+    """
+    if end <= 2 * size:
+        return checksum(filename, 0, end)
+    return checksum(filename, end - size, end, checksum(filename, 0, size))
+
+
+def scan_file(filename, entry, jobs=1, encoding=None, verify=False):
+    """
+    Brings the index entry of the file up to date and returns it.
+
+    The entry stores the inode, size and mtime_ns of the file when it was
+    last seen, the offset up to which it was counted into 'counts' (right
+    after a whitespace byte), 'sample' - the sample_checksum() of the
+    bytes before that offset, 'check' - the checksum() of all of them, and
+    'tail' - the counts of the words after that offset, which may still be
+    growing. If the inode, size and mtime are the same, nothing is read.
+    If the inode is the same, the file grew and the sample checksum did
+    not change, the file was only appended to, and only the bytes after
+    the offset are counted. Otherwise (rotated, truncated or rewritten
+    file) it is counted again from the start.
+
+    The sample misses a rewrite that keeps the size of the counted part
+    and both of its ends; with verify the whole counted part is checked
+    too, which reads the file from the start on every growth.
+    """
+    if encoding is None:
+        encoding = locale.getpreferredencoding(False)
+    info = os.stat(filename)
+    if (entry is not None and entry['device'] == info.st_dev and
+            entry['inode'] == info.st_ino and
+            entry['size'] == info.st_size and
+            entry['mtime_ns'] == info.st_mtime_ns):
+        return entry
+    if (entry is None or entry['device'] != info.st_dev or
+            entry['inode'] != info.st_ino or
+            entry['size'] >= info.st_size or
+            not is_ascii_compatible(encoding) or
+            sample_checksum(filename, entry['offset']) !=
+            entry.get('sample') or
+            verify and checksum(filename, 0, entry['offset']) !=
+            entry['check']):
+        entry = {'offset': 0, 'check': 0, 'counts': collections.Counter()}
+    offset = last_boundary(filename, entry['offset'], info.st_size)
+    tail = count_words(filename, start=offset, end=info.st_size)
+    if entry['offset'] == 0 and jobs > 1:
+        # The words before and after offset are disjoint.
+        counts = count_files([filename], jobs)
+        counts -= tail
+    else:
+        counts = count_words(filename, start=entry['offset'], end=offset)
+    entry['counts'].update(counts)
+    return {
+        'device': info.st_dev, 'inode': info.st_ino, 'size': info.st_size,
+        'mtime_ns': info.st_mtime_ns, 'offset': offset,
+        'sample': sample_checksum(filename, offset),
+        'check': checksum(filename, entry['offset'], offset, entry['check']),
+        'counts': entry['counts'], 'tail': tail,
+    }
+
+
+def load_index(path):
+    """
+    Loads the index written by save_index(): a dict from absolute file
+    names to the entries of scan_file(). A missing or unreadable index is
+    an empty one.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return {}
+
+
+def save_index(path, index):
+    """Writes the index atomically: readers see the old or the new one."""
+    descriptor, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            pickle.dump(index, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def count_indexed(filenames, index_path, jobs=1, verify=False):
+    """
+    Like count_files(), but keeps the counts of every file in the index
+    at index_path: files that did not change are not read at all, files
+    that grew are read only from where the last run stopped. verify is
+    passed to scan_file().
+    """
+    index = load_index(index_path)
+    counters = []
+    changed = False
+    for filename in filenames:
+        key = os.path.abspath(filename)
+        entry = scan_file(filename, index.get(key), jobs, verify=verify)
+        if entry is not index.get(key):
+            index[key] = entry
+            changed = True
+        counters += [entry['counts'], entry['tail']]
+    if changed:
+        save_index(index_path, index)
+    if len(counters) == 2 and not counters[1]:
+        return counters[0]
+    return merge_tree(collections.Counter(counts) for counts in counters)
+
+
+def top_words(counts, n=20):
+    """
+    Returns n most common words, most common first, ties in word order.
+    Uses a heap of size n instead of sorting the whole vocabulary.
+
+    >>> top_words(collections.Counter('abracadabra'), 3)
+    ['a', 'b', 'r']
+    """
+    return [word for word, _ in heapq.nsmallest(
+        n, counts.items(), key=lambda item: (-item[1], item[0]))]
+
+
+def as_filenames(filename):
+    return [filename] if isinstance(filename, str) else list(filename)
+
+
+def get_counts(filename, jobs=1, index=None):
+    """
+    filename may also be a list of files, which are counted together.
+    If index is a path, counts are kept there between runs, see
+    count_indexed().
+    """
+    if index is not None:
+        return count_indexed(as_filenames(filename), index, jobs)
+    return count_files(as_filenames(filename), jobs)
+
+
+def print_words(filename, jobs=1, index=None):
+    counts = get_counts(filename, jobs, index)
+    for word in sorted(counts):
+        print(word, counts[word])
+
+
+def print_top(filename, jobs=1, index=None, n=20):
+    for word in top_words(get_counts(filename, jobs, index), n):
+        print(word)
+
+
+def print_word(filename, word, jobs=1, index=None):
+    """Prints how many times the word occurs (in any case)."""
+    print(get_counts(filename, jobs, index)[word.lower()])
 
-# Define print_words(filename) and print_top(filename) functions.
-# You could write a helper utility function that reads a file
-# and builds and returns a word/count dict for it.
-# Then print_words() and print_top() can just call the utility function.
 
 ###
 
-# This basic command line argument parsing code is provided and
-# calls the print_words() and print_top() functions which you must define.
+# Command line: {--count | --topcount [--top N] | --word W} file...,
+# optionally with --jobs N and --index PATH.
 
 
 def main():
-    if len(sys.argv) != 3:
-        print('usage: ./wordcount.py {--count | --topcount} file')
-        sys.exit(1)
-
-    option = sys.argv[1]
-    filename = sys.argv[2]
-    if option == '--count':
-        print_words(filename)
-    elif option == '--topcount':
-        print_top(filename)
+    parser = argparse.ArgumentParser()
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument('--count', action='store_true',
+                       help='print every word with its count')
+    query.add_argument('--topcount', action='store_true',
+                       help='print the most common words')
+    query.add_argument('--word', help='print the count of one word')
+    parser.add_argument('--top', type=int, default=20, metavar='N',
+                        help='number of words for --topcount (20)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='number of processes counting words')
+    parser.add_argument('--index', metavar='PATH',
+                        help='file to keep counts in between runs')
+    parser.add_argument('files', nargs='+')
+    args = parser.parse_args()
+
+    if args.count:
+        print_words(args.files, args.jobs, args.index)
+    elif args.word is not None:
+        print_word(args.files, args.word, args.jobs, args.index)
     else:
-        print('unknown option: ' + option)
-        sys.exit(1)
+        print_top(args.files, args.jobs, args.index, args.top)
 
 
 if __name__ == '__main__':
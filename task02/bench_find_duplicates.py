@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Сколько байт читает find_duplicates по сравнению с наивным решением,
+которое считает хеш всего содержимого каждого файла.
+
+Во временном каталоге строится дерево из files файлов: в основном
+маленькие файлы (размеры до 4 КиБ часто совпадают), один процент -
+большие файлы нескольких размеров с общей серединой, и каждый
+двадцатый файл - копия одного из предыдущих. Время сильно зависит от
+кэша страниц, поэтому главное - число прочитанных байт и открытых файлов.
+
+Запуск: ./bench_find_duplicates.py [количество файлов]
+"""
+import collections
+import os
+import random
+import sys
+import tempfile
+import time
+from find_duplicates import find_duplicates, find_files, full_digest, group_by
+
+
+def make_tree(top_dir, count, seed=0):
+    rng = random.Random(seed)
+    middle = rng.randbytes(1024 * 1024)
+    paths = []
+    for index in range(count):
+        directory = os.path.join(top_dir, 'dir{:03}'.format(index // 1000))
+        if index % 1000 == 0:
+            os.mkdir(directory)
+        path = os.path.join(directory, 'file{:03}'.format(index % 1000))
+        if paths and index % 20 == 0:
+            with open(rng.choice(paths), 'rb') as original:
+                content = original.read()
+        elif index % 100 == 1:
+            size = rng.choice([256, 512, 1024]) * 1024
+            # Начало и конец разные, кроме каждого десятого большого файла:
+            # у того отличается только середина.
+            edge = rng.randbytes(16) if index % 1000 != 1 else b'e' * 16
+            content = edge + middle[:size - 32] + edge
+            if index % 1000 == 1:
+                content = (content[:size // 2] + rng.randbytes(1) +
+                           content[size // 2 + 1:])
+        else:
+            content = rng.randbytes(rng.randrange(4096))
+        with open(path, 'wb') as file:
+            file.write(content)
+        paths.append(path)
+
+
+def naive(top_dir, stats):
+    return group_by(find_files(top_dir),
+                    lambda path, stats: full_digest(path, stats=stats), stats)
+
+
+def measure(name, function, top_dir):
+    stats = collections.Counter()
+    start = time.perf_counter()
+    groups = function(top_dir, stats=stats)
+    elapsed = time.perf_counter() - start
+    print('{:<10} {:>8} {:>14} {:>8} {:>9.3f}'.format(
+        name, len(groups), stats['bytes'], stats['files'], elapsed))
+    return stats['bytes']
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 5
+    with tempfile.TemporaryDirectory() as top_dir:
+        make_tree(top_dir, count)
+        total = sum(os.path.getsize(path) for path in find_files(top_dir))
+        print('files: {}, total bytes: {}'.format(count, total))
+        print('{:<10} {:>8} {:>14} {:>8} {:>9}'.format(
+            'method', 'groups', 'bytes read', 'opens', 'seconds'))
+        naive_bytes = measure('naive', naive, top_dir)
+        staged_bytes = measure('staged', find_duplicates, top_dir)
+        print('bytes read: {:.1%} of naive'.format(staged_bytes / naive_bytes))
+
+
+if __name__ == '__main__':
+    main()
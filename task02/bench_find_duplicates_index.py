@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Повторный запуск find_duplicates с индексом (--index) на дереве, где
+с прошлого запуска изменился один процент файлов.
+
+Дерево строится так же, как в bench_find_duplicates. Сравниваются
+повторный запуск без индекса и с индексом; время запуска с индексом
+включает загрузку и сохранение базы SQLite.
+
+Запуск: ./bench_find_duplicates_index.py [количество файлов]
+"""
+import collections
+import os
+import random
+import sys
+import tempfile
+import time
+from find_duplicates import (
+    find_duplicates, find_files, format_groups, load_index, save_index)
+from bench_find_duplicates import make_tree
+
+
+def change_files(top_dir, fraction, seed=1):
+    """Переписывает fraction файлов; половина из них сохраняет размер."""
+    rng = random.Random(seed)
+    paths = sorted(find_files(top_dir))
+    changed = rng.sample(paths, round(len(paths) * fraction))
+    for number, path in enumerate(changed):
+        size = os.path.getsize(path)
+        if number % 2:
+            size = rng.randrange(4096)
+        with open(path, 'wb') as file:
+            file.write(rng.randbytes(size))
+    return len(changed)
+
+
+def run(top_dir, index_path=None):
+    stats = collections.Counter()
+    start = time.perf_counter()
+    index = load_index(index_path) if index_path else None
+    groups = find_duplicates(top_dir, stats=stats, index=index)
+    if index_path:
+        save_index(index_path, index)
+    return (format_groups(groups, top_dir), stats,
+            time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 5
+    with tempfile.TemporaryDirectory() as work_dir:
+        top_dir = os.path.join(work_dir, 'tree')
+        index_path = os.path.join(work_dir, 'index.sqlite')
+        os.mkdir(top_dir)
+        make_tree(top_dir, count)
+        _, _, elapsed = run(top_dir, index_path)
+        print('files: {}, first run with index: {:.3f} s, index: {} bytes'
+              .format(count, elapsed, os.path.getsize(index_path)))
+        changed = change_files(top_dir, 0.01)
+        print('changed files: {}'.format(changed))
+        print('{:<12} {:>14} {:>8} {:>9}'.format(
+            'second run', 'bytes read', 'opens', 'seconds'))
+        expected, stats, elapsed = run(top_dir)
+        print('{:<12} {:>14} {:>8} {:>9.3f}'.format(
+            'no index', stats['bytes'], stats['files'], elapsed))
+        groups, stats, elapsed = run(top_dir, index_path)
+        assert groups == expected
+        print('{:<12} {:>14} {:>8} {:>9.3f}'.format(
+            'index', stats['bytes'], stats['files'], elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Пропускная способность find_duplicates при разном числе потоков --jobs.
+
+Дерево состоит из files файлов размера size МиБ с одинаковыми началом
+и концом, так что каждый файл проходит все этапы и читается целиком.
+Только что записанные файлы лежат в кэше страниц, поэтому измеряется
+скорость хеширования и копирования из кэша; на холодном диске или сетевой
+файловой системе выигрыш от потоков больше, потому что они перекрывают
+ожидание чтения.
+
+Запуск: ./bench_find_duplicates_jobs.py [количество файлов] [размер в МиБ]
+"""
+import collections
+import os
+import random
+import sys
+import tempfile
+import time
+from find_duplicates import find_duplicates
+
+
+def make_tree(top_dir, count, size, seed=0):
+    rng = random.Random(seed)
+    body = rng.randbytes(size)
+    for index in range(count):
+        directory = os.path.join(top_dir, 'dir{:02}'.format(index % 10))
+        os.makedirs(directory, exist_ok=True)
+        # Файлы отличаются одним байтом в середине; каждый десятый
+        # повторяет предыдущий, чтобы было что сравнивать побайтово.
+        middle = (index - (index % 10 == 9)).to_bytes(4, 'little')
+        with open(os.path.join(directory, 'file{:04}'.format(index)),
+                  'wb') as file:
+            file.write(body[:size // 2] + middle + body[size // 2:])
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as top_dir:
+        make_tree(top_dir, count, size * 1024 * 1024)
+        print('cpus: {}, files: {}, size: {} MiB'.format(
+            os.cpu_count(), count, size))
+        print('{:<6} {:>8} {:>9} {:>9} {:>9}'.format(
+            'jobs', 'groups', 'seconds', 'MiB/s', 'speedup'))
+        expected = None
+        base = None
+        for jobs in (1, 2, 4, 8):
+            stats = collections.Counter()
+            start = time.perf_counter()
+            groups = find_duplicates(top_dir, stats=stats, jobs=jobs)
+            elapsed = time.perf_counter() - start
+            if expected is None:
+                expected, base = groups, elapsed
+            assert groups == expected
+            print('{:<6} {:>8} {:>9.3f} {:>9.1f} {:>9.2f}'.format(
+                jobs, len(groups), elapsed,
+                stats['bytes'] / elapsed / 2 ** 20, base / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Время хеширования одного большого файла в секундах на ГиБ при разных
+размерах блока: прежний цикл file.read(block) (новый объект bytes на
+каждый блок), readinto в один буфер (full_digest с mmap_size=None) и mmap
+(full_digest с mmap_size=1, размер блока не важен).
+
+Для каждого способа печатается лучшее время из repeat запусков, число
+созданных буферов и пик памяти по tracemalloc (отдельным запуском, потому
+что tracemalloc сам замедляет выделение памяти). Файл только что записан
+и лежит в кэше страниц, так что время - это копирование и хеширование,
+а не ожидание диска.
+
+Запуск: ./bench_find_duplicates_read.py [размер файла в МиБ] [повторы]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from find_duplicates import full_digest
+
+
+def read_loop(path, block_size):
+    """Прежнее ядро full_digest; возвращает хеш и число буферов."""
+    digest = hashlib.blake2b()
+    buffers = 0
+    with open(path, 'rb') as file:
+        while True:
+            block = file.read(block_size)
+            if not block:
+                return digest.digest(), buffers
+            buffers += 1
+            digest.update(block)
+
+
+def readinto_loop(path, block_size):
+    return full_digest(path, block_size, mmap_size=None), 1
+
+
+def mmap_digest(path, block_size):
+    return full_digest(path, block_size, mmap_size=1), 0
+
+
+def measure(function, path, block_size, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        digest, buffers = function(path, block_size)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    function(path, block_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return digest, best, buffers, peak
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    gibibytes = size / 1024
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'big')
+        with open(path, 'wb') as file:
+            for _ in range(size):
+                file.write(os.urandom(1024 * 1024))
+        print('file: {} MiB'.format(size))
+        print('{:<9} {:>8} {:>9} {:>9} {:>10}'.format(
+            'method', 'block', 's/GiB', 'buffers', 'peak KiB'))
+        expected = None
+        methods = [('read', read_loop), ('readinto', readinto_loop)]
+        for block_size in (16, 64, 256, 1024, 4096):
+            for name, function in methods:
+                digest, elapsed, buffers, peak = measure(
+                    function, path, block_size * 1024, repeat)
+                expected = expected or digest
+                assert digest == expected
+                print('{:<9} {:>7}K {:>9.3f} {:>9} {:>10.0f}'.format(
+                    name, block_size, elapsed / gibibytes, buffers,
+                    peak / 1024))
+        digest, elapsed, buffers, peak = measure(mmap_digest, path, 0, repeat)
+        assert digest == expected
+        print('{:<9} {:>8} {:>9.3f} {:>9} {:>10.0f}'.format(
+            'mmap', '-', elapsed / gibibytes, buffers, peak / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,470 @@
 #!/usr/bin/env python3
+"""
+Поиск файлов с побайтово одинаковым содержимым.
+
+Содержимое сравнивается поэтапно, и каждый следующий этап получает
+только файлы, которые предыдущий не смог отличить от других:
+
+1. файлы группируются по размеру из os.stat, файлы уникального размера
+   отбрасываются, не читая их;
+2. в каждой группе считается хеш первых и последних partial_size байт;
+3. у совпавших по нему файлов считается хеш всего содержимого (файлы не
+   длиннее 2 * partial_size на этапе 2 уже прочитаны целиком, и для них
+   этот этап пропускается);
+4. файлы с одинаковым хешем сравниваются побайтово.
+
+Чтение идёт блоками по block_size байт (--block-size) в один
+постоянный буфер через readinto, а файлы от 64 МиБ хешируются через mmap
+без копирования. По bench_find_duplicates_read.py на файле в кэше
+страниц время от 64 КиБ до 4 МиБ одинаково в пределах шума: его почти
+целиком занимает blake2b (около 2.2 с/ГиБ), а на блоках в 16 КиБ уже
+заметны накладные расходы на вызовы. Поэтому выбран наименьший из
+быстрых размеров, 64 КиБ: при побайтовом сравнении нужны два буфера,
+а с --jobs N - по два в каждом из N потоков.
+
+Если передать stats (например, collections.Counter), в stats['bytes']
+накапливается число прочитанных байт, а в stats['files'] - число
+открытых файлов.
+
+Время работы на каталоге без дубликатов - O(n + s): каждый файл
+читается не больше одного раза на этапе 2 и одного на этапе 3.
+С ключом --jobs N файлы читаются и хешируются в N потоках, а с ключом
+--index PATH хеши сохраняются в базе SQLite, и при следующем запуске
+читаются только новые и изменившиеся файлы.
+"""
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
+import mmap
+import os
+import sqlite3
+import sys
+
+
+def is_ignored(name):
+    """
+    >>> is_ignored('.hidden'), is_ignored('~backup'), is_ignored('file')
+    (True, True, False)
+    """
+    return name.startswith(('.', '~'))
+
+
+def scan_files(top_dir):
+    """
+    Пары (путь, os.stat_result) для всех неигнорируемых обычных файлов
+    в top_dir и его подкаталогах. Скрытые каталоги пропускаются целиком,
+    символические ссылки - тоже. Обход идёт через os.scandir, которая
+    сообщает тип файла без отдельного системного вызова; в памяти держится
+    только стек ещё не просмотренных каталогов, а файлы выдаются по одному.
+    """
+    directories = [top_dir]
+    while directories:
+        try:
+            entries = os.scandir(directories.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if is_ignored(entry.name):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.stat(follow_symlinks=False)
+                except OSError:
+                    pass
+
+
+def find_files(top_dir):
+    """Пути всех неигнорируемых обычных файлов, как в scan_files."""
+    for path, _ in scan_files(top_dir):
+        yield path
+
+
+def bounded_map(function, items, jobs=1, queue_size=None):
+    """
+    Как map(function, items), но при jobs > 1 вызовы идут в пуле из jobs
+    потоков. items читаются по мере надобности: одновременно в работе или
+    в ожидании находятся не больше queue_size вызовов (по умолчанию
+    2 * jobs), так что память не растёт с числом items. Результаты
+    выдаются в порядке items.
+    """
+    if jobs <= 1:
+        yield from map(function, items)
+        return
+    queue_size = queue_size or 2 * jobs
+    with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+        pending = collections.deque()
+        for item in items:
+            if len(pending) >= queue_size:
+                yield pending.popleft().result()
+            pending.append(executor.submit(function, item))
+        while pending:
+            yield pending.popleft().result()
+
+
+def group_by(paths, key, stats=None, jobs=1):
+    """
+    Разбивает paths на группы с одинаковым key(path, stats) и оставляет
+    группы хотя бы из двух файлов в порядке первого появления. Файлы, для
+    которых key бросает OSError (например, нет прав на чтение),
+    пропускаются. При jobs > 1 key вызывается в пуле потоков; каждый вызов
+    получает свой счётчик, и счётчики складываются в stats в вызывающем
+    потоке, поэтому stats не нужно защищать от гонок.
+
+    >>> group_by(['a', 'bb', 'cc', 'ddd'], lambda path, stats: len(path))
+    [['bb', 'cc']]
+    """
+    def evaluate(path):
+        counter = None if stats is None else collections.Counter()
+        try:
+            return path, key(path, counter), counter
+        except OSError:
+            return path, None, counter
+
+    groups = collections.defaultdict(list)
+    for path, value, counter in bounded_map(evaluate, paths, jobs):
+        if counter:
+            stats.update(counter)
+        if value is not None:
+            groups[value].append(path)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def read_into(file, buffer, stats=None):
+    """
+    Заполняет buffer из file, пока не кончится буфер или файл, и
+    возвращает число прочитанных байт. Новых объектов не создаётся:
+    readinto небуферизованного файла пишет прямо в buffer.
+    """
+    view = memoryview(buffer)
+    filled = 0
+    while filled < len(view):
+        count = file.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    if stats is not None:
+        stats['bytes'] += filled
+    return filled
+
+
+def read_blocks(file, length, block_size, stats=None):
+    """
+    Читает из file не больше length байт блоками по block_size. Все блоки
+    - memoryview одного и того же буфера, поэтому блок действителен только
+    до следующего шага итерации.
+    """
+    buffer = memoryview(bytearray(min(block_size, length)))
+    while length > 0:
+        count = read_into(file, buffer[:length], stats)
+        if not count:
+            return
+        length -= count
+        yield buffer[:count]
+
+
+def open_file(path, stats=None, sequential=False):
+    """
+    Открывает файл без буфера Python: данные копируются из ядра сразу
+    в буфер read_into. Если файл будет читаться подряд до конца, ядру
+    сообщается об этом через posix_fadvise, чтобы оно читало вперёд
+    большими порциями.
+    """
+    if stats is not None:
+        stats['files'] += 1
+    file = open(path, 'rb', buffering=0)
+    if sequential and hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    return file
+
+
+def partial_digest(path, partial_size=64 * 1024, block_size=64 * 1024,
+                   stats=None):
+    """
+    Хеш первых и последних partial_size байт файла; если файл не длиннее
+    2 * partial_size, то это хеш всего содержимого.
+    """
+    digest = hashlib.blake2b()
+    with open_file(path, stats) as file:
+        size = os.fstat(file.fileno()).st_size
+        if size <= 2 * partial_size:
+            for block in read_blocks(file, size, block_size, stats):
+                digest.update(block)
+        else:
+            for block in read_blocks(file, partial_size, block_size, stats):
+                digest.update(block)
+            file.seek(size - partial_size)
+            for block in read_blocks(file, partial_size, block_size, stats):
+                digest.update(block)
+    return digest.digest()
+
+
+def full_digest(path, block_size=64 * 1024, stats=None,
+                mmap_size=64 * 1024 * 1024):
+    """
+    Хеш всего содержимого файла. Файлы не меньше mmap_size байт (None -
+    никакие) отображаются в память через mmap и хешируются одним вызовом
+    без копирования в буфер. Если файл укоротят, пока он отображён,
+    процесс получит SIGBUS, поэтому порог не стоит делать маленьким.
+    """
+    digest = hashlib.blake2b()
+    with open_file(path, stats, sequential=True) as file:
+        size = os.fstat(file.fileno()).st_size
+        if mmap_size is not None and size >= max(mmap_size, 1):
+            with mmap.mmap(file.fileno(), 0,
+                           access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, 'madvise'):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                digest.update(mapped)
+            if stats is not None:
+                stats['bytes'] += size
+        else:
+            for block in read_blocks(file, size, block_size, stats):
+                digest.update(block)
+    return digest.digest()
+
+
+def same_content(path1, path2, block_size=64 * 1024, stats=None):
+    """
+    Побайтовое сравнение двух файлов. Блоки читаются в два постоянных
+    буфера и сравниваются целиком: сравнение bytearray - это memcmp,
+    а сравнение memoryview идёт поэлементно и во много раз медленнее.
+    """
+    buffer1 = bytearray(block_size)
+    buffer2 = bytearray(block_size)
+    with open_file(path1, stats, sequential=True) as file1, \
+            open_file(path2, stats, sequential=True) as file2:
+        while True:
+            count1 = read_into(file1, buffer1, stats)
+            count2 = read_into(file2, buffer2, stats)
+            if count1 != count2:
+                return False
+            if count1 < block_size:
+                return buffer1[:count1] == buffer2[:count2]
+            if buffer1 != buffer2:
+                return False
+
+
+def split_identical(paths, block_size=64 * 1024, stats=None, classes=()):
+    """
+    Разбивает файлы на классы побайтово одинаковых и оставляет классы
+    хотя бы из двух файлов. Рассчитано на файлы с совпавшим хешем, когда
+    почти всегда получается один класс: каждый файл сравнивается только
+    с первыми файлами уже найденных классов. classes - классы, известные
+    заранее (например, из индекса); их первые файлы тоже служат образцами.
+    """
+    classes = [list(group) for group in classes]
+    for path in paths:
+        for group in classes:
+            if same_content(group[0], path, block_size, stats):
+                group.append(path)
+                break
+        else:
+            classes.append([path])
+    return [group for group in classes if len(group) > 1]
+
+
+def inode(info):
+    """
+    Пара (устройство, inode) или None, если inode неизвестен (os.scandir
+    на Windows его не заполняет).
+    """
+    return (info.st_dev, info.st_ino) if info.st_ino else None
+
+
+def index_entry(index, info, partial_size):
+    """
+    Запись индекса для файла: словарь с размером, mtime_ns, хешами
+    'partial' и 'full' и inode 'same_as' образца, с которым файл побайтово
+    совпал. Если файл изменился с прошлого раза, запись начинается заново.
+    """
+    key = inode(info)
+    entry = index.get(key) if key else None
+    if (entry is None or entry['size'] != info.st_size or
+            entry['mtime_ns'] != info.st_mtime_ns):
+        entry = {'size': info.st_size, 'mtime_ns': info.st_mtime_ns,
+                 'partial_size': partial_size, 'partial': None,
+                 'full': None, 'same_as': None}
+        if key:
+            index[key] = entry
+    elif entry['partial_size'] != partial_size:
+        entry['partial_size'] = partial_size
+        entry['partial'] = None
+    return entry
+
+
+def connect_index(path):
+    """Соединение с базой SQLite индекса; таблица создаётся, если её нет."""
+    connection = sqlite3.connect(path)
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS files ('
+        'device INTEGER, inode INTEGER, size INTEGER, mtime_ns INTEGER, '
+        'partial_size INTEGER, partial BLOB, full BLOB, '
+        'same_device INTEGER, same_inode INTEGER, '
+        'PRIMARY KEY (device, inode))')
+    return connection
+
+
+def index_row(key, entry):
+    """Строка таблицы files для записи индекса."""
+    return key + (entry['size'], entry['mtime_ns'], entry['partial_size'],
+                  entry['partial'], entry['full']) + (
+                      entry['same_as'] or (None, None))
+
+
+def load_index(path):
+    """
+    Индекс из базы SQLite path: (устройство, inode) -> запись, как
+    в index_entry. Если базы нет, она создаётся пустой. В 'saved' каждой
+    записи хранится её строка в базе, чтобы save_index записывал только
+    изменившиеся.
+    """
+    with contextlib.closing(connect_index(path)) as connection:
+        index = {}
+        for row in connection.execute('SELECT * FROM files'):
+            index[row[0], row[1]] = {
+                'size': row[2], 'mtime_ns': row[3], 'partial_size': row[4],
+                'partial': row[5], 'full': row[6],
+                'same_as': None if row[7] is None else (row[7], row[8]),
+                'saved': row}
+        return index
+
+
+def save_index(path, index):
+    """Записывает в базу path записи index, изменившиеся после загрузки."""
+    rows = []
+    for key, entry in index.items():
+        row = index_row(key, entry)
+        if row != entry.get('saved'):
+            rows.append(row)
+            entry['saved'] = row
+    with contextlib.closing(connect_index(path)) as connection:
+        with connection:
+            connection.executemany('INSERT OR REPLACE INTO files VALUES '
+                                   '(?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+
+def find_duplicates(top_dir, partial_size=64 * 1024, block_size=64 * 1024,
+                    stats=None, jobs=1, index=None,
+                    mmap_size=64 * 1024 * 1024):
+    """
+    Список групп одинаковых файлов в top_dir, пути - через top_dir.
+
+    При jobs > 1 файлы хешируются и сравниваются в пуле из jobs потоков
+    (hashlib отпускает GIL на больших блоках, а чтение - всегда). Сами
+    группы получаются такими же, как при jobs=1: результаты собираются
+    в порядке обхода. Сведения о всех файлах хранятся до конца обхода,
+    иначе не узнать, какие размеры уникальны; а чтение и хеширование идут
+    через bounded_map, поэтому в работе одновременно не больше 2 * jobs
+    файлов.
+
+    Жёсткие ссылки на один inode считаются одинаковыми без чтения:
+    читается только первая из них. index - словарь из load_index; в нём
+    берутся и обновляются хеши файлов, не изменившихся с прошлого запуска
+    (тот же inode, размер и mtime_ns), и результаты побайтового сравнения.
+    """
+    if index is None:
+        index = {}
+    infos = dict(scan_files(top_dir))
+    links = {group[0]: group for group in group_by(
+        infos, lambda path, stats: inode(infos[path]))}
+    aliases = {path for group in links.values() for path in group[1:]}
+    same_size = [path for group in group_by(
+        (path for path in infos if path not in aliases),
+        lambda path, stats: infos[path].st_size) for path in group]
+    entries = {path: index_entry(index, infos[path], partial_size)
+               for path in same_size}
+
+    def cached(kind, compute):
+        def key(path, stats):
+            entry = entries[path]
+            if entry[kind] is None:
+                entry[kind] = compute(path, stats)
+            return entry['size'], entry[kind]
+        return key
+
+    groups = group_by(same_size, cached('partial', lambda path, stats: (
+        partial_digest(path, partial_size, block_size, stats))), stats, jobs)
+    large = [path for group in groups
+             if infos[group[0]].st_size > 2 * partial_size for path in group]
+    groups = [group for group in groups
+              if infos[group[0]].st_size <= 2 * partial_size]
+    groups += group_by(large, cached('full', lambda path, stats: (
+        full_digest(path, block_size, stats, mmap_size))), stats, jobs)
+
+    def split(group):
+        # Файлы, совпавшие в прошлый раз с неизменившимся образцом из
+        # этой же группы, сравнивать заново не нужно.
+        samples = {inode(infos[path]): path for path in group
+                   if entries[path]['same_as'] == inode(infos[path])}
+        known = collections.defaultdict(list)
+        unknown = []
+        for path in group:
+            sample = samples.get(entries[path]['same_as'])
+            if sample is None:
+                unknown.append(path)
+            elif sample != path:
+                known[sample].append(path)
+        counter = None if stats is None else collections.Counter()
+        try:
+            classes = split_identical(
+                unknown, block_size, counter,
+                [[sample] + known[sample] for sample in samples.values()])
+        except OSError:
+            return [], counter
+        for same in classes:
+            for path in same:
+                entries[path]['same_as'] = inode(infos[same[0]])
+        return classes, counter
+
+    result = []
+    for classes, counter in bounded_map(split, groups, jobs):
+        if counter:
+            stats.update(counter)
+        result += classes
+    found = {path for group in result for path in group}
+    result = [[alias for path in group for alias in links.get(path, [path])]
+              for group in result]
+    result += [group for path, group in links.items() if path not in found]
+    return result
+
+
+def format_groups(groups, top_dir):
+    """
+    Строки вывода: пути относительно top_dir через os.pathsep; строки
+    и пути в них отсортированы, чтобы вывод не зависел от порядка обхода.
+
+    >>> format_groups([[os.path.join('top', 'b'), os.path.join('top', 'a')]],
+    ...               'top') == ['a' + os.pathsep + 'b']
+    True
+    """
+    return sorted(os.pathsep.join(sorted(os.path.relpath(path, top_dir)
+                                         for path in group))
+                  for group in groups)
 
 
 def main():
-    pass
+    parser = argparse.ArgumentParser(
+        description='Find files with identical contents.')
+    parser.add_argument('top_dir')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='number of threads reading files')
+    parser.add_argument('--block-size', type=int, default=64 * 1024,
+                        metavar='BYTES', help='size of a read block')
+    parser.add_argument('--index', metavar='PATH',
+                        help='SQLite file with hashes from previous runs')
+    args = parser.parse_args()
+    index = load_index(args.index) if args.index else None
+    groups = find_duplicates(args.top_dir, block_size=args.block_size,
+                             jobs=args.jobs, index=index)
+    if args.index:
+        save_index(args.index, index)
+    for line in format_groups(groups, args.top_dir):
+        print(line)
 
 
 if __name__ == '__main__':
@@ -1,10 +1,403 @@
 #!/usr/bin/env python3
+import collections
+import hashlib
+import os
+import sys
 import pytest
 import find_duplicates
+from find_duplicates import (
+    bounded_map, find_files, format_groups, full_digest, group_by,
+    load_index, partial_digest, read_blocks, read_into, same_content,
+    save_index, scan_files, split_identical)
 
 
-def test_nothing():
-    assert 2 * 2 == 4
+def make_tree(top, files):
+    """files: относительный путь через '/' -> содержимое (bytes)."""
+    for name, content in files.items():
+        path = top.join(*name.split('/'))
+        path.dirpath().ensure(dir=True)
+        path.write_binary(content)
+
+
+def run(top, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['find_duplicates.py', str(top)])
+    find_duplicates.main()
+    return capsys.readouterr().out
+
+
+def as_lines(*groups):
+    return [os.pathsep.join(os.path.join(*name.split('/')) for name in group)
+            for group in groups]
+
+
+def test_readme_example(tmpdir, monkeypatch, capsys):
+    make_tree(tmpdir, {
+        'file1': b'one',
+        'file2': b'two',
+        '.hidden': b'one',
+        'dir1/file1': b'one',
+        'dir1/file3': b'three',
+        'dir2/file1': b'one',
+        'dir2/file3': b'three',
+        'dir2/.hidden': b'three',
+    })
+    output = run(tmpdir, monkeypatch, capsys)
+    assert output.splitlines() == as_lines(
+        ['dir1/file1', 'dir2/file1', 'file1'],
+        ['dir1/file3', 'dir2/file3'])
+
+
+def test_output_uses_pathsep(tmpdir, monkeypatch, capsys):
+    make_tree(tmpdir, {'a': b'x', 'b': b'x'})
+    assert run(tmpdir, monkeypatch, capsys) == 'a' + os.pathsep + 'b\n'
+
+
+def test_no_duplicates_no_output(tmpdir, monkeypatch, capsys):
+    make_tree(tmpdir, {'a': b'x', 'b': b'y', 'c': b'xy'})
+    assert run(tmpdir, monkeypatch, capsys) == ''
+
+
+def test_ignores_hidden_and_backup_files(tmpdir):
+    make_tree(tmpdir, {'a': b'x', '.a': b'x', '~a': b'x', 'b': b'y',
+                       'd/.b': b'y'})
+    assert find_duplicates.find_duplicates(str(tmpdir)) == []
+
+
+def test_skips_hidden_directories(tmpdir):
+    make_tree(tmpdir, {'a': b'x', '.git/a': b'x', '~old/a': b'x'})
+    assert list(find_files(str(tmpdir))) == [str(tmpdir.join('a'))]
+
+
+def test_skips_symlinks(tmpdir):
+    make_tree(tmpdir, {'a': b'x'})
+    tmpdir.join('link').mksymlinkto(tmpdir.join('a'))
+    assert list(find_files(str(tmpdir))) == [str(tmpdir.join('a'))]
+
+
+def test_same_size_different_content(tmpdir):
+    make_tree(tmpdir, {'a': b'abc', 'b': b'abd', 'c': b'abc'})
+    assert format_groups(find_duplicates.find_duplicates(str(tmpdir)),
+                         str(tmpdir)) == as_lines(['a', 'c'])
+
+
+def test_same_name_different_content(tmpdir):
+    make_tree(tmpdir, {'d1/f': b'one', 'd2/f': b'two'})
+    assert find_duplicates.find_duplicates(str(tmpdir)) == []
+
+
+def test_empty_files_are_duplicates(tmpdir):
+    make_tree(tmpdir, {'a': b'', 'b': b''})
+    assert format_groups(find_duplicates.find_duplicates(str(tmpdir)),
+                         str(tmpdir)) == as_lines(['a', 'b'])
+
+
+def test_group_by_drops_unique_keys():
+    groups = group_by(['a', 'b', 'cc', 'dd', 'eee'],
+                      lambda path, stats: len(path))
+    assert groups == [['a', 'b'], ['cc', 'dd']]
+
+
+def test_group_by_skips_unreadable():
+    def key(path, stats):
+        if path == 'bad':
+            raise OSError(path)
+        return 0
+    assert group_by(['a', 'bad', 'b'], key) == [['a', 'b']]
+
+
+def test_unique_sizes_are_not_read(tmpdir):
+    make_tree(tmpdir, {'a': b'x', 'b': b'yy', 'c': b'zzz'})
+    stats = collections.Counter()
+    assert find_duplicates.find_duplicates(str(tmpdir), stats=stats) == []
+    assert stats['files'] == 0
+
+
+def test_partial_digest_reads_only_head_and_tail(tmpdir):
+    make_tree(tmpdir, {'a': b'h' * 10 + b'm' * 100 + b't' * 10})
+    stats = collections.Counter()
+    partial_digest(str(tmpdir.join('a')), partial_size=10, block_size=4,
+                   stats=stats)
+    assert stats['bytes'] == 20
+
+
+def test_partial_digest_ignores_middle(tmpdir):
+    make_tree(tmpdir, {'a': b'h' * 10 + b'1' * 100 + b't' * 10,
+                       'b': b'h' * 10 + b'2' * 100 + b't' * 10,
+                       'c': b'h' * 10 + b'1' * 100 + b'T' * 10})
+    digests = [partial_digest(str(tmpdir.join(name)), partial_size=10)
+               for name in 'abc']
+    assert digests[0] == digests[1] != digests[2]
+
+
+def test_partial_digest_of_small_file_is_full_digest(tmpdir):
+    make_tree(tmpdir, {'a': b'abcdef'})
+    path = str(tmpdir.join('a'))
+    assert partial_digest(path, partial_size=3) == full_digest(path)
+
+
+def test_middle_difference_is_found_by_full_digest(tmpdir):
+    make_tree(tmpdir, {'a': b'h' * 10 + b'1' * 100 + b't' * 10,
+                       'b': b'h' * 10 + b'2' * 100 + b't' * 10,
+                       'c': b'h' * 10 + b'1' * 100 + b't' * 10})
+    groups = find_duplicates.find_duplicates(str(tmpdir), partial_size=10,
+                                             block_size=7)
+    assert format_groups(groups, str(tmpdir)) == as_lines(['a', 'c'])
+
+
+def test_only_survivors_are_read_in_full(tmpdir):
+    tail = b't' * 10
+    make_tree(tmpdir, {'a': b'h' * 10 + b'1' * 90 + tail,
+                       'b': b'h' * 10 + b'2' * 90 + tail,
+                       'c': b'x' * 10 + b'1' * 90 + tail})
+    stats = collections.Counter()
+    find_duplicates.find_duplicates(str(tmpdir), partial_size=5,
+                                    block_size=8, stats=stats)
+    # Три файла по 10 байт на этапе 2, и полностью только a и b.
+    assert stats['bytes'] == 3 * 10 + 2 * 110
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 4, 100])
+def test_same_content(tmpdir, block_size):
+    make_tree(tmpdir, {'a': b'abcd', 'b': b'abcd', 'c': b'abce'})
+    a, b, c = (str(tmpdir.join(name)) for name in 'abc')
+    assert same_content(a, b, block_size)
+    assert not same_content(a, c, block_size)
+
+
+def test_split_identical_catches_hash_collisions(tmpdir):
+    make_tree(tmpdir, {'a': b'1', 'b': b'2', 'c': b'1', 'd': b'2',
+                       'e': b'3'})
+    paths = [str(tmpdir.join(name)) for name in 'abcde']
+    assert split_identical(paths) == [[paths[0], paths[2]],
+                                      [paths[1], paths[3]]]
+
+
+def test_split_identical_uses_known_classes(tmpdir):
+    make_tree(tmpdir, {'a': b'1', 'b': b'1', 'c': b'1', 'd': b'2'})
+    a, b, c, d = (str(tmpdir.join(name)) for name in 'abcd')
+    stats = collections.Counter()
+    assert split_identical([c, d], stats=stats, classes=[[a, b]]) == [
+        [a, b, c]]
+    # c и d сравниваются только с образцом a.
+    assert stats['files'] == 4
+
+
+def test_read_blocks_stops_at_length(tmpdir):
+    make_tree(tmpdir, {'a': b'abcdefg'})
+    with open(str(tmpdir.join('a')), 'rb') as file:
+        assert [bytes(block) for block in read_blocks(file, 5, 2)] == [
+            b'ab', b'cd', b'e']
+
+
+def test_read_blocks_reuses_buffer(tmpdir):
+    make_tree(tmpdir, {'a': b'abcdefg'})
+    with open(str(tmpdir.join('a')), 'rb', buffering=0) as file:
+        buffers = {id(block.obj) for block in read_blocks(file, 7, 2)}
+    assert len(buffers) == 1
+
+
+def test_read_into_fills_buffer_across_short_reads():
+    class Trickle:
+        def __init__(self, data):
+            self.data = data
+
+        def readinto(self, view):
+            count = min(2, len(view), len(self.data))
+            view[:count] = self.data[:count]
+            self.data = self.data[count:]
+            return count
+
+    buffer = bytearray(5)
+    stats = collections.Counter()
+    assert read_into(Trickle(b'abcdefg'), buffer, stats) == 5
+    assert buffer == b'abcde'
+    assert stats['bytes'] == 5
+
+
+@pytest.mark.parametrize('mmap_size', [None, 1, 100, 1000])
+def test_full_digest_with_and_without_mmap(tmpdir, mmap_size):
+    content = bytes(range(256)) * 4
+    make_tree(tmpdir, {'a': content, 'empty': b''})
+    stats = collections.Counter()
+    expected = hashlib.blake2b(content).digest()
+    assert full_digest(str(tmpdir.join('a')), 100, stats,
+                       mmap_size) == expected
+    assert full_digest(str(tmpdir.join('empty')), 100, stats,
+                       mmap_size) == hashlib.blake2b().digest()
+    assert stats['bytes'] == len(content)
+
+
+def test_same_content_of_different_sizes(tmpdir):
+    make_tree(tmpdir, {'a': b'abcd', 'b': b'abcde', 'c': b'abc'})
+    a, b, c = (str(tmpdir.join(name)) for name in 'abc')
+    for block_size in (2, 4, 100):
+        assert not same_content(a, b, block_size)
+        assert not same_content(a, c, block_size)
+
+
+def test_scan_files_reports_sizes(tmpdir):
+    make_tree(tmpdir, {'a': b'x', 'd/b': b'yy', 'd/.c': b'zzz'})
+    assert sorted((path, info.st_size)
+                  for path, info in scan_files(str(tmpdir))) == [
+        (str(tmpdir.join('a')), 1), (str(tmpdir.join('d', 'b')), 2)]
+
+
+@pytest.mark.parametrize('jobs', [1, 2, 5])
+def test_bounded_map_keeps_order(jobs):
+    assert list(bounded_map(lambda x: x * x, range(50), jobs)) == [
+        x * x for x in range(50)]
+
+
+def test_bounded_map_limits_items_in_flight():
+    taken = []
+
+    def items():
+        for item in range(100):
+            taken.append(item)
+            yield item
+
+    results = bounded_map(lambda x: x, items(), jobs=2, queue_size=3)
+    assert next(results) == 0
+    assert len(taken) <= 4
+    assert list(results) == list(range(1, 100))
+
+
+def test_group_by_collects_stats_from_threads():
+    def key(path, stats):
+        stats['bytes'] += len(path)
+        return len(path)
+    stats = collections.Counter()
+    paths = ['a' * (index % 7) for index in range(1000)]
+    group_by(paths, key, stats, jobs=4)
+    assert stats['bytes'] == sum(map(len, paths))
+
+
+def make_mixed_tree(tmpdir):
+    tail = b't' * 10
+    make_tree(tmpdir, {
+        'a': b'1', 'b': b'1', 'c': b'2', 'd/a': b'2', 'd/e': b'3',
+        'big1': b'h' * 10 + b'1' * 90 + tail,
+        'big2': b'h' * 10 + b'2' * 90 + tail,
+        'd/big3': b'h' * 10 + b'1' * 90 + tail,
+    })
+
+
+@pytest.mark.parametrize('jobs', [2, 4, 8])
+def test_jobs_give_same_groups(tmpdir, jobs):
+    make_mixed_tree(tmpdir)
+    sequential = collections.Counter()
+    parallel = collections.Counter()
+    expected = find_duplicates.find_duplicates(
+        str(tmpdir), partial_size=5, block_size=8, stats=sequential)
+    assert find_duplicates.find_duplicates(
+        str(tmpdir), partial_size=5, block_size=8, stats=parallel,
+        jobs=jobs) == expected
+    assert format_groups(expected, str(tmpdir)) == as_lines(
+        ['a', 'b'], ['big1', 'd/big3'], ['c', 'd/a'])
+    assert parallel == sequential
+
+
+def test_jobs_option(tmpdir, monkeypatch, capsys):
+    make_tree(tmpdir, {'a': b'x', 'b': b'x', 'c': b'y'})
+    monkeypatch.setattr(sys, 'argv', [
+        'find_duplicates.py', '--jobs', '3', str(tmpdir)])
+    find_duplicates.main()
+    assert capsys.readouterr().out == 'a' + os.pathsep + 'b\n'
+
+
+def test_hard_links_are_read_once(tmpdir):
+    make_tree(tmpdir, {'a': b'x' * 10, 'b': b'y' * 10, 'c': b'z'})
+    os.link(str(tmpdir.join('a')), str(tmpdir.join('a2')))
+    os.link(str(tmpdir.join('c')), str(tmpdir.join('c2')))
+    stats = collections.Counter()
+    groups = find_duplicates.find_duplicates(str(tmpdir), stats=stats)
+    assert format_groups(groups, str(tmpdir)) == as_lines(
+        ['a', 'a2'], ['c', 'c2'])
+    # a и b одного размера: их частичные хеши считаются по разу.
+    assert stats['files'] == 2
+
+
+def test_hard_link_and_copy(tmpdir):
+    make_tree(tmpdir, {'a': b'x', 'b': b'x'})
+    os.link(str(tmpdir.join('a')), str(tmpdir.join('c')))
+    groups = find_duplicates.find_duplicates(str(tmpdir))
+    assert format_groups(groups, str(tmpdir)) == as_lines(['a', 'b', 'c'])
+
+
+def find_with_index(tmpdir, index, partial_size=5, jobs=1):
+    stats = collections.Counter()
+    groups = find_duplicates.find_duplicates(
+        str(tmpdir), partial_size=partial_size, block_size=8, stats=stats,
+        jobs=jobs, index=index)
+    return format_groups(groups, str(tmpdir)), stats
+
+
+@pytest.mark.parametrize('jobs', [1, 3])
+def test_index_skips_unchanged_files(tmpdir, jobs):
+    make_mixed_tree(tmpdir)
+    index = {}
+    first, first_stats = find_with_index(tmpdir, index, jobs=jobs)
+    assert first_stats['bytes'] > 0
+    second, second_stats = find_with_index(tmpdir, index, jobs=jobs)
+    assert second == first
+    assert second_stats['files'] == 0
+
+
+def test_index_rereads_changed_files(tmpdir):
+    make_mixed_tree(tmpdir)
+    index = {}
+    find_with_index(tmpdir, index)
+    path = tmpdir.join('b')
+    info = os.stat(str(path))
+    path.write_binary(b'2')
+    os.utime(str(path), ns=(info.st_atime_ns, info.st_mtime_ns + 1))
+    groups, stats = find_with_index(tmpdir, index)
+    assert groups == as_lines(['b', 'c', 'd/a'], ['big1', 'd/big3'])
+    # Новый хеш b и сравнения b с образцом c; a больше ни с кем не совпадает.
+    assert stats['bytes'] == 1 + 2
+
+
+def test_index_forgets_partial_digest_of_other_size(tmpdir):
+    make_mixed_tree(tmpdir)
+    index = {}
+    find_with_index(tmpdir, index)
+    groups, stats = find_with_index(tmpdir, index, partial_size=6)
+    assert groups == as_lines(['a', 'b'], ['big1', 'd/big3'], ['c', 'd/a'])
+    # Частичные хеши считаются заново, полные и сравнения берутся из индекса.
+    assert stats['bytes'] == 5 * 1 + 3 * 12
+
+
+def test_index_survives_save_and_load(tmpdir):
+    tree = tmpdir.mkdir('tree')
+    make_mixed_tree(tree)
+    path = str(tmpdir.join('index.sqlite'))
+    index = load_index(path)
+    assert index == {}
+    expected, _ = find_with_index(tree, index)
+    save_index(path, index)
+    loaded = load_index(path)
+    assert loaded == index
+    groups, stats = find_with_index(tree, loaded)
+    assert groups == expected
+    assert stats['files'] == 0
+
+
+def test_index_option(tmpdir, monkeypatch, capsys):
+    tree = tmpdir.mkdir('tree')
+    make_tree(tree, {'a': b'x', 'b': b'x', 'c': b'y'})
+    path = str(tmpdir.join('index.sqlite'))
+    monkeypatch.setattr(sys, 'argv', [
+        'find_duplicates.py', '--index', path, str(tree)])
+    for _ in range(2):
+        find_duplicates.main()
+        assert capsys.readouterr().out == 'a' + os.pathsep + 'b\n'
+    assert len(load_index(path)) == 3
+
+
+def test_usage_without_argument(monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['find_duplicates.py'])
+    with pytest.raises(SystemExit):
+        find_duplicates.main()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Мемов в секунду: однократный meme_generator.py, запускаемый в цикле
+(процесс, декодирование шаблона и раскладка на каждый мем), против
+render_batch с разным числом процессов. Подписи - случайные строки до
+20 символов, шаблонов четыре. Результат пакетного режима сверяется
+побайтово с однократным запуском.
+
+Запуск: ./bench_meme_generator.py [мемов] [запусков скрипта]
+"""
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import cv2  # type: ignore
+from meme_generator import render_batch
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      'meme_generator.py')
+SIZES = [(450, 800), (720, 1280), (600, 800), (1080, 1920)]
+
+
+def make_templates(work_dir):
+    rng = np.random.default_rng(0)
+    templates = []
+    for index, (height, width) in enumerate(SIZES):
+        noise = rng.integers(0, 256, (height // 8, width // 8, 3),
+                             dtype=np.uint8)
+        image = cv2.resize(noise, (width, height),
+                           interpolation=cv2.INTER_CUBIC)
+        templates.append(os.path.join(work_dir, 'template{}.jpg'.format(
+            index)))
+        cv2.imwrite(templates[-1], image)
+    return templates
+
+
+def make_rows(work_dir, templates, count):
+    rng = random.Random(0)
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz ,.!?'
+    captions = [''.join(rng.choice(letters)
+                        for _ in range(rng.randrange(1, 21)))
+                for _ in range(count // 4 + 1)]
+    return [(rng.choice(templates), rng.choice(captions),
+             rng.choice(captions),
+             os.path.join(work_dir, 'out{}.jpg'.format(index)))
+            for index in range(count)]
+
+
+def run_script(work_dir, row):
+    template, top, bottom, _ = row
+    shutil.copy(template, os.path.join(work_dir, 'image.jpg'))
+    subprocess.run([sys.executable, SCRIPT], cwd=work_dir, check=True,
+                   input='{}\n{}\n'.format(top, bottom).encode())
+    with open(os.path.join(work_dir, 'out.jpg'), 'rb') as f:
+        return f.read()
+
+
+def report(name, count, elapsed):
+    print('{:<16} {:>7} {:>9.2f} {:>10.1f}'.format(
+        name, count, elapsed, count / elapsed))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print('cpus: {}'.format(os.cpu_count()))
+    print('{:<16} {:>7} {:>9} {:>10}'.format(
+        'mode', 'memes', 'seconds', 'memes/s'))
+    with tempfile.TemporaryDirectory() as work_dir:
+        templates = make_templates(work_dir)
+        rows = make_rows(work_dir, templates, count)
+        start = time.perf_counter()
+        single = [run_script(work_dir, row) for row in rows[:runs]]
+        report('script in loop', runs, time.perf_counter() - start)
+        for jobs in (1, 2, 4):
+            start = time.perf_counter()
+            render_batch(rows, jobs)
+            report('batch, {} jobs'.format(jobs), count,
+                   time.perf_counter() - start)
+        for row, expected in zip(rows, single):
+            with open(row[3], 'rb') as f:
+                assert f.read() == expected
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Время и пиковая память titanic_statistics на синтетическом списке
+пассажиров: чтение всего файла с типами pandas по умолчанию против
+чтения нужных столбцов в компактных типах целиком, блоками и из кэша.
+Результаты компактных режимов должны совпадать точно: суммы по блокам
+складываются без округления.
+
+Каждый режим запускается в отдельном процессе, пик памяти - его VmHWM:
+ru_maxrss на Linux переживает execve и показал бы память родителя.
+
+Запуск: ./bench_titanic_statistics.py [строк]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd  # type: ignore
+
+RUN = '''
+import json, sys, time
+import pandas as pd
+import titanic_statistics
+filename, mode, argument = sys.argv[1:]
+start = time.perf_counter()
+if mode == 'default dtypes':
+    frame = pd.read_csv(filename)
+    male = frame.Sex == 'male'
+    young = male & (frame.Age < 30)
+    result = [int(young.sum()), int((young & (frame.Survived == 1)).sum()),
+              float(frame.Fare[frame.Sex == 'female'].sum()),
+              float(frame.Age.mean()),
+              float(frame.Age[frame.Survived == 1].mean())]
+elif mode == 'chunks':
+    result = titanic_statistics.titanic_statistics(filename, int(argument))
+elif mode == 'cache':
+    result = titanic_statistics.titanic_statistics(filename, 10 ** 6,
+                                                   argument)
+else:
+    result = titanic_statistics.titanic_statistics(filename)
+elapsed = time.perf_counter() - start
+with open('/proc/self/status') as status:
+    peak = int(next(line for line in status
+                    if line.startswith('VmHWM:')).split()[1])
+print(json.dumps([result, elapsed, peak]))
+'''
+
+
+def make_manifest(filename, rows, seed=0, chunk_rows=10 ** 6):
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk_rows):
+        size = min(chunk_rows, rows - start)
+        ages = rng.integers(1, 160, size) / 2
+        frame = pd.DataFrame({
+            'PassengerId': np.arange(start + 1, start + size + 1),
+            'Survived': rng.integers(0, 2, size),
+            'Pclass': rng.integers(1, 4, size),
+            'Name': ['Passenger, Mr. No {}'.format(index)
+                     for index in range(start, start + size)],
+            'Sex': np.where(rng.random(size) < 0.35, 'female', 'male'),
+            'Age': np.where(rng.random(size) < 0.2, np.nan, ages),
+            'Fare': np.round(rng.exponential(30, size), 4),
+            'Embarked': rng.choice(['S', 'C', 'Q'], size),
+        })
+        frame.to_csv(filename, mode='a' if start else 'w',
+                     header=not start, index=False)
+
+
+def run(filename, mode, argument=''):
+    output = subprocess.run(
+        [sys.executable, '-c', RUN, filename, mode, argument],
+        check=True, stdout=subprocess.PIPE,
+        cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return json.loads(output)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 7
+    with tempfile.TemporaryDirectory() as work_dir:
+        filename = os.path.join(work_dir, 'manifest.csv')
+        start = time.perf_counter()
+        make_manifest(filename, rows)
+        print('{} rows, {:.0f} MiB, generated in {:.1f} s'.format(
+            rows, os.path.getsize(filename) / 2 ** 20,
+            time.perf_counter() - start))
+        cache = os.path.join(work_dir, 'manifest.pickle')
+        print('{:<26} {:>9} {:>10}'.format('mode', 'seconds', 'peak MiB'))
+        expected = None
+        # Первый запуск с кэшем записывает его, второй - читает.
+        for mode, argument in [('default dtypes', ''),
+                               ('compact, whole file', ''),
+                               ('chunks', str(10 ** 6)),
+                               ('chunks', str(10 ** 5)),
+                               ('cache', cache),
+                               ('cache', cache)]:
+            result, elapsed, peak = run(filename, mode, argument)
+            if mode != 'default dtypes':
+                expected = expected or result
+                assert result == expected
+            name = mode + (' ' + os.path.basename(argument)
+                           if argument else '')
+            print('{:<26} {:>9.2f} {:>10.0f}'.format(
+                name, elapsed, peak / 1024))
+        print('statistics:', *expected)
+
+
+if __name__ == '__main__':
+    main()
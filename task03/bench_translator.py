@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Пропускная способность translator.translate_texts против наивного
+клиента (новое соединение requests.post на каждый запрос, переводы по
+очереди) на локальной замене API с задержкой ответа, имитирующей сеть.
+Все тексты переводятся по цепочке из трёх языков; в конце тот же прогон
+повторяется с тёплым кэшем.
+
+Запуск: ./bench_translator.py [текстов] [задержка ответа, мс]
+"""
+import asyncio
+import random
+import sys
+import time
+import requests
+from translator import TranslationCache, random_path, translate_texts
+from translate_stub_server import StubServer
+
+COUNT = 3
+
+
+def naive(server, texts):
+    def call(method, **params):
+        return requests.post(server.url + method,
+                             data=dict(params, key=server.key)).json()
+
+    languages = sorted(call('getLangs', ui='ru')['langs'])
+    rng = random.Random(1)
+    results = []
+    for text in texts:
+        path = random_path(languages, COUNT, rng)
+        for src, dst in zip(path, path[1:]):
+            text = ''.join(call('translate', text=text,
+                                lang='{}-{}'.format(src, dst))['text'])
+        results.append(text)
+    return results
+
+
+def pooled(server, texts, concurrency, cache):
+    return asyncio.run(translate_texts(
+        texts, COUNT, server.key, rng=random.Random(1), url=server.url,
+        concurrency=concurrency, cache=cache))
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    delay = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.005
+    texts = ['текст номер {}'.format(index) for index in range(size)]
+    print('{:<24} {:>9} {:>9} {:>12} {:>10}'.format(
+        'client', 'requests', 'seconds', 'requests/s', 'connects'))
+
+    def report(name, function, *args):
+        with StubServer(delay=delay) as server:
+            start = time.perf_counter()
+            assert function(server, *args) == texts
+            elapsed = time.perf_counter() - start
+            requests_made = server.counts.get('requests', 0)
+            print('{:<24} {:>9} {:>9.3f} {:>12.0f} {:>10}'.format(
+                name, requests_made, elapsed, requests_made / elapsed,
+                server.counts.get('connections', 0)))
+
+    report('naive', naive, texts)
+    for concurrency in (1, 8, 32):
+        report('pooled, {} at once'.format(concurrency), pooled, texts,
+               concurrency, TranslationCache())
+    cache = TranslationCache()
+    with StubServer() as server:
+        pooled(server, texts, 8, cache)
+    report('pooled, warm cache', pooled, texts, 8, cache)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,172 @@
 #!/usr/bin/env python3
+"""
+Генератор мемов: верхний и нижний текст по центру верхней и нижней
+четвертей картинки, белым с чёрной обводкой.
+
+Без аргументов читает две строки из стандартного ввода, берёт картинку
+image.jpg и пишет out.jpg. С --batch MANIFEST рисует все мемы из
+CSV-файла со строками «шаблон,верхний текст,нижний текст,выходной файл».
+Каждый шаблон декодируется один раз на процесс (load_template), а
+раскладка текста по cv2.getTextSize запоминается для каждой пары
+(текст, размер картинки) (layout). Отрисовка и кодирование JPEG
+распределяются по --jobs процессам.
+"""
+import argparse
+import concurrent.futures
+import csv
+import functools
+import numpy as np
+import cv2  # type: ignore
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+# При этом масштабе 20 самых широких букв с обводкой занимают около 730
+# пикселей и помещаются на картинку 800x450.
+FONT_SCALE = 1.5
+TEXT_THICKNESS = 3
+# Обводка - маска текста, расширенная cv2.dilate на OUTLINE_RADIUS
+# пикселей. Толстый чёрный текст под тонким белым не годится: в OpenCV 5
+# толщина больше 1 лишь делает шрифт полужирным.
+OUTLINE_RADIUS = 3
+OUTLINE_KERNEL = cv2.getStructuringElement(
+    cv2.MORPH_ELLIPSE, (2 * OUTLINE_RADIUS + 1, 2 * OUTLINE_RADIUS + 1))
+MARGIN = 10
+BOX_PADDING = 8
+# Буквы с самым длинным хвостом вниз: по ним baseline ставится так, чтобы
+# он не зависел от текста.
+DESCENDERS = 'gjpqy'
+TEMPLATE_CACHE_SIZE = 16
+LAYOUT_CACHE_SIZE = 4096
+
+
+def text_size(text, scale):
+    """Ширина, высота над baseline и глубина под ним текста с обводкой."""
+    (width, height), depth = cv2.getTextSize(text, FONT, scale,
+                                             TEXT_THICKNESS)
+    return (width + 2 * OUTLINE_RADIUS, height + OUTLINE_RADIUS,
+            depth + OUTLINE_RADIUS)
+
+
+def fit_scale(text, width):
+    """
+    Наибольший масштаб шрифта не больше FONT_SCALE, при котором text
+    помещается по ширине с отступами MARGIN.
+    """
+    scale = FONT_SCALE
+    while scale > 0.1 and text_size(text, scale)[0] > width - 2 * MARGIN:
+        scale *= 0.95
+    return scale
+
+
+@functools.lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def layout(text, width, height, quarter):
+    """
+    Масштаб шрифта, точка начала baseline и прямоугольник (left, top,
+    right, bottom) текста с обводкой, выровненного по центру четверти
+    quarter (0 - верхняя, 3 - нижняя) картинки width x height. По
+    вертикали центрируется промежуток от верха заглавных букв до низа
+    букв DESCENDERS, так что baseline не зависит от регистра и набора
+    букв.
+
+    >>> _, (_, upper), _ = layout('WORDING', 800, 450, 0)
+    >>> _, (_, mixed), _ = layout('Wording', 800, 450, 0)
+    >>> upper == mixed
+    True
+    """
+    scale = fit_scale(text, width)
+    text_width, ascent, _ = text_size(text, scale)
+    _, _, descent = text_size(DESCENDERS, scale)
+    top = height * quarter // 4 + (height // 4 - ascent - descent) // 2
+    left = (width - text_width) // 2
+    # Некоторые глифы (скобки, '|', 'j') выходят за размеры из
+    # cv2.getTextSize, поэтому прямоугольник берётся с запасом.
+    pad = BOX_PADDING
+    box = (max(0, left - pad), max(0, top - pad),
+           min(width, left + text_width + pad),
+           min(height, top + ascent + descent + pad))
+    return scale, (left + OUTLINE_RADIUS, top + ascent), box
+
+
+def blend(image, alpha, value):
+    """Смешивает image с цветом value (0..255) с прозрачностью alpha."""
+    weight = alpha[..., np.newaxis].astype(np.uint16)
+    image[...] = (image * (255 - weight) + value * weight + 127) // 255
+
+
+def put_text(image, text, quarter):
+    """Рисует text в четверти quarter; меняется только его прямоугольник."""
+    height, width = image.shape[:2]
+    scale, (x, y), (left, top, right, bottom) = layout(
+        text, width, height, quarter)
+    region = image[top:bottom, left:right]
+    mask = np.zeros(region.shape[:2], np.uint8)
+    cv2.putText(mask, text, (x - left, y - top), FONT, scale, 255,
+                TEXT_THICKNESS, cv2.LINE_AA)
+    blend(region, cv2.dilate(mask, OUTLINE_KERNEL), 0)
+    blend(region, mask, 255)
+
+
+def render(template, top, bottom):
+    """Новая картинка: копия template с текстом top и bottom."""
+    image = template.copy()
+    put_text(image, top, 0)
+    put_text(image, bottom, 3)
+    return image
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def load_template(filename):
+    """Декодированный шаблон; только для чтения, так как он общий."""
+    image = cv2.imread(filename)
+    if image is None:
+        raise OSError('cannot read image {}'.format(filename))
+    image.setflags(write=False)
+    return image
+
+
+def save_image(filename, image):
+    if not cv2.imwrite(filename, image):
+        raise OSError('cannot write image {}'.format(filename))
+
+
+def render_row(row):
+    template, top, bottom, output = row
+    save_image(output, render(load_template(template), top, bottom))
+    return output
+
+
+def read_manifest(filename):
+    with open(filename, newline='') as f:
+        return [tuple(row) for row in csv.reader(f) if row]
+
+
+def render_batch(rows, jobs=1):
+    """
+    Рисует мемы по строкам манифеста. Строки раздаются процессам
+    большими пачками, чтобы каждый процесс декодировал мало шаблонов
+    и чаще попадал в кэш раскладок.
+    """
+    if jobs <= 1:
+        return [render_row(row) for row in rows]
+    chunk_size = max(1, len(rows) // (4 * jobs))
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        return list(executor.map(render_row, rows, chunksize=chunk_size))
 
 
 def main():
-    pass
+    parser = argparse.ArgumentParser(
+        description='Put top and bottom text on image.jpg and save it to '
+                    'out.jpg.')
+    parser.add_argument('--batch', metavar='MANIFEST',
+                        help='render every "template,top,bottom,output" '
+                             'row of this CSV file')
+    parser.add_argument('--jobs', type=int, default=1)
+    args = parser.parse_args()
+    if args.batch:
+        render_batch(read_manifest(args.batch), args.jobs)
+        return
+    top = input()
+    bottom = input()
+    save_image('out.jpg', render(load_template('image.jpg'), top, bottom))
 
 
 if __name__ == '__main__':
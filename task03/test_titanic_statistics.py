@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd  # type: ignore
+import pytest
+from titanic_statistics import titanic_statistics
+
+
+@pytest.fixture
+def manifest(tmpdir):
+    rng = np.random.default_rng(0)
+    size = 2000
+    frame = pd.DataFrame({
+        'Survived': rng.integers(0, 2, size),
+        'Sex': np.where(rng.random(size) < 0.4, 'female', 'male'),
+        'Age': np.where(rng.random(size) < 0.2, np.nan,
+                        rng.random(size) * 80),
+        'Fare': rng.exponential(30, size) * 10.0 ** rng.integers(-3, 4, size),
+    })
+    filename = str(tmpdir.join('manifest.csv'))
+    frame.to_csv(filename, index=False, float_format='%.17g')
+    return filename
+
+
+def test_example(tmpdir):
+    filename = tmpdir.join('example.csv')
+    filename.write('Survived,Sex,Age,Fare\n1,female,23,65.7\n'
+                   '0,male,27,42.2\n1,male,35,70.05\n1,male,22,42.2\n'
+                   '0,female,,65.0\n')
+    assert titanic_statistics(str(filename)) == [
+        2, 1, 130.7, 26.75, 26.666666666666668]
+
+
+def test_chunks_and_cache_match_whole_file(manifest, tmpdir):
+    expected = titanic_statistics(manifest)
+    for chunk_rows in [7, 1000, 5000]:
+        assert titanic_statistics(manifest, chunk_rows) == expected
+    cache = str(tmpdir.join('cache'))
+    # Первый запуск пишет кэш, второй читает его.
+    for chunk_rows in [None, 300, None, 300]:
+        assert titanic_statistics(manifest, chunk_rows, cache) == expected
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,10 +1,173 @@
 #!/usr/bin/env python3
+import asyncio
+import io
+import random
+import re
+import sys
 import pytest
 import translator
+from translator import (
+    TranslationCache, Translator, TranslatorError, random_path,
+    translate_texts)
+from translate_stub_server import StubServer
 
 
-def test_nothing():
-    assert 2 * 2 == 4
+@pytest.fixture
+def server():
+    with StubServer() as stub:
+        yield stub
+
+
+def translate_all(server, texts, count=3, **options):
+    return asyncio.run(translate_texts(
+        texts, count, server.key, rng=random.Random(1), url=server.url,
+        **options))
+
+
+def run_script(server, tmpdir, monkeypatch, capsys, stdin, *args):
+    key_file = tmpdir.join('key.txt')
+    key_file.write(server.key + '\n')
+    monkeypatch.setattr(sys, 'argv', ['translator.py', '3', str(key_file),
+                                      '--url', server.url] + list(args))
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(stdin))
+    translator.main()
+    return capsys.readouterr().out
+
+
+def test_script_returns_russian(server, tmpdir, monkeypatch, capsys):
+    output = run_script(server, tmpdir, monkeypatch, capsys,
+                        'Буря мглою небо кроет, вихри снежные крутя\n')
+    assert re.search('[а-яА-ЯёЁ]', output)
+    assert output == 'Буря мглою небо кроет, вихри снежные крутя\n'
+    assert server.counts['translate'] == 4
+
+
+def test_script_one_line_per_text(server, tmpdir, monkeypatch, capsys):
+    output = run_script(server, tmpdir, monkeypatch, capsys,
+                        'один\nдва\nтри\n')
+    assert output == 'один\nдва\nтри\n'
+
+
+def test_chains_for_many_texts(server):
+    texts = ['текст {}'.format(index) for index in range(50)]
+    assert translate_all(server, texts) == texts
+    assert server.counts['getLangs'] == 1
+    assert server.counts['translate'] <= 50 * 4
+
+
+def test_connections_are_reused(server):
+    texts = ['текст {}'.format(index) for index in range(50)]
+    translate_all(server, texts, concurrency=4)
+    assert server.counts['connections'] <= 4
+    assert server.counts['requests'] > 100
+
+
+def test_concurrency_limit(server, monkeypatch):
+    server.delay = 0.01
+    active = []
+    peak = []
+    post = Translator.post
+
+    def counting_post(self, method, params):
+        active.append(1)
+        peak.append(len(active))
+        try:
+            return post(self, method, params)
+        finally:
+            active.pop()
+
+    monkeypatch.setattr(Translator, 'post', counting_post)
+    translate_all(server, ['т{}'.format(i) for i in range(20)],
+                  concurrency=3)
+    assert max(peak) <= 3
+
+
+def test_identical_requests_sent_once(server):
+    async def run():
+        client = Translator(server.key, url=server.url)
+        try:
+            return await asyncio.gather(*(
+                client.translate('мир', 'ru', 'en') for _ in range(10)))
+        finally:
+            client.close()
+
+    assert asyncio.run(run()) == ['[en] мир'] * 10
+    assert server.counts['translate'] == 1
+
+
+def test_cache_persists_between_runs(server, tmpdir):
+    filename = str(tmpdir.join('cache.sqlite'))
+    texts = ['первый', 'второй']
+    cache = TranslationCache(filename)
+    assert translate_all(server, texts, cache=cache) == texts
+    cache.close()
+    translations = server.counts['translate']
+    cache = TranslationCache(filename)
+    assert translate_all(server, texts, cache=cache) == texts
+    cache.close()
+    assert server.counts['translate'] == translations
+
+
+def test_cache_key_includes_languages():
+    cache = TranslationCache()
+    cache.put('мир', 'ru', 'en', 'world')
+    cache.put('мир', 'ru', 'de', 'Welt')
+    assert cache.get('мир', 'ru', 'en') == 'world'
+    assert cache.get('мир', 'ru', 'de') == 'Welt'
+    assert cache.get('world', 'en', 'ru') is None
+
+
+def test_retries_server_errors():
+    with StubServer(failures=2) as server:
+        assert translate_all(server, ['мир'], backoff=0.01) == ['мир']
+        assert server.counts['requests'] == 2 + 1 + 4
+
+
+def test_gives_up_after_retries():
+    with StubServer(failures=10) as server:
+        with pytest.raises(TranslatorError, match='HTTP 503'):
+            translate_all(server, ['мир'], retries=2, backoff=0.01)
+        assert server.counts['requests'] == 3
+
+
+def test_invalid_key_is_not_retried(server):
+    with pytest.raises(TranslatorError, match='401'):
+        asyncio.run(translate_texts(['мир'], 3, 'wrong', url=server.url,
+                                    backoff=0.01))
+    assert server.counts['requests'] == 1
+
+
+def test_random_path_avoids_repeats():
+    rng = random.Random(0)
+    for count in range(6):
+        path = random_path(['ru', 'en', 'de'], count, rng)
+        assert path[0] == path[-1] == 'ru'
+        assert len(path) == count + 2 if count else path == ['ru']
+        assert 'ru' not in path[1:-1]
+        assert all(a != b for a, b in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize('languages,count', [
+    (['ru'], 1), (['ru', 'en'], 2), ([], 3),
+])
+def test_random_path_needs_languages(languages, count):
+    with pytest.raises(ValueError, match='other than ru'):
+        random_path(languages, count, random.Random(0))
+
+
+def test_random_path_single_language():
+    assert random_path(['ru', 'en'], 1, random.Random(0)) == ['ru', 'en', 'ru']
+    assert random_path(['ru'], 0, random.Random(0)) == ['ru']
+
+
+def test_negative_retries():
+    with pytest.raises(ValueError, match='retries'):
+        Translator('key', retries=-1)
+
+
+def test_zero_translations_keep_text(server):
+    assert translate_all(server, ['мир'], count=0) == ['мир']
+    assert 'translate' not in server.counts
 
 
 if __name__ == "__main__":
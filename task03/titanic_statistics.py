@@ -1,8 +1,225 @@
 #!/usr/bin/env python3
+"""
+Статистика по пассажирам «Титаника» из CSV-файла Kaggle.
+
+Из файла читаются только столбцы COLUMNS в компактных типах DTYPES.
+Файл можно читать блоками по chunk_rows строк: по каждому блоку
+считаются частичные суммы и количества (Counter), которые затем
+складываются, так что память не растёт с размером файла. Суммы
+дробных столбцов точные (Fraction), поэтому результат не зависит
+от размера блоков и порядка их сложения.
+
+Разобранные столбцы можно сохранить в кэш (--cache): это файл из
+подряд записанных pickle - ключа CSV-файла (путь, размер и mtime) и
+блоков строк. Кэш пишется и читается по блоку, поэтому тоже не
+требует памяти на весь файл, и используется, только пока ключ совпадает
+с CSV-файлом.
+"""
+import argparse
+import collections
+import fractions
+import itertools
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd  # type: ignore
+
+COLUMNS = ['Survived', 'Sex', 'Age', 'Fare']
+DTYPES = {'Survived': 'int8', 'Sex': 'category',
+          'Age': 'float64', 'Fare': 'float64'}
+# Размер блоков кэша, если chunk_rows не задан.
+CACHE_CHUNK_ROWS = 10 ** 6
+
+
+def exact_sum(column):
+    """
+    Точная сумма столбца float64 без учёта NaN в виде Fraction.
+
+    Каждое число - это целое m (|m| < 2**53), умноженное на 2**e. Целые
+    разбиты на три части меньше 2**18 по модулю, и bincount складывает
+    части отдельно для каждого e: суммы меньше 2**53, пока строк меньше
+    2**35, так что float64 в bincount не округляет. Цикл идёт только
+    по показателям e, которых не больше нескольких тысяч.
+
+    >>> exact_sum(pd.Series([0.1, 0.2, np.nan])) == (
+    ...     fractions.Fraction(0.1) + fractions.Fraction(0.2))
+    True
+    """
+    mantissas, exponents = np.frexp(column.dropna().to_numpy())
+    if not len(exponents):
+        return fractions.Fraction(0)
+    integers = (mantissas * 2.0 ** 53).astype(np.int64)
+    lowest = int(exponents.min())
+    bins = exponents - lowest
+    sums = [np.bincount(bins, part) for part in
+            (integers >> 36, (integers >> 18) & 0x3FFFF, integers & 0x3FFFF)]
+    total = 0
+    for shift, high, middle, low in zip(itertools.count(), *sums):
+        total += ((int(high) << 36) + (int(middle) << 18) + int(low)) << shift
+    return fractions.Fraction(total) * fractions.Fraction(2) ** (lowest - 53)
+
+
+def partial_statistics(frame):
+    """
+    Частичные суммы (точные, см. exact_sum) и количества по одному блоку
+    строк.
+    """
+    male = frame['Sex'] == 'male'
+    young_male = male & (frame['Age'] < 30)
+    survived = frame['Survived'] == 1
+    ages = frame['Age']
+    survivor_ages = frame.loc[survived, 'Age']
+    return collections.Counter(
+        young_males=int(young_male.sum()),
+        young_male_survivors=int((young_male & survived).sum()),
+        female_fare=exact_sum(frame.loc[frame['Sex'] == 'female', 'Fare']),
+        age_sum=exact_sum(ages),
+        ages=int(ages.count()),
+        survivor_age_sum=exact_sum(survivor_ages),
+        survivor_ages=int(survivor_ages.count()))
+
+
+def mean(total, count):
+    return float(total / count) if count else float('nan')
+
+
+def statistics(partials):
+    """
+    Пять величин из задания по сложенным частичным суммам.
+
+    >>> frame = pd.DataFrame({
+    ...     'Survived': [1, 0, 1, 1, 0],
+    ...     'Sex': ['female', 'male', 'male', 'male', 'female'],
+    ...     'Age': [23, 27, 35, 22, None],
+    ...     'Fare': [65.7, 42.2, 70.05, 42.2, 65.0]}).astype(DTYPES)
+    >>> statistics(partial_statistics(frame))
+    [2, 1, 130.7, 26.75, 26.666666666666668]
+    """
+    return [
+        partials['young_males'],
+        partials['young_male_survivors'],
+        float(partials['female_fare']),
+        mean(partials['age_sum'], partials['ages']),
+        mean(partials['survivor_age_sum'], partials['survivor_ages']),
+    ]
+
+
+def read_csv(filename, chunk_rows=None):
+    """
+    Нужные столбцы CSV-файла: один DataFrame или, при chunk_rows,
+    итератор по блокам.
+    """
+    return pd.read_csv(filename, usecols=COLUMNS, dtype=DTYPES,
+                       chunksize=chunk_rows)
+
+
+def source_key(filename):
+    """
+    Ключ, по которому кэш сверяется с CSV-файлом: путь, размер и время
+    изменения файла, а также читаемые столбцы и их типы.
+    """
+    info = os.stat(filename)
+    return (os.path.abspath(filename), info.st_size, info.st_mtime_ns,
+            COLUMNS, DTYPES)
+
+
+def read_cache(filename, cache):
+    """
+    Итератор по блокам из кэша или None, если кэша нет, он не читается
+    или построен не по текущему состоянию filename.
+    """
+    try:
+        file = open(cache, 'rb')
+    except OSError:
+        return None
+    try:
+        key = pickle.load(file)
+    except Exception:
+        key = None
+    if key != source_key(filename):
+        file.close()
+        return None
+    return cached_frames(file)
+
+
+def cached_frames(file):
+    with file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+def write_cache(frames, filename, cache):
+    """
+    Выдаёт блоки frames, попутно дописывая их в кэш. Кэш появляется под
+    своим именем, только когда записаны все блоки, поэтому прерванная
+    запись не оставляет неполного кэша.
+    """
+    key = source_key(filename)
+    descriptor, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(cache)))
+    written = False
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            pickle.dump(key, file, pickle.HIGHEST_PROTOCOL)
+            for frame in frames:
+                pickle.dump(frame, file, pickle.HIGHEST_PROTOCOL)
+                yield frame
+        os.replace(temporary, cache)
+        written = True
+    finally:
+        if not written:
+            os.unlink(temporary)
+
+
+def split_frame(frame, chunk_rows=None):
+    if chunk_rows is None:
+        return [frame]
+    return [frame.iloc[start:start + chunk_rows]
+            for start in range(0, len(frame), chunk_rows)]
+
+
+def read_frames(filename, chunk_rows=None, cache=None):
+    """
+    Блоки строк для подсчёта. Свежий кэш читается вместо CSV;
+    устаревший или отсутствующий кэш записывается заново по мере чтения
+    CSV блоками по chunk_rows (или CACHE_CHUNK_ROWS) строк.
+    """
+    if not cache:
+        frames = read_csv(filename, chunk_rows)
+        return [frames] if chunk_rows is None else frames
+    frames = read_cache(filename, cache)
+    if frames is None:
+        frames = write_cache(
+            read_csv(filename, chunk_rows or CACHE_CHUNK_ROWS),
+            filename, cache)
+    if chunk_rows is None:
+        return frames
+    return (part for frame in frames
+            for part in split_frame(frame, chunk_rows))
+
+
+def titanic_statistics(filename, chunk_rows=None, cache=None):
+    return statistics(sum(
+        (partial_statistics(frame)
+         for frame in read_frames(filename, chunk_rows, cache)),
+        collections.Counter()))
 
 
 def main():
-    pass
+    parser = argparse.ArgumentParser(
+        description='Print statistics of the Titanic passenger list.')
+    parser.add_argument('filename')
+    parser.add_argument('--chunk-rows', type=int,
+                        help='read the CSV file in blocks of this many rows')
+    parser.add_argument('--cache',
+                        help='keep parsed columns in this file')
+    args = parser.parse_args()
+    print(*titanic_statistics(args.filename, args.chunk_rows, args.cache),
+          sep='\n')
 
 
 if __name__ == '__main__':
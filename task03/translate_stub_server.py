@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Локальная замена API Яндекс.Переводчика для тестов и бенчмарков.
+
+Понимает getLangs и translate с параметрами в строке запроса или в теле
+формы. «Перевод» на язык dst - исходный русский текст с пометкой
+'[dst] ', а перевод на русский снимает пометку, так что цепочка,
+вернувшаяся на русский, возвращает исходный текст. Сервер считает
+запросы и соединения, умеет отвечать с задержкой delay и отдавать 503
+на первые failures запросов.
+"""
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+
+LANGUAGES = {
+    'ru': 'русский', 'en': 'английский', 'de': 'немецкий',
+    'eo': 'эсперанто', 'fi': 'финский', 'fr': 'французский',
+}
+
+
+def stub_translate(text, dst):
+    """
+    >>> stub_translate(stub_translate('мир', 'en'), 'ru')
+    'мир'
+    """
+    if text.startswith('['):
+        text = text.split('] ', 1)[-1]
+    return text if dst == 'ru' else '[{}] {}'.format(dst, text)
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело уходят отдельными write; с алгоритмом Нейгла
+    # на keep-alive соединении тело ждало бы отложенного ACK клиента.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_api(urllib.parse.urlsplit(self.path).query)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        query = urllib.parse.urlsplit(self.path).query
+        body = self.rfile.read(length).decode()
+        self.handle_api('&'.join(part for part in (query, body) if part))
+
+    def handle_api(self, query):
+        server = self.server
+        params = dict(urllib.parse.parse_qsl(query))
+        method = urllib.parse.urlsplit(self.path).path.rsplit('/', 1)[-1]
+        server.count('requests')
+        server.count(method)
+        time.sleep(server.delay)
+        if server.take_failure():
+            self.reply(503, {'code': 503, 'message': 'Try again later'})
+        elif params.get('key') != server.key:
+            self.reply(401, {'code': 401, 'message': 'API key is invalid'})
+        elif method == 'getLangs':
+            self.reply(200, {'langs': LANGUAGES})
+        elif method == 'translate':
+            lang = params.get('lang', '')
+            dst = lang.rsplit('-', 1)[-1]
+            if dst not in LANGUAGES:
+                self.reply(501, {'code': 501, 'message':
+                                 'The specified translation direction '
+                                 'is not supported'})
+            else:
+                self.reply(200, {'code': 200, 'lang': lang, 'text': [
+                    stub_translate(params.get('text', ''), dst)]})
+        else:
+            self.reply(404, {'code': 404, 'message': 'Unknown method'})
+
+    def reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(http.server.ThreadingHTTPServer):
+    """
+    Сервер на свободном порту localhost; работает в фоновом потоке
+    внутри with.
+    """
+    daemon_threads = True
+
+    def __init__(self, key='test-key', delay=0.0, failures=0):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.key = key
+        self.delay = delay
+        self.failures = failures
+        self.counts = {}
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever,
+                                       args=(0.05,), daemon=True)
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/api/v1.5/tr.json/'.format(
+            self.server_address[1])
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def take_failure(self):
+        with self.lock:
+            if self.failures <= 0:
+                return False
+            self.failures -= 1
+            return True
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
@@ -1,9 +1,264 @@
 #!/usr/bin/env python3
+"""
+Переводит текст по цепочке из N случайных языков и обратно на русский
+с помощью API Яндекс.Переводчика.
 
+Каждая строка стандартного ввода - отдельный текст, для каждой
+выводится одна строка результата. Цепочки разных текстов идут
+одновременно в asyncio; сами HTTP-запросы выполняются в пуле потоков
+через один requests.Session, который держит keep-alive соединения, так
+что соединение устанавливается один раз на поток, а не на запрос.
+Одновременно выполняется не больше concurrency запросов. Запросы,
+неудачные из-за сети или с кодом 429 и 5xx, повторяются с
+экспоненциально растущей задержкой. Переводы кэшируются в SQLite по
+ключу (текст, исходный язык, язык перевода), а одинаковые одновременные
+запросы выполняются один раз.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import random
+import sqlite3
+import sys
+import requests
+import requests.adapters
 
-def main():
+API_URL = 'https://translate.yandex.net/api/v1.5/tr.json/'
+SOURCE_LANGUAGE = 'ru'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TranslatorError(Exception):
     pass
 
 
+class TranslationCache:
+    """
+    Переводы по ключу (text, src, dst) в файле SQLite; по умолчанию -
+    только в памяти. Изменения сохраняются в close().
+
+    >>> cache = TranslationCache()
+    >>> cache.put('мир', 'ru', 'en', 'world')
+    >>> cache.get('мир', 'ru', 'en'), cache.get('мир', 'ru', 'de')
+    ('world', None)
+    """
+
+    def __init__(self, filename=':memory:'):
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS translations ('
+            'text TEXT NOT NULL, src TEXT NOT NULL, dst TEXT NOT NULL, '
+            'translation TEXT NOT NULL, PRIMARY KEY (text, src, dst))')
+
+    def get(self, text, src, dst):
+        row = self.connection.execute(
+            'SELECT translation FROM translations '
+            'WHERE text = ? AND src = ? AND dst = ?',
+            (text, src, dst)).fetchone()
+        return row[0] if row else None
+
+    def put(self, text, src, dst, translation):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)',
+            (text, src, dst, translation))
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+def read_key(filename):
+    with open(filename) as f:
+        return f.read().strip()
+
+
+def make_session(pool_size):
+    """Session с пулом keep-alive соединений на pool_size потоков."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                            pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def random_path(languages, count, rng, source=SOURCE_LANGUAGE):
+    """
+    Языки цепочки: source, count случайных языков, source (при count,
+    равном 0, - только source). Случайные языки отличны от source,
+    поэтому переводов всегда count + 1, а соседние языки различны.
+    Для этого нужен хотя бы один язык, кроме source, а для count > 1 -
+    хотя бы два; иначе бросается ValueError.
+
+    >>> path = random_path(['en', 'ru', 'de'], 3, random.Random(1))
+    >>> len(path), path[0], path[-1], 'ru' in path[1:-1]
+    (5, 'ru', 'ru', False)
+    >>> all(a != b for a, b in zip(path, path[1:]))
+    True
+    >>> random_path(['ru'], 1, random.Random(1))
+    Traceback (most recent call last):
+    ...
+    ValueError: 1 translations need 1 languages other than ru, got 0
+    """
+    needed = min(count, 2)
+    others = len(set(languages) - {source})
+    if others < needed:
+        raise ValueError(
+            '{} translations need {} languages other than {}, got {}'.format(
+                count, needed, source, others))
+    path = [source]
+    for _ in range(count):
+        path.append(rng.choice([language for language in languages
+                                if language not in (path[-1], source)]))
+    if count:
+        path.append(source)
+    return path
+
+
+class Translator:
+    """
+    Клиент API переводчика. Создаётся и используется внутри одного
+    запущенного цикла событий.
+    """
+
+    def __init__(self, key, url=API_URL, concurrency=8, retries=3,
+                 backoff=0.5, timeout=10.0, cache=None):
+        if retries < 0:
+            raise ValueError('retries must be non-negative')
+        self.key = key
+        self.url = url
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache if cache is not None else TranslationCache()
+        self.session = make_session(concurrency)
+        self.executor = concurrent.futures.ThreadPoolExecutor(concurrency)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.pending = {}
+
+    def close(self):
+        self.executor.shutdown()
+        self.session.close()
+
+    def post(self, method, params):
+        return self.session.post(self.url + method,
+                                 data=dict(params, key=self.key),
+                                 timeout=self.timeout)
+
+    async def call(self, method, **params):
+        """
+        Вызывает метод API и возвращает разобранный JSON. Ошибки сети
+        и ответы с кодами из RETRY_STATUSES повторяются до retries раз,
+        остальные ошибки API сразу превращаются в TranslatorError.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            async with self.semaphore:
+                try:
+                    response = await loop.run_in_executor(
+                        self.executor,
+                        functools.partial(self.post, method, params))
+                except requests.RequestException as e:
+                    error = str(e)
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        return check_response(response)
+                    error = 'HTTP {}'.format(response.status_code)
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        raise TranslatorError('{} failed after {} attempts: {}'.format(
+            method, self.retries + 1, error))
+
+    async def languages(self, ui=SOURCE_LANGUAGE):
+        """Языки, на которые умеет переводить переводчик."""
+        data = await self.call('getLangs', ui=ui)
+        return sorted(data['langs'])
+
+    async def translate(self, text, src, dst):
+        cached = self.cache.get(text, src, dst)
+        if cached is not None:
+            return cached
+        key = (text, src, dst)
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.fetch(text, src, dst))
+            self.pending[key] = task
+            task.add_done_callback(lambda _: self.pending.pop(key, None))
+        return await task
+
+    async def fetch(self, text, src, dst):
+        data = await self.call('translate', text=text,
+                               lang='{}-{}'.format(src, dst))
+        translation = ''.join(data['text'])
+        self.cache.put(text, src, dst, translation)
+        return translation
+
+    async def translate_path(self, text, path):
+        for src, dst in zip(path, path[1:]):
+            text = await self.translate(text, src, dst)
+        return text
+
+
+def check_response(response):
+    try:
+        data = response.json()
+    except ValueError:
+        raise TranslatorError('HTTP {}: not a JSON response'.format(
+            response.status_code))
+    code = data.get('code', response.status_code)
+    if response.status_code != 200 or code != 200:
+        raise TranslatorError('{}: {}'.format(
+            code, data.get('message', 'request failed')))
+    return data
+
+
+async def translate_texts(texts, count, key, rng=None, cache=None,
+                          **options):
+    """
+    Переводит каждый текст по своей случайной цепочке из count языков.
+    Цепочки выбираются заранее, в порядке текстов, поэтому при заданном
+    rng они не зависят от того, в каком порядке придут ответы.
+    """
+    rng = rng or random.Random()
+    translator = Translator(key, cache=cache, **options)
+    try:
+        languages = await translator.languages()
+        paths = [random_path(languages, count, rng) for _ in texts]
+        return await asyncio.gather(*(
+            translator.translate_path(text, path)
+            for text, path in zip(texts, paths)))
+    finally:
+        translator.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Translate text through N random languages and back '
+                    'to Russian.')
+    parser.add_argument('count', metavar='N', type=int)
+    parser.add_argument('key_file', metavar='API_KEY')
+    parser.add_argument('--url', default=API_URL)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--cache', help='SQLite file to keep translations '
+                                        'in between runs')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    texts = sys.stdin.read().splitlines()
+    cache = TranslationCache(args.cache or ':memory:')
+    try:
+        results = asyncio.run(translate_texts(
+            texts, args.count, read_key(args.key_file),
+            rng=random.Random(args.seed), cache=cache, url=args.url,
+            concurrency=args.concurrency, retries=args.retries))
+    except (TranslatorError, ValueError) as e:
+        sys.exit('translator: {}'.format(e))
+    finally:
+        cache.close()
+    for result in results:
+        print(result)
+
+
 if __name__ == '__main__':
     main()
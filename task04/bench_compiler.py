@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Сравнение скорости model.evaluate и compiler.compile_program
+на рекурсивных программах (числа Фибоначчи и факториал).
+
+Запуск: ./bench_compiler.py
+"""
+import contextlib
+import io
+import timeit
+from model import *
+from compiler import compile_program
+
+
+def fib_program(n):
+    return [
+        FunctionDefinition('fib', Function(['n'], [
+            Conditional(
+                BinaryOperation(Reference('n'), '<', Number(2)),
+                [Reference('n')],
+                [
+                    BinaryOperation(
+                        FunctionCall(Reference('fib'), [
+                            BinaryOperation(Reference('n'), '-', Number(1))
+                        ]),
+                        '+',
+                        FunctionCall(Reference('fib'), [
+                            BinaryOperation(Reference('n'), '-', Number(2))
+                        ])
+                    )
+                ]
+            )
+        ])),
+        Print(FunctionCall(Reference('fib'), [Number(n)])),
+    ]
+
+
+def factorial_program(n):
+    return [
+        FunctionDefinition('fac', Function(['n'], [
+            Conditional(
+                BinaryOperation(Reference('n'), '==', Number(0)),
+                [Number(1)],
+                [
+                    BinaryOperation(
+                        Reference('n'),
+                        '*',
+                        FunctionCall(Reference('fac'), [
+                            BinaryOperation(Reference('n'), '-', Number(1))
+                        ])
+                    )
+                ]
+            )
+        ])),
+        Print(FunctionCall(Reference('fac'), [Number(n)])),
+    ]
+
+
+def run_evaluate(program):
+    scope = Scope()
+    for statement in program:
+        statement.evaluate(scope)
+
+
+def run_compiled(program):
+    scope = Scope()
+    for statement in program:
+        statement(scope)
+
+
+def measure(name, program, number=1, repeat=7):
+    compiled = [compile_program(statement) for statement in program]
+    outputs = []
+    for runner, code in ((run_evaluate, program), (run_compiled, compiled)):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            runner(code)
+        outputs.append(output.getvalue())
+    assert outputs[0] == outputs[1], outputs
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        walk = min(timeit.repeat(lambda: run_evaluate(program),
+                                 number=number, repeat=repeat))
+        fast = min(timeit.repeat(lambda: run_compiled(compiled),
+                                 number=number, repeat=repeat))
+    print('{:<20} evaluate {:8.4f}s  compiled {:8.4f}s  speedup {:5.2f}x'
+          .format(name, walk, fast, walk / fast))
+
+
+def main():
+    measure('fib(20)', fib_program(20))
+    measure('fib(24)', fib_program(24))
+    measure('fac(50) x 1000', factorial_program(50), number=1000)
+    measure('fac(150) x 100', factorial_program(150), number=100)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Стоимость поиска имени в Scope на разной глубине вложенности:
+Scope со слотами и кэшем владельцев против цепочки словарей. Слоты
+имён берутся заранее, как в Reference.evaluate.
+
+Запуск: ./bench_scope.py
+"""
+import timeit
+from model import SLOTS, Scope
+
+
+class DictScope:
+    """Прежняя реализация: словарь в каждом Scope и обход родителей."""
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.values = {}
+
+    def __getitem__(self, name):
+        scope = self
+        while scope is not None:
+            if name in scope.values:
+                return scope.values[name]
+            scope = scope.parent
+        raise KeyError(name)
+
+    def __setitem__(self, name, value):
+        self.values[name] = value
+
+
+def build_chain(scope_class, depth):
+    """Как при рекурсии: глобальная функция и аргумент в каждом кадре."""
+    scope = scope_class()
+    scope['fun'] = object()
+    for level in range(depth):
+        scope = scope_class(scope)
+        scope['n'] = level
+    return scope
+
+
+def repeated_lookup(scope_class, depth, number):
+    leaf = build_chain(scope_class, depth)
+    if scope_class is Scope:
+        fun = SLOTS.slot('fun')
+        return timeit.timeit(lambda: leaf.get_slot(fun),
+                             number=number) / number
+    return timeit.timeit(lambda: leaf['fun'], number=number) / number
+
+
+def call_lookup(scope_class, depth, number):
+    """Новый кадр на каждый поиск, как при очередном вызове функции."""
+    leaf = build_chain(scope_class, depth)
+    if scope_class is Scope:
+        fun = SLOTS.slot('fun')
+        n = SLOTS.slot('n')
+
+        def call():
+            scope = Scope(leaf)
+            scope.set_slot(n, 0)
+            return scope.get_slot(fun)
+    else:
+        def call():
+            scope = scope_class(leaf)
+            scope['n'] = 0
+            return scope['fun']
+    return timeit.timeit(call, number=number) / number
+
+
+def main():
+    number = 20000
+    print('{:>6} {:>14} {:>14} {:>14} {:>14}'.format(
+        'depth', 'dict lookup', 'slot lookup', 'dict call', 'slot call'))
+    for depth in (10, 100, 1000):
+        print('{:>6} {:>12.0f}ns {:>12.0f}ns {:>12.0f}ns {:>12.0f}ns'.format(
+            depth,
+            repeated_lookup(DictScope, depth, number) * 1e9,
+            repeated_lookup(Scope, depth, number) * 1e9,
+            call_lookup(DictScope, depth, number) * 1e9,
+            call_lookup(Scope, depth, number) * 1e9,
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Компиляция синтаксического дерева ЯТЬ в замыкания Python.
+
+compile_program(node) один раз обходит дерево и возвращает функцию
+run(scope), результат и побочные эффекты которой совпадают с
+node.evaluate(scope). Операторы BinaryOperation и UnaryOperation
+разрешаются на этапе компиляции, а тело каждой Function компилируется
+один раз (и ещё раз в виде compile_value, если результат её вызова
+используется как число) и затем переиспользуется при всех вызовах.
+
+Каждое выражение можно скомпилировать в одном из трёх видов:
+* compile - замыкание возвращает ЯТЬ-значение (Number или Function),
+  как evaluate;
+* compile_value - замыкание возвращает int, хранящийся в Number;
+* compile_test - замыкание возвращает истинность числа (0 - ложь).
+Промежуточные результаты арифметики не заворачиваются в Number,
+объекты создаются только там, где значение видно снаружи: в Scope,
+в результате вызова функции, если он не используется сразу как число,
+и в результате всей программы.
+
+Скомпилированный код работает не со Scope, а с плоским списком env, в
+котором у каждого имени программы есть постоянный номер ячейки (слот),
+выданный при компиляции. При динамической области видимости имя всегда
+означает самую внутреннюю из активных привязок, поэтому в ячейке лежит
+её значение ("поверхностное связывание"): вызов функции запоминает
+старые значения только своих слотов (аргументов и имён, которые тело
+определяет через FunctionDefinition и Read), записывает аргументы, а
+после выхода восстанавливает запомненное. Поиск имени стоит O(1), а
+вызов - O(числа локальных имён функции).
+"""
+from model import *
+
+
+def compile_program(node):
+    """
+    Возвращает функцию run(scope), эквивалентную node.evaluate(scope).
+    Имена, которые программа определяет на верхнем уровне (FunctionDefinition
+    и Read), после выполнения записываются в scope.
+    """
+    compiler = Compiler()
+    program = compiler.compile(node)
+
+    def run(scope):
+        visible = flatten(scope)
+        env = compiler.make_env(visible)
+        try:
+            return program(env)
+        finally:
+            for name, slot in compiler.slots.items():
+                value = env[slot]
+                if (not isinstance(value, Unbound) and
+                        visible.get(name) is not value):
+                    scope[name] = value
+    return run
+
+
+def flatten(scope):
+    """Собирает все видимые из scope имена в один словарь."""
+    chain = []
+    while scope is not None:
+        chain.append(scope.items())
+        scope = scope.parent
+    env = {}
+    for items in reversed(chain):
+        env.update(items)
+    return env
+
+
+class Unbound:
+    """
+    Значение слота, имя которого нигде не связано. Чтение числа из него
+    бросает KeyError, как Scope, поэтому проверять каждый слот перед
+    чтением .value не нужно.
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def value(self):
+        raise KeyError(self.name)
+
+
+def local_names(function):
+    """
+    Имена, которые связывает в своём Scope вызов function: аргументы
+    и имена из FunctionDefinition и Read в теле, кроме тел вложенных
+    Function - у тех свой Scope.
+    """
+    names = list(function.args)
+    nodes = list(function.body or [])
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (FunctionDefinition, Read)):
+            names.append(node.name)
+        if isinstance(node, Conditional):
+            nodes.append(node.condition)
+            nodes.extend(node.if_true or [])
+            nodes.extend(node.if_false or [])
+        elif isinstance(node, Print):
+            nodes.append(node.expr)
+        elif isinstance(node, FunctionCall):
+            nodes.append(node.fun_expr)
+            nodes.extend(node.args)
+        elif isinstance(node, BinaryOperation):
+            nodes.append(node.lhs)
+            nodes.append(node.rhs)
+        elif isinstance(node, UnaryOperation):
+            nodes.append(node.expr)
+    return names
+
+
+def shifted_reference(node):
+    """
+    Для выражения вида "имя op число" с арифметическим op возвращает
+    (имя, функция op, число), иначе None.
+    """
+    if (isinstance(node, BinaryOperation) and node.op in ARITHMETIC and
+            isinstance(node.lhs, Reference) and
+            isinstance(node.rhs, Number)):
+        return node.lhs.name, BINARY_OPERATIONS[node.op], node.rhs.value
+    return None
+
+
+class Compiler:
+    def __init__(self):
+        self.slots = {}
+        self.frames = {}
+        self.value_frames = {}
+        self.compilers = {
+            Number: self.compile_number,
+            Function: self.compile_function,
+            FunctionDefinition: self.compile_function_definition,
+            Conditional: self.compile_conditional,
+            Print: self.compile_print,
+            Read: self.compile_read,
+            FunctionCall: self.compile_function_call,
+            Reference: self.compile_reference,
+            BinaryOperation: self.compile_binary_operation,
+            UnaryOperation: self.compile_unary_operation,
+        }
+        self.value_compilers = {
+            Number: self.compile_number_value,
+            Reference: self.compile_reference_value,
+            Conditional: self.compile_conditional_value,
+            BinaryOperation: self.compile_binary_operation_value,
+            UnaryOperation: self.compile_unary_operation_value,
+            FunctionCall: self.compile_function_call_value,
+        }
+
+    def slot(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.slots)
+        return slot
+
+    def make_env(self, visible):
+        """
+        Строит env для запуска программы из имён, видимых в Scope. Имена
+        из Scope тоже получают слоты: их могут использовать функции,
+        пришедшие извне и компилируемые только при первом вызове.
+        """
+        for name in visible:
+            self.slot(name)
+        return [visible[name] if name in visible else Unbound(name)
+                for name in self.slots]
+
+    def grow_env(self, env):
+        """Дописывает в env слоты имён, появившихся после его создания."""
+        names = list(self.slots)
+        env.extend(Unbound(name) for name in names[len(env):])
+
+    def compile(self, node):
+        return self.compilers[type(node)](node)
+
+    def compile_value(self, node):
+        compiler = self.value_compilers.get(type(node))
+        if compiler is not None:
+            return compiler(node)
+        expr = self.compile(node)
+        return lambda env: expr(env).value
+
+    def compile_test(self, node):
+        if isinstance(node, BinaryOperation) and node.op in BOOLEAN_OPERATIONS:
+            return self.compile_binary_operation_value(node)
+        return self.compile_value(node)
+
+    def compile_block(self, block, compile_last=None):
+        """
+        Компилирует список выражений. Последнее компилируется функцией
+        compile_last (по умолчанию compile), а пустой список даёт Number(0).
+        """
+        compile_last = compile_last or self.compile
+        block = list(block or [])
+        if not block:
+            return compile_last(Number(0))
+        exprs = [self.compile(expr) for expr in block[:-1]]
+        last = compile_last(block[-1])
+        if not exprs:
+            return last
+
+        def run_block(env):
+            for expr in exprs:
+                expr(env)
+            return last(env)
+        return run_block
+
+    def compile_block_value(self, block):
+        return self.compile_block(block, self.compile_value)
+
+    def frame_of(self, function, env=None, unbox=False):
+        """
+        Возвращает кадр функции - кортеж (param, body, invoke), где
+        invoke(env, values) выполняет тело function с аргументами values
+        и восстанавливает после этого слоты локальных имён. Если функция
+        связывает только один аргумент, param - его слот, и вызов с одним
+        аргументом можно выполнить прямо на месте, иначе param равен -1.
+        При unbox тело возвращает не Number, а хранящееся в нём число;
+        такой кадр компилируется при первом вызове, результат которого
+        сразу используется как число.
+
+        Функции, пришедшие извне (например, положенные в Scope до запуска
+        программы), тоже компилируются при первом вызове, и тогда env
+        дополняется новыми слотами.
+        """
+        if type(function) is Unbound:
+            raise KeyError(function.name)
+        frames = self.value_frames if unbox else self.frames
+        frame = frames.get(function)
+        if frame is None:
+            frame = frames[function] = self.compile_frame(
+                function,
+                self.compile_block_value if unbox else self.compile_block)
+        if env is not None and len(env) < len(self.slots):
+            self.grow_env(env)
+        return frame
+
+    def compile_frame(self, function, compile_body):
+        params = [self.slot(name) for name in function.args]
+        slots = list(dict.fromkeys(
+            self.slot(name) for name in local_names(function)))
+        body = compile_body(function.body)
+
+        def invoke(env, values):
+            saved = [env[slot] for slot in slots]
+            for slot, value in zip(params, values):
+                env[slot] = value
+            try:
+                return body(env)
+            finally:
+                for slot, value in zip(slots, saved):
+                    env[slot] = value
+
+        param = params[0] if len(params) == 1 and slots == params else -1
+        return param, body, invoke
+
+    def compile_number(self, node):
+        return lambda env: node
+
+    def compile_number_value(self, node):
+        value = node.value
+        return lambda env: value
+
+    def compile_function(self, node):
+        self.frame_of(node)
+        return lambda env: node
+
+    def compile_function_definition(self, node):
+        slot = self.slot(node.name)
+        function = node.function
+        self.frame_of(function)
+
+        def define(env):
+            env[slot] = function
+            return function
+        return define
+
+    def compile_conditional(self, node, compile_block=None):
+        compile_block = compile_block or self.compile_block
+        if_true = compile_block(node.if_true)
+        if_false = compile_block(node.if_false)
+        condition = node.condition
+        if (isinstance(condition, BinaryOperation) and
+                condition.op in BOOLEAN_OPERATIONS and
+                condition.op not in LOGICAL and
+                isinstance(condition.lhs, Reference) and
+                isinstance(condition.rhs, Number)):
+            # Самое частое условие выхода из рекурсии: "n < 2", "n == 0".
+            op = BINARY_OPERATIONS[condition.op]
+            slot = self.slot(condition.lhs.name)
+            value = condition.rhs.value
+            return lambda env: (if_true(env) if op(env[slot].value, value)
+                                else if_false(env))
+        test = self.compile_test(condition)
+        return lambda env: if_true(env) if test(env) else if_false(env)
+
+    def compile_conditional_value(self, node):
+        return self.compile_conditional(node, self.compile_block_value)
+
+    def compile_print(self, node):
+        expr = self.compile(node.expr)
+
+        def print_(env):
+            result = expr(env)
+            print(result.value)
+            return result
+        return print_
+
+    def compile_read(self, node):
+        slot = self.slot(node.name)
+
+        def read(env):
+            result = Number(int(input()))
+            env[slot] = result
+            return result
+        return read
+
+    def compile_function_call(self, node):
+        return self.compile_call(node, unbox=False)
+
+    def compile_function_call_value(self, node):
+        return self.compile_call(node, unbox=True)
+
+    def compile_call(self, node, unbox):
+        """
+        Компилирует вызов функции. При unbox замыкание возвращает число,
+        и тело функции выполняется в виде, не создающем Number для
+        результата.
+        """
+        # Как и FunctionCall.evaluate, вызов падает на несвязанном имени
+        # функции до вычисления аргументов: compile_reference бросает
+        # KeyError сразу.
+        fun_expr = self.compile(node.fun_expr)
+        args = [self.compile(arg) for arg in node.args]
+        frames = self.value_frames if unbox else self.frames
+
+        def frame_of(function, env):
+            return self.frame_of(function, env, unbox)
+
+        if len(args) != 1:
+            def call(env):
+                function = fun_expr(env)
+                values = [arg(env) for arg in args]
+                frame = frames.get(function) or frame_of(function, env)
+                return frame[2](env, values)
+            return call
+
+        shifted = shifted_reference(node.args[0])
+        if isinstance(node.fun_expr, Reference) and shifted is not None:
+            # Рекурсивный вызов вида f(n - 1): аргумент вычисляется без
+            # отдельного замыкания.
+            arg_name, op, operand = shifted
+            arg_slot = self.slot(arg_name)
+
+            def call_shifted(env):
+                function = fun_expr(env)
+                value = Number(op(env[arg_slot].value, operand))
+                param, body, invoke = (frames.get(function) or
+                                       frame_of(function, env))
+                if param < 0:
+                    return invoke(env, (value,))
+                saved = env[param]
+                env[param] = value
+                try:
+                    return body(env)
+                finally:
+                    env[param] = saved
+            return call_shifted
+
+        arg = args[0]
+
+        def call_with_one_arg(env):
+            function = fun_expr(env)
+            value = arg(env)
+            param, body, invoke = (frames.get(function) or
+                                   frame_of(function, env))
+            if param < 0:
+                return invoke(env, (value,))
+            # Самый частый случай - функция одного аргумента: её кадр
+            # строится прямо здесь, без вызова invoke.
+            saved = env[param]
+            env[param] = value
+            try:
+                return body(env)
+            finally:
+                env[param] = saved
+        return call_with_one_arg
+
+    def compile_reference(self, node):
+        slot = self.slot(node.name)
+
+        def reference(env):
+            value = env[slot]
+            if type(value) is Unbound:
+                raise KeyError(value.name)
+            return value
+        return reference
+
+    def compile_reference_value(self, node):
+        slot = self.slot(node.name)
+        return lambda env: env[slot].value
+
+    def compile_binary_operation(self, node):
+        if node.op in LOGICAL:
+            value = self.compile_binary_operation_value(node)
+            return lambda env: BOOLEANS[value(env)]
+        box = Number if node.op in ARITHMETIC else BOOLEANS.__getitem__
+        return self.compile_binary(node, box)
+
+    def compile_binary_operation_value(self, node):
+        if node.op in LOGICAL:
+            lhs = self.compile_test(node.lhs)
+            rhs = self.compile_test(node.rhs)
+            return LOGICAL[node.op](lhs, rhs)
+        return self.compile_binary(node, None)
+
+    def compile_binary(self, node, box):
+        """
+        Компилирует арифметическую операцию или сравнение. Если box не None,
+        результат заворачивается в ЯТЬ-значение вызовом box прямо в том же
+        замыкании. Частые случаи "имя op число", "имя op имя" и
+        "имя op выражение" обходятся без отдельного замыкания для имени.
+        """
+        op = BINARY_OPERATIONS[node.op]
+        if isinstance(node.lhs, Reference) and isinstance(node.rhs, Number):
+            slot = self.slot(node.lhs.name)
+            value = node.rhs.value
+            if box is None:
+                return lambda env: op(env[slot].value, value)
+            return lambda env: box(op(env[slot].value, value))
+        if isinstance(node.lhs, Reference) and isinstance(node.rhs, Reference):
+            lhs_slot = self.slot(node.lhs.name)
+            rhs_slot = self.slot(node.rhs.name)
+            if box is None:
+                return lambda env: op(env[lhs_slot].value, env[rhs_slot].value)
+            return lambda env: box(op(env[lhs_slot].value,
+                                      env[rhs_slot].value))
+        rhs = self.compile_value(node.rhs)
+        if isinstance(node.lhs, Reference):
+            slot = self.slot(node.lhs.name)
+            if box is None:
+                return lambda env: op(env[slot].value, rhs(env))
+            return lambda env: box(op(env[slot].value, rhs(env)))
+        lhs = self.compile_value(node.lhs)
+        if box is None:
+            return lambda env: op(lhs(env), rhs(env))
+        return lambda env: box(op(lhs(env), rhs(env)))
+
+    def compile_unary_operation(self, node):
+        value = self.compile_unary_operation_value(node)
+        if node.op == '-':
+            return lambda env: Number(value(env))
+        return lambda env: BOOLEANS[value(env)]
+
+    def compile_unary_operation_value(self, node):
+        if node.op == '-':
+            expr = self.compile_value(node.expr)
+            return lambda env: -expr(env)
+        test = self.compile_test(node.expr)
+        return lambda env: not test(env)
+
+
+ARITHMETIC = {'+', '-', '*', '/', '%'}
+
+BOOLEAN_OPERATIONS = {'==', '!=', '<', '>', '<=', '>=', '&&', '||'}
+
+# Как и evaluate, логические операторы всегда вычисляют оба операнда.
+LOGICAL = {
+    '&&': lambda lhs, rhs: lambda env: bool(lhs(env)) & bool(rhs(env)),
+    '||': lambda lhs, rhs: lambda env: bool(lhs(env)) | bool(rhs(env)),
+}
+
+BOOLEANS = {False: Number(0), True: Number(1)}
@@ -1,13 +1,160 @@
 #!/usr/bin/env python3
 import abc
+import operator
+
+
+class SlotTable:
+    """
+    Сопоставляет каждому имени постоянный номер ячейки (слот).
+    Таблица одна на весь процесс (SLOTS), поэтому узлы, которые
+    используют имя (Reference, Read, FunctionDefinition, аргументы
+    Function), получают его слот один раз при создании, и у имени
+    везде один и тот же слот.
+    """
+    __slots__ = ('slots', 'names', 'generation')
+
+    def __init__(self):
+        self.slots = {}
+        self.names = []
+        # Увеличивается, когда новое имя появляется в Scope, у которого
+        # уже есть дочерние: это делает устаревшими кэши владельцев.
+        self.generation = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def slot(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+        return slot
+
+
+SLOTS = SlotTable()
+
+MISSING = object()
 
 
 class Scope:
+    """
+    Динамическая область видимости, значения которой хранятся в массиве
+    по слотам из SLOTS. Массив растёт только до самого большого слота,
+    связанного в самом этом Scope, поэтому кадр вызова функции занимает
+    место лишь под её собственные имена.
+
+    Если имени нет в текущем Scope, он запоминает в owners, какой из
+    предков хранит значение. Пока выполняется вызов функции, Scope выше
+    него не меняются, поэтому повторный поиск стоит O(1), а не O(глубины).
+    """
+    __slots__ = ('parent', 'values', 'owners', 'generation', 'has_children')
+
     def __init__(self, parent=None):
-        raise NotImplementedError
+        self.parent = parent
+        if parent is not None:
+            parent.has_children = True
+        self.values = []
+        # Создаётся при первом промахе в самом этом Scope.
+        self.owners = None
+        self.generation = SLOTS.generation
+        self.has_children = False
+
+    def __getitem__(self, name):
+        slot = SLOTS.slots.get(name)
+        if slot is None:
+            raise KeyError(name)
+        return self.get_slot(slot)
+
+    def __setitem__(self, name, value):
+        self.set_slot(SLOTS.slot(name), value)
+
+    def get_slot(self, slot):
+        values = self.values
+        if slot < len(values):
+            value = values[slot]
+            if value is not MISSING:
+                return value
+        if not self.has_children and self.parent is not None:
+            # Кадр без дочерних - обычно только что созданный кадр вызова:
+            # заводить ему свой кэш дороже, чем спросить кэш родителя.
+            return self.parent.get_slot(slot)
+        owner = self.owner(slot)
+        if owner is None:
+            raise KeyError(SLOTS.names[slot])
+        return owner.values[slot]
+
+    def set_slot(self, slot, value):
+        values = self.values
+        if slot >= len(values):
+            values.extend([MISSING] * (slot + 1 - len(values)))
+        if values[slot] is MISSING and self.has_children:
+            SLOTS.generation += 1
+        values[slot] = value
+
+    def owner(self, slot):
+        """
+        Возвращает Scope, в котором связан слот (или None), и запоминает
+        ответ во всех Scope по пути до него.
+        """
+        generation = SLOTS.generation
+        owners = self.owners
+        if (self.generation == generation and owners is not None and
+                slot in owners):
+            return owners[slot]
+        path = []
+        scope = self
+        owner = None
+        while scope is not None:
+            values = scope.values
+            if slot < len(values) and values[slot] is not MISSING:
+                owner = scope
+                break
+            if (scope.generation == generation and
+                    scope.owners is not None and slot in scope.owners):
+                owner = scope.owners[slot]
+                break
+            path.append(scope)
+            scope = scope.parent
+        for scope in path:
+            if scope.generation != generation or scope.owners is None:
+                scope.owners = {}
+                scope.generation = generation
+            scope.owners[slot] = owner
+        return owner
+
+    def items(self):
+        """Возвращает пары (имя, значение), связанные в самом этом Scope."""
+        names = SLOTS.names
+        return [(names[slot], value) for slot, value in enumerate(self.values)
+                if value is not MISSING]
 
 
 class ASTNode(metaclass=abc.ABCMeta):
+    """
+    Узлы дерева неизменяемы: поля задаются только в конструкторе, а
+    присваивание полю готового узла вызывает AttributeError. Поэтому
+    один объект может быть потомком нескольких узлов (см. NodeFactory).
+    Поля хранятся в __slots__, в том же порядке, что и аргументы
+    конструктора; после них идут поля из derived, которые конструктор
+    вычисляет сам (например, слот имени).
+    """
+    __slots__ = ()
+    derived = ()  # type: tuple
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            '{} is immutable'.format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            '{} is immutable'.format(type(self).__name__))
+
+    def __reduce__(self):
+        """Аргументы конструктора; нужно для pickle и copy."""
+        return type(self), tuple(getattr(self, name)
+                                 for name in self.__slots__
+                                 if name not in self.derived)
+
     @abc.abstractmethod
     def evaluate(self, scope):
         """
@@ -29,8 +176,22 @@ class Number(ASTNode):
     быть можно положить в словарь в качестве ключа (см. специальные методы
     __eq__, __ne__, __hash__ — требуется реализовать две из них).
     """
+    __slots__ = ('value',)
+
     def __init__(self, value):
-        pass
+        object.__setattr__(self, 'value', value)
+
+    def __eq__(self, other):
+        return isinstance(other, Number) and self.value == other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return 'Number({})'.format(self.value)
+
+    def evaluate(self, scope):
+        return self
 
 
 class Function(ASTNode):
@@ -44,8 +205,17 @@ class Function(ASTNode):
 
     Аналогично Number, метод evaluate должен возвращать self.
     """
+    __slots__ = ('args', 'body', 'arg_slots')
+    derived = ('arg_slots',)
+
     def __init__(self, args, body):
-        pass
+        object.__setattr__(self, 'args', args)
+        object.__setattr__(self, 'body', body)
+        object.__setattr__(self, 'arg_slots',
+                           tuple(SLOTS.slot(name) for name in args))
+
+    def evaluate(self, scope):
+        return self
 
 
 class FunctionDefinition(ASTNode):
@@ -57,8 +227,17 @@ class FunctionDefinition(ASTNode):
     обновление текущего Scope,  т.е. в него добавляется новое значение типа
     Function под заданным именем, а возвращать evaluate должен саму функцию.
     """
+    __slots__ = ('name', 'function', 'slot')
+    derived = ('slot',)
+
     def __init__(self, name, function):
-        raise NotImplementedError
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'function', function)
+        object.__setattr__(self, 'slot', SLOTS.slot(name))
+
+    def evaluate(self, scope):
+        scope.set_slot(self.slot, self.function)
+        return self.function
 
 
 class Conditional(ASTNode):
@@ -78,8 +257,19 @@ class Conditional(ASTNode):
     Если соответствующий список пуст или равен None, то возвращаемое значение
     остается на ваше усмотрение.
     """
+    __slots__ = ('condition', 'if_true', 'if_false')
+
     def __init__(self, condition, if_true, if_false=None):
-        raise NotImplementedError
+        object.__setattr__(self, 'condition', condition)
+        object.__setattr__(self, 'if_true', if_true)
+        object.__setattr__(self, 'if_false', if_false)
+
+    def evaluate(self, scope):
+        if self.condition.evaluate(scope).value:
+            block = self.if_true
+        else:
+            block = self.if_false
+        return evaluate_block(block, scope)
 
 
 class Print(ASTNode):
@@ -96,8 +286,15 @@ class Print(ASTNode):
     Возвращаемое значение метода evаluate - объект типа Number, который был
     выведен.
     """
+    __slots__ = ('expr',)
+
     def __init__(self, expr):
-        raise NotImplementedError
+        object.__setattr__(self, 'expr', expr)
+
+    def evaluate(self, scope):
+        result = self.expr.evaluate(scope)
+        print(result.value)
+        return result
 
 
 class Read(ASTNode):
@@ -113,8 +310,17 @@ class Read(ASTNode):
     Каждое входное число располагается на отдельной строке (никаких пустых
     строк и лишних символов не будет).
     """
+    __slots__ = ('name', 'slot')
+    derived = ('slot',)
+
     def __init__(self, name):
-        raise NotImplementedError
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'slot', SLOTS.slot(name))
+
+    def evaluate(self, scope):
+        result = Number(int(input()))
+        scope.set_slot(self.slot, result)
+        return result
 
 
 class FunctionCall(ASTNode):
@@ -141,8 +347,19 @@ class FunctionCall(ASTNode):
     метода evaluate. Если результат вычисления последнего выражения
     неопределён, то возвращаемое значение остаётся на ваше усмотрение.
     """
+    __slots__ = ('fun_expr', 'args')
+
     def __init__(self, fun_expr, args):
-        raise NotImplementedError
+        object.__setattr__(self, 'fun_expr', fun_expr)
+        object.__setattr__(self, 'args', args)
+
+    def evaluate(self, scope):
+        function = self.fun_expr.evaluate(scope)
+        args = [arg.evaluate(scope) for arg in self.args]
+        call_scope = Scope(scope)
+        for slot, value in zip(function.arg_slots, args):
+            call_scope.set_slot(slot, value)
+        return evaluate_block(function.body, call_scope)
 
 
 class Reference(ASTNode):
@@ -151,8 +368,15 @@ class Reference(ASTNode):
     Метод evaluate должен найти в scope объект с именем name и вернуть его
     (см. подробнее про класс Scope).
     """
+    __slots__ = ('name', 'slot')
+    derived = ('slot',)
+
     def __init__(self, name):
-        raise NotImplementedError
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'slot', SLOTS.slot(name))
+
+    def evaluate(self, scope):
+        return scope.get_slot(self.slot)
 
 
 class BinaryOperation(ASTNode):
@@ -175,8 +399,17 @@ class BinaryOperation(ASTNode):
     Гарантируется, что lhs и rhs при вычислении дадут объект типа Number,
     т.е. не может получиться так, что вам придется сравнивать две функции.
     """
+    __slots__ = ('lhs', 'op', 'rhs')
+
     def __init__(self, lhs, op, rhs):
-        raise NotImplementedError
+        object.__setattr__(self, 'lhs', lhs)
+        object.__setattr__(self, 'op', op)
+        object.__setattr__(self, 'rhs', rhs)
+
+    def evaluate(self, scope):
+        lhs = self.lhs.evaluate(scope).value
+        rhs = self.rhs.evaluate(scope).value
+        return Number(int(BINARY_OPERATIONS[self.op](lhs, rhs)))
 
 
 class UnaryOperation(ASTNode):
@@ -190,5 +423,133 @@ class UnaryOperation(ASTNode):
     Как и для BinaryOperation, Number, хранящий 0, считаем за False, а все
     остальные за True.
     """
+    __slots__ = ('op', 'expr')
+
     def __init__(self, op, expr):
-        raise NotImplementedError
+        object.__setattr__(self, 'op', op)
+        object.__setattr__(self, 'expr', expr)
+
+    def evaluate(self, scope):
+        value = self.expr.evaluate(scope).value
+        return Number(int(UNARY_OPERATIONS[self.op](value)))
+
+
+BINARY_OPERATIONS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.floordiv,
+    '%': operator.mod,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '&&': lambda lhs, rhs: bool(lhs) and bool(rhs),
+    '||': lambda lhs, rhs: bool(lhs) or bool(rhs),
+}
+
+UNARY_OPERATIONS = {
+    '-': operator.neg,
+    '!': operator.not_,
+}
+
+
+def evaluate_block(block, scope):
+    """
+    Вычисляет список выражений по порядку и возвращает результат последнего.
+    Для пустого списка или None возвращает Number(0).
+    """
+    result = Number(0)
+    for expr in block or []:
+        result = expr.evaluate(scope)
+    return result
+
+
+class NodeFactory:
+    """
+    Строит узлы с хеш-консингом: узел того же типа с теми же полями
+    (потомки сравниваются по идентичности) создаётся только один раз,
+    а повторный запрос возвращает уже построенный объект. Так Number(0)
+    или Reference('n') хранятся в программе в одном экземпляре.
+
+    Списки выражений и имён в построенных узлах хранятся как кортежи,
+    которые тоже не повторяются. Фабрика держит ссылки на все построенные
+    узлы, пока жива сама.
+    """
+    def __init__(self):
+        self.nodes = {}
+        self.tuples = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def make(self, cls, *fields):
+        values = []
+        key = [cls]
+        for field in fields:
+            if isinstance(field, (list, tuple)):
+                field = self.make_tuple(field)
+            values.append(field)
+            key.append(field_key(field))
+        node = self.nodes.get(tuple(key))
+        if node is None:
+            node = self.nodes[tuple(key)] = cls(*values)
+        return node
+
+    def make_tuple(self, items):
+        items = tuple(items)
+        return self.tuples.setdefault(tuple(map(field_key, items)), items)
+
+    def intern(self, node):
+        """
+        Возвращает построенную фабрикой копию дерева node. Дерево
+        обходится без рекурсии, поэтому глубина не ограничена стеком
+        Python; общие поддеревья обрабатываются один раз.
+        """
+        interned = {}
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if id(current) in interned:
+                stack.pop()
+                continue
+            cls, fields = current.__reduce__()
+            children = [child for child in child_nodes(fields)
+                        if id(child) not in interned]
+            if children:
+                stack.extend(children)
+                continue
+            stack.pop()
+            interned[id(current)] = self.make(
+                cls, *(intern_field(field, interned) for field in fields))
+        return interned[id(node)]
+
+
+def child_nodes(fields):
+    """Узлы среди полей fields, в том числе внутри списков и кортежей."""
+    for field in fields:
+        if isinstance(field, ASTNode):
+            yield field
+        elif isinstance(field, (list, tuple)):
+            yield from child_nodes(field)
+
+
+def intern_field(field, interned):
+    """Поле с узлами, заменёнными на их копии из interned."""
+    if isinstance(field, ASTNode):
+        return interned[id(field)]
+    if isinstance(field, (list, tuple)):
+        return tuple(intern_field(item, interned) for item in field)
+    return field
+
+
+def field_key(field):
+    if isinstance(field, (str, int)) or field is None:
+        # Тип входит в ключ, иначе True и 1 были бы одним и тем же полем.
+        return type(field), field
+    # Потомки и кортежи из фабрики сравниваются по идентичности. Узел
+    # ссылается на них, поэтому, пока он лежит в фабрике, их id не
+    # достанутся другим объектам.
+    return id(field)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+import io
+import pytest
+from model import *
+from compiler import compile_program
+from test_model import factorial_definition
+
+
+def run_both(program, capsys, stdin='', monkeypatch=None):
+    results = []
+    for run in (lambda node, scope: node.evaluate(scope),
+                lambda node, scope: compile_program(node)(scope)):
+        if monkeypatch is not None:
+            monkeypatch.setattr('sys.stdin', io.StringIO(stdin))
+        scope = Scope()
+        result = None
+        for statement in program:
+            result = run(statement, scope)
+        results.append((result, capsys.readouterr().out))
+    assert results[0] == results[1]
+    return results[1]
+
+
+def test_factorial(capsys, monkeypatch):
+    program = [
+        factorial_definition(),
+        Read('n'),
+        Print(FunctionCall(Reference('fac'), [Reference('n')])),
+    ]
+    result, out = run_both(program, capsys, '10\n', monkeypatch)
+    assert out == '3628800\n'
+    assert result == Number(3628800)
+
+
+@pytest.mark.parametrize('op', [
+    '+', '-', '*', '/', '%', '==', '!=', '<', '>', '<=', '>=', '&&', '||',
+])
+def test_binary_operations(op, capsys):
+    program = [
+        FunctionDefinition('f', Function(['a', 'b'], [
+            Print(BinaryOperation(Reference('a'), op, Reference('b'))),
+            Print(BinaryOperation(Reference('a'), op, Number(3))),
+            Print(BinaryOperation(Number(-7), op, Reference('b'))),
+            BinaryOperation(
+                UnaryOperation('-', Reference('a')), op, Reference('b')),
+        ])),
+        FunctionCall(Reference('f'), [Number(7), Number(2)]),
+        FunctionCall(Reference('f'), [Number(0), Number(5)]),
+    ]
+    run_both(program, capsys)
+
+
+def test_unary_operations(capsys):
+    program = [
+        Print(UnaryOperation('-', Number(3))),
+        Print(UnaryOperation('!', Number(3))),
+        Print(UnaryOperation('!', BinaryOperation(Number(1), '<', Number(2)))),
+    ]
+    _, out = run_both(program, capsys)
+    assert out == '-3\n0\n0\n'
+
+
+def test_logical_operations_evaluate_both_operands(capsys):
+    program = [
+        BinaryOperation(Print(Number(0)), '&&', Print(Number(1))),
+        BinaryOperation(Print(Number(2)), '||', Print(Number(3))),
+    ]
+    _, out = run_both(program, capsys)
+    assert out == '0\n1\n2\n3\n'
+
+
+def test_dynamic_scope(capsys, monkeypatch):
+    program = [
+        FunctionDefinition('show', Function([], [Print(Reference('x'))])),
+        FunctionDefinition('outer', Function(['x'], [
+            FunctionCall(Reference('show'), []),
+            FunctionDefinition('show', Function([], [
+                Print(UnaryOperation('-', Reference('x')))
+            ])),
+            FunctionCall(Reference('show'), []),
+        ])),
+        FunctionCall(Reference('outer'), [Number(5)]),
+        Conditional(Number(0), [Number(1)]),
+        Read('x'),
+        FunctionCall(Reference('show'), []),
+    ]
+    _, out = run_both(program, capsys, '7\n', monkeypatch)
+    assert out == '5\n-5\n7\n'
+
+
+def test_top_level_definitions_update_scope(monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('3\n'))
+    parent = Scope()
+    parent['y'] = Number(1)
+    scope = Scope(parent)
+    compile_program(Read('x'))(scope)
+    function = Function([], [])
+    compile_program(FunctionDefinition('f', function))(scope)
+    assert dict(scope.items()) == {'x': Number(3), 'f': function}
+    assert dict(parent.items()) == {'y': Number(1)}
+
+
+def test_function_from_outer_scope(capsys):
+    scope = Scope()
+    scope['double'] = Function(['a'], [
+        BinaryOperation(Reference('a'), '*', Number(2))
+    ])
+    run = compile_program(
+        Print(FunctionCall(Reference('double'), [Number(21)])))
+    assert run(scope) == Number(42)
+    assert capsys.readouterr().out == '42\n'
+
+
+def test_arguments_count_mismatch(capsys):
+    program = [
+        FunctionDefinition('f', Function(['x', 'y'], [
+            Print(Reference('x')),
+        ])),
+        FunctionDefinition('g', Function(['x'], [
+            Print(BinaryOperation(Reference('x'), '+', Number(1))),
+        ])),
+        FunctionCall(Reference('f'), [Number(1), Number(2), Number(3)]),
+        FunctionCall(Reference('f'), [Number(8)]),
+        FunctionCall(Reference('g'), [Number(4), Number(5)]),
+        Print(FunctionCall(Reference('g'), [Number(6)])),
+    ]
+    _, out = run_both(program, capsys)
+    assert out == '1\n8\n5\n7\n7\n'
+
+
+def test_call_results_used_as_numbers(capsys):
+    program = [
+        FunctionDefinition('sign', Function(['n'], [
+            Conditional(BinaryOperation(Reference('n'), '<', Number(0)),
+                        [Number(-1)],
+                        [Conditional(Reference('n'), [Number(1)])]),
+        ])),
+        FunctionDefinition('nothing', Function([], [])),
+        Print(BinaryOperation(
+            FunctionCall(Reference('sign'), [Number(-5)]), '*',
+            BinaryOperation(FunctionCall(Reference('sign'), [Number(0)]),
+                            '+', FunctionCall(Reference('nothing'), [])))),
+        Print(UnaryOperation('-', FunctionCall(Reference('sign'),
+                                               [Number(3)]))),
+    ]
+    _, out = run_both(program, capsys)
+    assert out == '0\n-1\n'
+
+
+def test_local_definitions_are_restored(capsys, monkeypatch):
+    program = [
+        FunctionDefinition('count', Function(['n'], [
+            Read('x'),
+            Conditional(Reference('n'), [
+                FunctionCall(Reference('count'), [
+                    BinaryOperation(Reference('n'), '-', Number(1))
+                ]),
+            ]),
+            Print(Reference('x')),
+        ])),
+        Read('x'),
+        FunctionCall(Reference('count'), [Number(2)]),
+        Print(Reference('x')),
+    ]
+    _, out = run_both(program, capsys, '1\n2\n3\n4\n', monkeypatch)
+    assert out == '4\n3\n2\n1\n'
+
+
+def test_missing_name_in_function():
+    program = FunctionCall(Function(['n'], [
+        BinaryOperation(Reference('n'), '*', FunctionCall(
+            Reference('zoo'), [BinaryOperation(Reference('n'), '-',
+                                               Number(1))])),
+    ]), [Number(3)])
+    with pytest.raises(KeyError):
+        compile_program(program)(Scope())
+
+
+@pytest.mark.parametrize('arg', [
+    Print(Number(1)),
+    Read('x'),
+    BinaryOperation(Reference('n'), '-', Number(1)),
+])
+def test_missing_function_before_arguments(arg, capsys, monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('5\n'))
+    for run in (lambda node, scope: node.evaluate(scope),
+                lambda node, scope: compile_program(node)(scope)):
+        scope = Scope()
+        scope['n'] = Number(3)
+        with pytest.raises(KeyError, match='zoo'):
+            run(FunctionCall(Reference('zoo'), [arg]), scope)
+        assert capsys.readouterr().out == ''
+        assert 'x' not in dict(scope.items())
+
+
+def test_missing_name():
+    with pytest.raises(KeyError):
+        compile_program(Reference('zoo'))(Scope())
+
+
+if __name__ == "__main__":
+    pytest.main()
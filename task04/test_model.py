@@ -1,10 +1,265 @@
 #!/usr/bin/env python3
+import io
+import copy as copy_module
+import pickle
+import sys
 import pytest
-import model
+from model import *
 
 
-def test_nothing():
-    assert 2 * 2 == 4
+def factorial_definition():
+    return FunctionDefinition('fac', Function(['n'], [
+        Conditional(
+            BinaryOperation(Reference('n'), '==', Number(0)),
+            [Number(1)],
+            [
+                BinaryOperation(
+                    Reference('n'),
+                    '*',
+                    FunctionCall(Reference('fac'), [
+                        BinaryOperation(Reference('n'), '-', Number(1))
+                    ])
+                )
+            ]
+        )
+    ]))
+
+
+def test_scope_current():
+    scope = Scope()
+    scope['foo'] = Number(1)
+    assert scope['foo'] == Number(1)
+
+
+def test_scope_grandparent():
+    grandparent = Scope()
+    grandparent['foo'] = Number(1)
+    scope = Scope(Scope(grandparent))
+    assert scope['foo'] == Number(1)
+
+
+def test_scope_shadowing():
+    parent = Scope()
+    parent['bar'] = Number(1)
+    scope = Scope(parent)
+    scope['bar'] = Number(2)
+    assert scope['bar'] == Number(2)
+    assert parent['bar'] == Number(1)
+
+
+def test_scope_missing():
+    scope = Scope(Scope())
+    with pytest.raises(KeyError):
+        scope['zoo']
+
+
+def test_scope_deep_chain():
+    root = Scope()
+    root['foo'] = Number(1)
+    scope = root
+    for _ in range(10000):
+        scope = Scope(scope)
+    assert scope['foo'] == Number(1)
+    assert scope['foo'] == Number(1)
+
+
+def test_scope_new_binding_in_ancestor_after_lookup():
+    root = Scope()
+    root['x'] = Number(1)
+    middle = Scope(root)
+    scope = Scope(middle)
+    assert scope['x'] == Number(1)
+    middle['x'] = Number(2)
+    assert scope['x'] == Number(2)
+    assert root['x'] == Number(1)
+
+
+def test_scope_missing_then_defined():
+    root = Scope()
+    scope = Scope(Scope(root))
+    with pytest.raises(KeyError):
+        scope['foo']
+    root['foo'] = Number(1)
+    assert scope['foo'] == Number(1)
+
+
+def test_scope_items():
+    parent = Scope()
+    parent['foo'] = Number(1)
+    scope = Scope(parent)
+    scope['bar'] = Number(2)
+    assert scope.items() == [('bar', Number(2))]
+
+
+def test_name_slots_are_precomputed():
+    slot = Reference('slot_name').slot
+    assert Read('slot_name').slot == slot
+    assert FunctionDefinition('slot_name', Function([], [])).slot == slot
+    assert Function(['a', 'slot_name'], []).arg_slots[1] == slot
+    assert SLOTS.names[slot] == 'slot_name'
+
+
+def test_scope_sized_by_own_names():
+    for index in range(100):
+        Reference('unused_name_{}'.format(index))
+    scope = Scope()
+    assert scope.values == []
+    scope['frame_name'] = Number(1)
+    assert len(scope.values) == SLOTS.slots['frame_name'] + 1
+    assert len(Scope(scope).values) == 0
+
+
+def test_function_definition():
+    scope = Scope()
+    function = Function([], [])
+    assert FunctionDefinition('foo', function).evaluate(scope) is function
+    assert scope['foo'] is function
+
+
+def test_conditional():
+    scope = Scope()
+    assert Conditional(Number(1), [Number(2)], [Number(3)]).evaluate(
+        scope) == Number(2)
+    assert Conditional(Number(0), [Number(2)], [Number(3)]).evaluate(
+        scope) == Number(3)
+
+
+def test_conditional_empty():
+    Conditional(Number(0), [Number(2)]).evaluate(Scope())
+    Conditional(Number(1), [], None).evaluate(Scope())
+
+
+def test_print(capsys):
+    assert Print(Number(42)).evaluate(Scope()) == Number(42)
+    assert capsys.readouterr().out == '42\n'
+
+
+def test_read(monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('-7\n'))
+    scope = Scope()
+    assert Read('x').evaluate(scope) == Number(-7)
+    assert scope['x'] == Number(-7)
+
+
+def test_function_call(capsys):
+    scope = Scope()
+    FunctionDefinition('foo', Function(['a', 'b'], [
+        Print(BinaryOperation(Reference('a'), '+', Reference('b'))),
+    ])).evaluate(scope)
+    FunctionCall(Reference('foo'), [
+        Number(1),
+        BinaryOperation(Number(2), '+', Number(3))
+    ]).evaluate(scope)
+    assert capsys.readouterr().out == '6\n'
+
+
+def test_reference():
+    scope = Scope()
+    scope['x'] = Number(5)
+    assert Reference('x').evaluate(scope) == Number(5)
+
+
+@pytest.mark.parametrize('op,expected', [
+    ('+', 9), ('-', 5), ('*', 14), ('/', 3), ('%', 1),
+    ('==', 0), ('!=', 1), ('<', 0), ('>', 1), ('<=', 0), ('>=', 1),
+    ('&&', 1), ('||', 1),
+])
+def test_binary_operation(op, expected):
+    operation = BinaryOperation(Number(7), op, Number(2))
+    assert operation.evaluate(Scope()) == Number(expected)
+
+
+def test_unary_operation():
+    assert UnaryOperation('-', Number(3)).evaluate(Scope()) == Number(-3)
+    assert UnaryOperation('!', Number(3)).evaluate(Scope()) == Number(0)
+    assert UnaryOperation('!', Number(0)).evaluate(Scope()) == Number(1)
+
+
+def test_factorial(capsys, monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('5\n'))
+    scope = Scope()
+    factorial_definition().evaluate(scope)
+    Read('n').evaluate(scope)
+    Print(FunctionCall(Reference('fac'), [Reference('n')])).evaluate(scope)
+    assert capsys.readouterr().out == '120\n'
+
+
+def test_nodes_are_immutable():
+    node = BinaryOperation(Reference('x'), '+', Number(1))
+    with pytest.raises(AttributeError):
+        node.op = '-'
+    with pytest.raises(AttributeError):
+        del node.lhs
+    with pytest.raises(AttributeError):
+        node.extra = 1
+    assert not hasattr(Number(1), '__dict__')
+
+
+def test_pickle_and_copy():
+    node = Conditional(Reference('x'), [Number(1)], None)
+    for copy in (pickle.loads(pickle.dumps(node)), copy_module.deepcopy(node)):
+        assert type(copy) is Conditional
+        assert copy.condition.name == 'x'
+        assert copy.if_true == [Number(1)]
+        assert copy.if_false is None
+
+
+def test_factory_shares_nodes():
+    factory = NodeFactory()
+    n = factory.make(Reference, 'n')
+    assert factory.make(Reference, 'n') is n
+    assert factory.make(Number, 0) is factory.make(Number, 0)
+    lhs = factory.make(BinaryOperation, n, '-', factory.make(Number, 1))
+    rhs = factory.make(BinaryOperation, n, '-', factory.make(Number, 1))
+    assert lhs is rhs
+    assert factory.make(BinaryOperation, n, '+', factory.make(Number, 1)) \
+        is not lhs
+    assert len(factory) == 5
+
+
+def test_factory_stores_tuples():
+    factory = NodeFactory()
+    body = [factory.make(Reference, 'x')]
+    function = factory.make(Function, ['x'], body)
+    assert function.args == ('x',)
+    assert function.body == tuple(body)
+    assert factory.make(Function, ['y'], body).body is function.body
+    assert factory.make(Function, ('x',), tuple(body)) is function
+    assert factory.make(Function, ['y'], body) is not function
+
+
+def test_factory_keeps_field_types():
+    factory = NodeFactory()
+    assert factory.make(Number, True) is not factory.make(Number, 1)
+    assert type(factory.make(Number, 1).value) is int
+    assert factory.make(Reference, 'x') is factory.make(Reference, 'x')
+
+
+def test_factory_intern_deep_tree():
+    factory = NodeFactory()
+    depth = sys.getrecursionlimit() * 2
+    node = Number(1)
+    for _ in range(depth):
+        node = UnaryOperation('-', node)
+    copy = factory.intern(node)
+    assert len(factory) == depth + 1
+    assert factory.intern(node) is copy
+
+
+def test_factory_intern():
+    factory = NodeFactory()
+    definition = factory.intern(FunctionDefinition('f', Function(['n'], [
+        BinaryOperation(Reference('n'), '*', Reference('n')),
+        Conditional(Reference('n'), [Number(0)], [Number(0)]),
+    ])))
+    square, conditional = definition.function.body
+    assert square.lhs is square.rhs
+    assert conditional.if_true is conditional.if_false
+    assert factory.intern(Reference('n')) is square.lhs
+    scope = Scope()
+    definition.evaluate(scope)
+    result = FunctionCall(Reference('f'), [Number(3)]).evaluate(scope)
+    assert result == Number(0)
 
 
 if __name__ == "__main__":
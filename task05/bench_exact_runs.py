@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Точное распределение самой длинной серии орлов (exact_runs) против
+оценки сэмплированием (heads_runs.estimate) при разном числе бросков n.
+
+Для каждого n печатается время точного расчёта, время сэмплирования,
+оба средних и отклонение оценки в стандартных ошибках: при верной
+симуляции оно почти всегда меньше 4. В конце - один проход, дающий
+E[L] сразу для всех n <= 10^5.
+
+Запуск: ./bench_exact_runs.py [испытаний для сэмплирования]
+"""
+import math
+import sys
+import time
+import exact_runs
+import heads_runs
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    iters = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 4
+    print('{:>7} {:>9} {:>9} {:>10} {:>10} {:>7}'.format(
+        'flips', 'exact s', 'sample s', 'exact', 'sampled', 'z'))
+    for flips in (10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5):
+        distribution, exact_time = timed(
+            lambda: exact_runs.distributions([flips])[flips])
+        mean, variance = exact_runs.moments(distribution)
+        (_, sampled), sample_time = timed(
+            heads_runs.estimate, iters, flips, 0.5, 1)
+        z = (sampled - mean) / math.sqrt(variance / iters)
+        print('{:>7} {:>9.3f} {:>9.3f} {:>10.5f} {:>10.5f} {:>7.2f}'.format(
+            flips, exact_time, sample_time, mean, sampled, z))
+        assert abs(z) < 4
+    means, elapsed = timed(exact_runs.expected_runs, 10 ** 5)
+    print('E[L] for all n <= 10^5 in one pass: {:.3f} s'.format(elapsed))
+
+
+if __name__ == '__main__':
+    main()
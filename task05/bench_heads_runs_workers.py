@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Масштабирование heads_runs.sample_stats с числом процессов и досрочная
+остановка по ширине доверительного интервала. Итоги при каждом числе
+процессов сверяются с workers = 1: они должны совпадать побитно.
+
+Запуск: ./bench_heads_runs_workers.py [испытаний]
+"""
+import os
+import sys
+import time
+import heads_runs
+from largest_heads_run_solution import FLIPS
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    iters = int(sys.argv[1]) if len(sys.argv) > 1 else 4 * 10 ** 6
+    print('cpus: {}'.format(os.cpu_count()))
+    print('{:>8} {:>10} {:>9} {:>8} {:>9} {:>9}'.format(
+        'workers', 'trials', 'seconds', 'speedup', 'mean', '+-'))
+    expected = None
+    base = None
+    for workers in (1, 2, 4, 8):
+        stats, elapsed = timed(heads_runs.sample_stats, iters, FLIPS,
+                               seed=1, workers=workers)
+        result = (stats.count, stats.total, stats.squares)
+        if expected is None:
+            expected, base = result, elapsed
+        assert result == expected
+        print('{:>8} {:>10} {:>9.3f} {:>8.2f} {:>9.5f} {:>9.5f}'.format(
+            workers, stats.count, elapsed, base / elapsed, stats.mean,
+            stats.half_width()))
+    print('{:>10} {:>10} {:>9} {:>9} {:>9}'.format(
+        'precision', 'trials', 'seconds', 'mean', '+-'))
+    for precision in (0.01, 0.003, 0.001):
+        stats, elapsed = timed(heads_runs.sample_stats, iters, FLIPS,
+                               seed=1, precision=precision)
+        print('{:>10} {:>10} {:>9.3f} {:>9.5f} {:>9.5f}'.format(
+            precision, stats.count, elapsed, stats.mean,
+            stats.half_width()))
+
+
+if __name__ == '__main__':
+    main()
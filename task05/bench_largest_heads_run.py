@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Скорость оценки средней длины самой длинной серии орлов: прежний
+main() (random.choice в генераторе для get_max_run) против
+heads_runs.estimate на NumPy при FLIPS = 100 бросках и разном числе
+испытаний, а также зависимость от размера блока.
+
+Запуск: ./bench_largest_heads_run.py [испытаний для NumPy]
+"""
+import sys
+import time
+import heads_runs
+from largest_heads_run_solution import simulate, FLIPS
+
+
+def report(engine, iters, function):
+    start = time.perf_counter()
+    s = function()
+    elapsed = time.perf_counter() - start
+    print('{:<22} {:>10} {:>9.3f} {:>12.0f} {:>8.4f}'.format(
+        engine, iters, elapsed, iters / elapsed, s / iters))
+
+
+def main():
+    iters = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 7
+    print('{:<22} {:>10} {:>9} {:>12} {:>8}'.format(
+        'engine', 'trials', 'seconds', 'trials/s', 'mean'))
+    for count in (10 ** 3, 10 ** 4):
+        report('python', count, lambda: simulate(count, FLIPS)[0])
+    for count in (10 ** 3, 10 ** 5, iters):
+        report('numpy', count,
+               lambda: heads_runs.estimate(count, FLIPS, seed=1)[0])
+    for block_cells in (1 << 16, 1 << 20, 1 << 24):
+        report('numpy, block 2^{}'.format(block_cells.bit_length() - 1),
+               10 ** 6, lambda: heads_runs.estimate(
+                   10 ** 6, FLIPS, seed=1, block_cells=block_cells)[0])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Точное распределение длины L самой длинной серии орлов в n бросках
+монеты, на которой орёл выпадает с вероятностью p.
+
+Пусть q_k(n) - вероятность того, что в n бросках нет серии из k орлов.
+Тогда q_k(n) = 1 при n < k, q_k(k) = 1 - p^k, а при n > k серия длины k
+впервые заканчивается на броске n, только если перед ней решка, а перед
+решкой серии не было:
+
+    q_k(n) = q_k(n - 1) - (1 - p) * p^k * q_k(n - k - 1).
+
+P(L >= k) = 1 - q_k(n). Считаются все k от 1 до K, где K выбран так, что
+P(L >= K) <= n * p^K не больше tol: более длинные серии не различаются,
+их общая вероятность лежит в P(L >= K). Значения для каждого n зависят
+только от K + 1 предыдущих, поэтому один проход по n = 0, 1, ..., N
+с окном из K + 2 столбцов даёт распределения сразу для всех n <= N за
+O(N * K) операций и O(K^2) памяти.
+"""
+import math
+import numpy as np
+
+TOL = 1e-17
+
+
+def max_run_length(max_flips, p, tol=TOL):
+    """
+    Наибольшее K, которое стоит различать при max_flips бросках.
+
+    >>> max_run_length(100, 0.5), max_run_length(10, 1.0)
+    (64, 10)
+    """
+    if p <= 0 or max_flips <= 0:
+        return 0
+    if p >= 1:
+        return max_flips
+    bound = math.log(max_flips / tol) / math.log(1 / p)
+    return min(max_flips, math.ceil(bound))
+
+
+def survival(max_flips, p=0.5, tol=TOL):
+    """
+    Выдаёт для n = 0, 1, ..., max_flips массив P(L >= k) для k = 1..K.
+    Массив переиспользуется на следующем шаге: его нужно скопировать,
+    если он нужен дольше.
+    """
+    length = max_run_length(max_flips, p, tol)
+    ks = np.arange(1, length + 1)
+    columns = np.arange(length)
+    powers = p ** ks.astype(float)
+    coefficients = (1 - p) * powers
+    width = length + 2
+    window = np.ones((width, length))
+    result = np.empty(length)
+    yield 0, np.zeros(length)
+    for n in range(1, max_flips + 1):
+        previous = window[(n - 1) % width]
+        lagged = window[(n - ks - 1) % width, columns]
+        step = np.where(ks < n, coefficients * lagged,
+                        np.where(ks == n, powers, 0.0))
+        current = window[n % width]
+        np.subtract(previous, step, out=current)
+        np.subtract(1.0, current, out=result)
+        yield n, result
+
+
+def distributions(flips, p=0.5, tol=TOL):
+    """
+    Словарь n -> массив P(L = k) для k = 0..K (последний элемент -
+    P(L >= K)) для всех n из flips, за один проход до max(flips).
+
+    >>> distributions([0, 1, 3])[3][:4]
+    array([0.125, 0.5  , 0.25 , 0.125])
+    """
+    wanted = set(flips)
+    result = {}
+    for n, tail in survival(max(wanted, default=0), p, tol):
+        if n in wanted:
+            at_least = np.concatenate(([1.0], tail))
+            result[n] = at_least - np.append(at_least[1:], 0.0)
+    return result
+
+
+def expected_runs(max_flips, p=0.5, tol=TOL):
+    """
+    Массив E[L] для n = 0..max_flips: E[L] = сумма P(L >= k) по k >= 1.
+
+    >>> expected_runs(3).tolist()
+    [0.0, 0.5, 1.0, 1.375]
+    """
+    means = np.empty(max_flips + 1)
+    for n, tail in survival(max_flips, p, tol):
+        means[n] = tail.sum()
+    return means
+
+
+def moments(distribution):
+    """
+    Среднее и дисперсия L по распределению из distributions().
+
+    >>> moments(np.array([0.125, 0.5, 0.25, 0.125]))
+    (1.375, 0.734375)
+    """
+    ks = np.arange(len(distribution))
+    mean = float(ks @ distribution)
+    return mean, float((ks - mean) ** 2 @ distribution)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Векторизованная оценка длины самой длинной серии орлов на NumPy.
+
+Броски генерируются сразу матрицей (испытания x броски) и обрабатываются
+без циклов Python. Чтобы память не зависела от числа испытаний, они
+делятся на блоки примерно по block_cells ячеек. Блок i использует свой
+поток случайных чисел из SeedSequence(seed, spawn_key=(i,)), поэтому
+результат при заданном seed зависит только от iters, flips, p и
+block_cells, но не от того, в каком порядке и где считаются блоки.
+
+Поэтому блоки можно раздать нескольким процессам (sample_stats): по
+каждому блоку возвращаются целые число испытаний, сумма и сумма
+квадратов длин, а сложение целых точно и не зависит от порядка, так что
+при одном seed среднее и дисперсия совпадают побитно при любом числе
+процессов. Досрочная остановка по ширине доверительного интервала
+проверяется после каждого блока в порядке номеров, и её результат тоже
+не зависит от числа процессов.
+"""
+import collections
+import concurrent.futures
+import math
+import numpy as np
+
+# 2^20 ячеек - быстрее всего по bench_largest_heads_run.py: счётчики блока
+# ещё помещаются в кэш процессора.
+BLOCK_CELLS = 1 << 20
+
+
+def longest_runs(bits):
+    """
+    Длина самой длинной серии единиц в каждой строке матрицы bits.
+
+    Накопленная сумма c[j] - число единиц в bits[:j + 1]; вычитая из неё
+    значение c в последнем нуле не правее j (np.maximum.accumulate по
+    c * ~bits), получаем длину текущей серии, а максимум по строке - длину
+    самой длинной. Счётчики берутся самого узкого подходящего типа:
+    проходы по памяти - основная часть работы. Умножение на ~bits вместо
+    np.where(bits, 0, c) быстрее раз в десять.
+
+    >>> longest_runs(np.array([[1, 1, 0, 1], [0, 0, 0, 0], [1, 0, 1, 1]]))
+    array([2, 0, 2])
+    """
+    bits = np.asarray(bits, dtype=bool)
+    flips = bits.shape[1]
+    if flips == 0:
+        return np.zeros(bits.shape[0], dtype=np.int64)
+    dtype = (np.uint8 if flips < 1 << 8 else
+             np.uint16 if flips < 1 << 16 else np.uint32)
+    counts = np.cumsum(bits.view(np.uint8), axis=1, dtype=dtype)
+    at_zeros = counts * ~bits
+    np.maximum.accumulate(at_zeros, axis=1, out=at_zeros)
+    counts -= at_zeros
+    return counts.max(axis=1).astype(np.int64)
+
+
+def random_flips(rng, trials, flips, p=0.5):
+    """
+    Матрица бросков: True - орёл с вероятностью p. При p = 1/2 каждый
+    случайный байт даёт восемь бросков.
+    """
+    if p == 0.5:
+        packed = rng.integers(0, 256, size=(trials, (flips + 7) // 8),
+                              dtype=np.uint8)
+        return np.unpackbits(packed, axis=1, count=flips).view(bool)
+    return rng.random((trials, flips)) < p
+
+
+def block_trials(iters, flips, block_cells=BLOCK_CELLS):
+    """
+    Размеры блоков испытаний.
+
+    >>> list(block_trials(10, 4, block_cells=16))
+    [4, 4, 2]
+    """
+    size = max(1, block_cells // max(1, flips))
+    for start in range(0, iters, size):
+        yield min(size, iters - start)
+
+
+def block_rng(seed, index):
+    """Независимый поток случайных чисел для блока index."""
+    return np.random.default_rng(
+        np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+def sample_block(seed, index, trials, flips, p=0.5):
+    """Самые длинные серии в trials испытаниях блока index."""
+    return longest_runs(random_flips(block_rng(seed, index), trials,
+                                     flips, p))
+
+
+def sample_longest_runs(iters, flips, p=0.5, seed=None,
+                        block_cells=BLOCK_CELLS):
+    """
+    Выдаёт по блокам массивы самых длинных серий для iters испытаний по
+    flips бросков. Без seed используется случайная энтропия ОС.
+    """
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    for index, trials in enumerate(block_trials(iters, flips, block_cells)):
+        yield sample_block(seed, index, trials, flips, p)
+
+
+def estimate(iters, flips, p=0.5, seed=None, block_cells=BLOCK_CELLS):
+    """
+    Сумма самых длинных серий по всем испытаниям и её среднее.
+
+    >>> total, mean = estimate(1000, 100, seed=1)
+    >>> estimate(1000, 100, seed=1) == (total, mean)
+    True
+    >>> 5 < mean < 7
+    True
+    """
+    total = 0
+    for runs in sample_longest_runs(iters, flips, p, seed, block_cells):
+        total += int(runs.sum())
+    return total, total / iters if iters else 0.0
+
+
+class RunningStats:
+    """
+    Накопленные число испытаний, сумма и сумма квадратов длин серий.
+
+    >>> stats = RunningStats()
+    >>> stats.add(2, 5, 13)
+    >>> stats.add(RunningStats(1, 4, 16))
+    >>> stats.count, stats.mean, stats.variance
+    (3, 3.0, 1.0)
+    """
+
+    def __init__(self, count=0, total=0, squares=0):
+        self.count = count
+        self.total = total
+        self.squares = squares
+
+    def add(self, count, total=0, squares=0):
+        """Добавляет итоги блока: три числа или другой RunningStats."""
+        if isinstance(count, RunningStats):
+            count, total, squares = count.count, count.total, count.squares
+        self.count += count
+        self.total += total
+        self.squares += squares
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def variance(self):
+        """Несмещённая выборочная дисперсия."""
+        if self.count < 2:
+            return math.inf
+        deviations = self.squares * self.count - self.total ** 2
+        return deviations / (self.count * (self.count - 1))
+
+    def half_width(self, confidence=0.95):
+        """Полуширина нормального доверительного интервала для среднего."""
+        if not self.count:
+            return math.inf
+        z = normal_quantile((1 + confidence) / 2)
+        return z * math.sqrt(self.variance / self.count)
+
+
+def normal_quantile(q):
+    """
+    Квантиль стандартного нормального распределения уровня q из (0, 1):
+    обращение math.erfc бисекцией до точности double (statistics.NormalDist
+    есть только с Python 3.8).
+
+    >>> round(normal_quantile(0.975), 6), round(normal_quantile(0.025), 6)
+    (1.959964, -1.959964)
+    >>> round(normal_quantile(0.005), 6)
+    -2.575829
+    """
+    if not 0 < q < 1:
+        raise ValueError('q must be in (0, 1)')
+    if q > 0.5:
+        return -normal_quantile(1 - q)
+    # В левом хвосте erfc, в отличие от 1 + erf, не теряет точности.
+    low, high = -40.0, 0.0
+    while True:
+        middle = (low + high) / 2
+        if middle in (low, high):
+            return middle
+        if math.erfc(-middle / math.sqrt(2)) / 2 < q:
+            low = middle
+        else:
+            high = middle
+
+
+def block_stats(seed, index, trials, flips, p=0.5):
+    """Итоги блока index: число испытаний, сумма и сумма квадратов."""
+    runs = sample_block(seed, index, trials, flips, p)
+    return trials, int(runs.sum()), int(runs @ runs)
+
+
+def map_blocks(iters, flips, p, seed, block_cells, workers):
+    """
+    Выдаёт итоги блоков в порядке номеров. При workers > 1 блоки
+    считаются в пуле процессов, и в работе не больше 2 * workers
+    блоков сразу; если потребитель прекращает перебор, оставшиеся
+    отменяются.
+    """
+    blocks = enumerate(block_trials(iters, flips, block_cells))
+    if workers <= 1:
+        for index, trials in blocks:
+            yield block_stats(seed, index, trials, flips, p)
+        return
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        pending = collections.deque()
+        try:
+            for index, trials in blocks:
+                pending.append(executor.submit(
+                    block_stats, seed, index, trials, flips, p))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def sample_stats(iters, flips, p=0.5, seed=None, block_cells=BLOCK_CELLS,
+                 workers=1, precision=None, confidence=0.95):
+    """
+    Итоги не более чем iters испытаний, посчитанные workers процессами.
+    С precision останавливается после первого блока, на котором
+    полуширина доверительного интервала не больше precision.
+
+    >>> stats = sample_stats(1000, 100, seed=1, block_cells=10000)
+    >>> stats.total == estimate(1000, 100, seed=1, block_cells=10000)[0]
+    True
+    >>> sample_stats(10 ** 6, 100, seed=1, block_cells=10000,
+    ...              precision=0.1).count
+    1400
+    """
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    stats = RunningStats()
+    blocks = map_blocks(iters, flips, p, seed, block_cells, workers)
+    for block in blocks:
+        stats.add(*block)
+        if precision is not None and \
+                stats.half_width(confidence) <= precision:
+            blocks.close()
+            break
+    return stats
@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
+import argparse
 import random
+import exact_runs
+import heads_runs
 
 
 def get_max_run(flips):
@@ -16,15 +19,53 @@ def get_max_run(flips):
 
 ITERS = 1000
 FLIPS = 100
+SEED = 123456
 
 
-def main():
-    random.seed(123456)
+def simulate(iters=ITERS, flips=FLIPS, seed=SEED):
+    random.seed(seed)
     s = 0
     total = 0
-    for _ in range(ITERS):
-        s += get_max_run(random.choice([0, 1]) for _ in range(FLIPS))
+    for _ in range(iters):
+        s += get_max_run(random.choice([0, 1]) for _ in range(flips))
         total += 1
+    return s, total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Estimate the mean longest run of heads.')
+    parser.add_argument('--engine', choices=['python', 'numpy', 'exact'])
+    parser.add_argument('--iters', type=int, default=ITERS)
+    parser.add_argument('--flips', type=int, default=FLIPS)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--workers', type=int,
+                        help='split the iterations across N processes '
+                             '(NumPy engine)')
+    parser.add_argument('--precision', type=float,
+                        help='stop early once the 95%% confidence interval '
+                             'half-width is at most this (NumPy engine)')
+    args = parser.parse_args()
+    parallel = args.workers is not None or args.precision is not None
+    if args.engine is None:
+        args.engine = 'numpy' if parallel else 'python'
+    if parallel:
+        if args.engine != 'numpy':
+            parser.error('--workers and --precision need --engine numpy')
+        stats = heads_runs.sample_stats(
+            args.iters, args.flips, seed=args.seed,
+            workers=args.workers or 1, precision=args.precision)
+        print(stats.total, stats.count, stats.mean,
+              '+-', stats.half_width())
+        return
+    if args.engine == 'exact':
+        print(exact_runs.expected_runs(args.flips)[args.flips])
+        return
+    if args.engine == 'numpy':
+        s, _ = heads_runs.estimate(args.iters, args.flips, seed=args.seed)
+        total = args.iters
+    else:
+        s, total = simulate(args.iters, args.flips, args.seed)
     print(s, total, s / total)
 
 
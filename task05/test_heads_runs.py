@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import math
+import numpy as np
+import pytest
+from exact_runs import expected_runs
+from heads_runs import RunningStats, normal_quantile, sample_stats
+
+# Точное среднее самой длинной серии орлов в 100 бросках.
+EXACT_MEAN = 5.991780255696744
+
+
+def test_exact_mean():
+    assert math.isclose(expected_runs(100)[100], EXACT_MEAN, rel_tol=1e-12)
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_interval_contains_exact_mean(seed):
+    stats = sample_stats(10 ** 5, 100, seed=seed, block_cells=10 ** 6)
+    assert stats.count == 10 ** 5
+    assert abs(stats.mean - EXACT_MEAN) <= stats.half_width(0.999)
+    assert stats.half_width(0.999) < 0.02
+
+
+def test_precision_stops_early():
+    stats = sample_stats(10 ** 6, 100, seed=1, block_cells=10 ** 5,
+                         precision=0.02)
+    assert stats.count < 10 ** 6
+    assert stats.half_width() <= 0.02
+    assert abs(stats.mean - EXACT_MEAN) <= stats.half_width(0.999)
+
+
+def test_workers_do_not_change_result():
+    first = sample_stats(10 ** 4, 100, seed=1, block_cells=10 ** 5)
+    second = sample_stats(10 ** 4, 100, seed=1, block_cells=10 ** 5,
+                          workers=2)
+    assert (first.count, first.total, first.squares) == \
+        (second.count, second.total, second.squares)
+
+
+def test_running_stats():
+    values = np.array([3, 1, 4, 1, 5, 9, 2, 6])
+    stats = RunningStats()
+    for part in (values[:3], values[3:]):
+        stats.add(RunningStats(len(part), int(part.sum()),
+                               int(part @ part)))
+    assert stats.count == len(values)
+    assert stats.mean == values.mean()
+    assert math.isclose(stats.variance, values.var(ddof=1))
+    assert math.isclose(stats.half_width(0.95),
+                        1.959963984540054 * values.std(ddof=1) /
+                        math.sqrt(len(values)))
+
+
+def test_running_stats_too_few():
+    assert RunningStats().mean == 0.0
+    assert RunningStats().half_width() == math.inf
+    assert RunningStats(1, 5, 25).variance == math.inf
+
+
+@pytest.mark.parametrize('q', [1e-300, 1e-10, 0.001, 0.2, 0.5, 0.7,
+                               0.975, 1 - 1e-10])
+def test_normal_quantile(q):
+    # Вероятность хвоста считается по erfc с той стороны, где она мала
+    # и не теряет точности.
+    z = normal_quantile(q)
+    tail = min(q, 1 - q)
+    assert math.isclose(math.erfc(abs(z) / math.sqrt(2)) / 2, tail,
+                        rel_tol=1e-9)
+    assert (z <= 0) == (q <= 0.5)
+
+
+@pytest.mark.parametrize('q', [0, 1, -0.5, 2])
+def test_normal_quantile_domain(q):
+    with pytest.raises(ValueError):
+        normal_quantile(q)
+
+
+if __name__ == "__main__":
+    pytest.main()
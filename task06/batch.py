@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Пакетное выполнение многих независимых программ на ЯТЬ.
+
+run_batch получает пары (программа, входные данные) и раздаёт их
+процессам из concurrent.futures.ProcessPoolExecutor. Программа - список
+команд (или одна команда), входные данные - строка, из которой читают
+её Read. Всё, что программа выводит через Print, собирается в отдельный
+буфер, и результаты возвращаются в порядке заданий.
+
+Потоки ввода и вывода задания передаются через его Scope, а sys.stdin
+и sys.stdout не меняются, поэтому задания можно выполнять и в потоках
+одного процесса. Вычисление идёт через StackEvaluator, так что глубокая
+рекурсия не роняет процесс пула.
+"""
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import io
+import signal
+import threading
+from model import *
+from evaluator import evaluate
+
+JobResult = collections.namedtuple('JobResult', ['output', 'error'])
+JobResult.__doc__ = """
+Результат одного задания: output - всё, что успела вывести программа,
+error - None, 'timeout' или описание исключения.
+"""
+
+
+def run_batch(jobs, workers=None, timeout=None, chunksize=1):
+    """
+    Выполняет задания (программа, входные данные) в пуле из workers
+    процессов (по умолчанию - по числу процессоров) и возвращает список
+    JobResult в том же порядке. timeout - ограничение времени одного
+    задания в секундах; его соблюдает сам процесс пула через SIGALRM,
+    поэтому зависшая программа не задерживает остальные.
+    """
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(functools.partial(run_job, timeout=timeout),
+                                 jobs, chunksize=chunksize))
+
+
+def run_job(job, timeout=None):
+    """Выполняет одно задание в текущем процессе."""
+    program, stdin = job
+    if isinstance(program, ASTNode):
+        program = [program]
+    output = io.StringIO()
+    error = None
+    try:
+        with time_limit(timeout):
+            scope = Scope(stdin=io.StringIO(stdin), stdout=output)
+            for statement in program:
+                evaluate(statement, scope)
+    except JobTimeout:
+        error = 'timeout'
+    except Exception as exception:
+        error = '{}: {}'.format(type(exception).__name__, exception)
+    return JobResult(output.getvalue(), error)
+
+
+class JobTimeout(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def time_limit(seconds):
+    """
+    Прерывает блок исключением JobTimeout через seconds секунд.
+    Работает только в главном потоке и там, где есть signal.setitimer;
+    иначе, как и при seconds=None, время не ограничивается.
+    """
+    if (not seconds or not hasattr(signal, 'setitimer') or
+            threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def interrupt(signum, frame):
+        raise JobTimeout()
+
+    old_handler = signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, old_handler)
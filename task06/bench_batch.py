@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Масштабирование run_batch по числу процессов: одинаковый набор заданий
+(рекурсивная сумма 1..n с разными n на входе) выполняется подряд в
+одном процессе и в пулах разного размера.
+
+Запуск: ./bench_batch.py [количество заданий]
+"""
+import os
+import sys
+import time
+from model import *
+from batch import run_batch, run_job
+
+
+def sum_program():
+    n = Reference('n')
+    return [
+        FunctionDefinition('sum', Function(['n'], [
+            Conditional(BinaryOperation(n, '==', Number(0)), [Number(0)], [
+                BinaryOperation(n, '+', FunctionCall(Reference('sum'), [
+                    BinaryOperation(n, '-', Number(1))]))
+            ])
+        ])),
+        Read('n'),
+        Print(FunctionCall(Reference('sum'), [n])),
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    program = sum_program()
+    jobs = [(program, '{}\n'.format(1000 + index % 100))
+            for index in range(count)]
+    start = time.perf_counter()
+    expected = [run_job(job) for job in jobs]
+    sequential = time.perf_counter() - start
+    print('cpus: {}, jobs: {}'.format(os.cpu_count(), count))
+    print('{:<12} {:>9} {:>9}'.format('workers', 'seconds', 'speedup'))
+    print('{:<12} {:>9.3f} {:>9}'.format('in-process', sequential, '1.00'))
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        results = run_batch(jobs, workers=workers, chunksize=8)
+        elapsed = time.perf_counter() - start
+        assert results == expected
+        print('{:<12} {:>9.3f} {:>9.2f}'.format(
+            workers, elapsed, sequential / elapsed))
+
+
+if __name__ == '__main__':
+    main()
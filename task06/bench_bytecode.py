@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Запуск и скорость байт-кода в сравнении с деревом и evaluate.
+
+Запуск: холодный старт строит дерево большой программы (много функций
+с арифметическими телами), горячий - отображает в память готовый файл
+из BytecodeCache. Скорость: рекурсивные числа Фибоначчи через
+ASTNode.evaluate, через VM с кодом в списках и через VM поверх mmap.
+
+Запуск: ./bench_bytecode.py [количество функций]
+"""
+import contextlib
+import io
+import random
+import sys
+import tempfile
+import time
+from model import *
+from bytecode import BytecodeCache, compile_bytecode
+
+
+def big_program(functions, seed=1):
+    rng = random.Random(seed)
+
+    def expression(depth):
+        if depth == 0 or rng.random() < 0.2:
+            if rng.random() < 0.5:
+                return Number(rng.randint(0, 9))
+            return Reference(rng.choice('ab'))
+        return BinaryOperation(expression(depth - 1), rng.choice('+-*'),
+                               expression(depth - 1))
+
+    return [FunctionDefinition('f{}'.format(index), Function(
+        ['a', 'b'], [expression(6) for _ in range(3)]))
+        for index in range(functions)]
+
+
+def fib_program(n):
+    return [
+        FunctionDefinition('fib', Function(['n'], [
+            Conditional(
+                BinaryOperation(Reference('n'), '<', Number(2)),
+                [Reference('n')],
+                [
+                    BinaryOperation(
+                        FunctionCall(Reference('fib'), [
+                            BinaryOperation(Reference('n'), '-', Number(1))
+                        ]),
+                        '+',
+                        FunctionCall(Reference('fib'), [
+                            BinaryOperation(Reference('n'), '-', Number(2))
+                        ])
+                    )
+                ]
+            )
+        ])),
+        Print(FunctionCall(Reference('fib'), [Number(n)])),
+    ]
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def evaluate_all(program):
+    scope = Scope()
+    for statement in program:
+        statement.evaluate(scope)
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as directory:
+        cache = BytecodeCache(directory)
+        source = 'big_program({})'.format(functions)
+        _, build = timed(lambda: big_program(functions))
+        _, cold = timed(lambda: cache.load(
+            source, lambda: big_program(functions)))
+        _, warm = timed(lambda: cache.load(
+            source, lambda: big_program(functions)))
+        print('startup, {} functions:'.format(functions))
+        print('  build tree only         {:8.3f}s'.format(build))
+        print('  cold: tree + bytecode   {:8.3f}s'.format(cold))
+        print('  warm: mmap from cache   {:8.3f}s'.format(warm))
+
+        program = fib_program(22)
+        cache.load('fib', lambda: program)
+        mapped = cache.load('fib', lambda: program)
+        compiled = compile_bytecode(program)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            _, tree = timed(lambda: evaluate_all(program))
+            _, vm = timed(lambda: compiled.run(Scope()))
+            _, vm_mapped = timed(lambda: mapped.run(Scope()))
+        assert len(set(output.getvalue().split())) == 1
+        print('fib(22):')
+        print('  evaluate                {:8.3f}s'.format(tree))
+        print('  VM                      {:8.3f}s  {:5.2f}x'.format(
+            vm, tree / vm))
+        print('  VM over mmap            {:8.3f}s  {:5.2f}x'.format(
+            vm_mapped, tree / vm_mapped))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Глубина рекурсии, время и память StackEvaluator в сравнении с
+рекурсивным ASTNode.evaluate.
+
+Для хвостовой (down) и нехвостовой (sum) рекурсии печатается время
+вычисления и пиковая память tracemalloc в пересчёте на один кадр ЯТЬ.
+Память измеряется на меньшей глубине: tracemalloc сильно замедляет
+выполнение, а размер кадра от глубины не зависит.
+
+Запуск: ./bench_evaluator.py
+"""
+import time
+import tracemalloc
+from model import *
+from evaluator import evaluate
+
+
+def countdown_definition():
+    return FunctionDefinition('down', Function(['n'], [
+        Conditional(Reference('n'), [
+            FunctionCall(Reference('down'), [
+                BinaryOperation(Reference('n'), '-', Number(1))
+            ])
+        ], [Number(0)])
+    ]))
+
+
+def sum_definition():
+    return FunctionDefinition('sum', Function(['n'], [
+        Conditional(Reference('n'), [
+            BinaryOperation(Reference('n'), '+', FunctionCall(
+                Reference('sum'), [
+                    BinaryOperation(Reference('n'), '-', Number(1))
+                ]))
+        ], [Number(0)])
+    ]))
+
+
+def run(evaluator, definition, depth):
+    scope = Scope()
+    definition.evaluate(scope)
+    call = FunctionCall(Reference(definition.name), [Number(depth)])
+    start = time.perf_counter()
+    try:
+        evaluator(call, scope)
+    except RecursionError:
+        return None
+    return time.perf_counter() - start
+
+
+def memory_per_frame(definition, depth):
+    scope = Scope()
+    definition.evaluate(scope)
+    call = FunctionCall(Reference(definition.name), [Number(depth)])
+    tracemalloc.start()
+    evaluate(call, scope)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / depth
+
+
+def main():
+    recursive = (lambda node, scope: node.evaluate(scope))
+    for definition in (countdown_definition(), sum_definition()):
+        print(definition.name)
+        for depth in (10 ** 2, 10 ** 4, 10 ** 6):
+            walk = run(recursive, definition, depth)
+            stack = run(evaluate, definition, depth)
+            print('  depth {:>8}: evaluate {:>16}  stack {:8.3f}s'.format(
+                depth,
+                'RecursionError' if walk is None else
+                '{:.3f}s'.format(walk),
+                stack))
+        print('  memory: {:.0f} bytes per frame'.format(
+            memory_per_frame(definition, 10 ** 5)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Время вычисления наивных чисел Фибоначчи с мемоизацией и без неё.
+
+Запуск: ./bench_memo.py
+"""
+import timeit
+from model import *
+from memo import Memoizer
+
+
+def fib_definition():
+    return FunctionDefinition('fib', Function(['n'], [
+        Conditional(
+            BinaryOperation(Reference('n'), '<', Number(2)),
+            [Reference('n')],
+            [
+                BinaryOperation(
+                    FunctionCall(Reference('fib'), [
+                        BinaryOperation(Reference('n'), '-', Number(1))
+                    ]),
+                    '+',
+                    FunctionCall(Reference('fib'), [
+                        BinaryOperation(Reference('n'), '-', Number(2))
+                    ])
+                )
+            ]
+        )
+    ]))
+
+
+def run(statements):
+    scope = Scope()
+    for statement in statements:
+        result = statement.evaluate(scope)
+    return result
+
+
+def main():
+    print('{:>4} {:>12} {:>12} {:>8} {:>8}'.format(
+        'n', 'plain', 'memoized', 'hits', 'misses'))
+    for n in (10, 15, 20, 25, 100):
+        statements = [
+            fib_definition(),
+            FunctionCall(Reference('fib'), [Number(n)]),
+        ]
+        memoizer = Memoizer(maxsize=128)
+        memoized = memoizer.memoize(statements)
+        fast = timeit.timeit(lambda: run(memoized), number=1)
+        hits, misses = memoizer.hits, memoizer.misses
+        if n <= 25:
+            plain = '{:11.4f}s'.format(
+                timeit.timeit(lambda: run(statements), number=1))
+        else:
+            plain = 'too slow'
+        print('{:>4} {:>12} {:11.4f}s {:>8} {:>8}'.format(
+            n, plain, fast, hits, misses))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Память и скорость построения большой программы на ЯТЬ:
+узлы с __dict__ (как было раньше), узлы со __slots__ и узлы,
+построенные через NodeFactory с хеш-консингом.
+
+Программа - много функций вида f_i(a, b) с телом из случайных
+арифметических выражений над a, b и числами 0..9, как в
+сгенерированных тестовых программах.
+
+Запуск: ./bench_nodes.py [количество функций] [seed]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from model import *
+from folder import ConstantFolder, fold_constants
+
+
+class DictNode:
+    """Узел с __dict__: так хранились поля до __slots__."""
+    def __init__(self, *fields):
+        for name, value in zip(self.fields, fields):
+            setattr(self, name, value)
+
+
+def dict_class(cls):
+    return type('Dict' + cls.__name__, (DictNode,), {'fields': cls.__slots__})
+
+
+DICT_CLASSES = {cls: dict_class(cls) for cls in [
+    Number, Function, FunctionDefinition, BinaryOperation, Reference,
+    UnaryOperation,
+]}
+
+
+def build_program(make, functions, seed):
+    rng = random.Random(seed)
+
+    def expression(depth):
+        if depth == 0 or rng.random() < 0.2:
+            if rng.random() < 0.5:
+                return make(Number, rng.randint(0, 9))
+            return make(Reference, rng.choice('ab'))
+        if rng.random() < 0.1:
+            return make(UnaryOperation, '-', expression(depth - 1))
+        return make(BinaryOperation, expression(depth - 1),
+                    rng.choice('+-*'), expression(depth - 1))
+
+    return [make(FunctionDefinition, 'f{}'.format(index), make(
+        Function, ['a', 'b'], [expression(6) for _ in range(3)]))
+        for index in range(functions)]
+
+
+def count_created(make):
+    counter = [0]
+
+    def counting_make(cls, *fields):
+        counter[0] += 1
+        return make(cls, *fields)
+    return counting_make, counter
+
+
+def measure_memory(make, functions, seed, factory=None):
+    """
+    Возвращает память программы в байтах; для фабрики - вместе с её
+    таблицей и без неё (после того, как фабрика удалена).
+    """
+    gc.collect()
+    tracemalloc.start()
+    program = build_program(make, functions, seed)
+    memory = tracemalloc.get_traced_memory()[0]
+    if factory is not None:
+        factory.nodes.clear()
+        factory.tuples.clear()
+    program_only = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del program
+    return memory, program_only
+
+
+def measure_time(make, functions, seed):
+    gc.collect()
+    start = time.perf_counter()
+    build_program(make, functions, seed)
+    return time.perf_counter() - start
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    counting, created = count_created(lambda cls, *fields: cls(*fields))
+    build_program(counting, functions, seed)
+    nodes = created[0]
+    print('functions: {}, nodes requested: {}'.format(functions, nodes))
+    print('{:<22} {:>12} {:>12} {:>12}'.format(
+        '', 'bytes', 'bytes/node', 'nodes/s'))
+    rows = [
+        ('__dict__', lambda cls, *fields: DICT_CLASSES[cls](*fields), None),
+        ('__slots__', lambda cls, *fields: cls(*fields), None),
+    ]
+    for name, make, _ in rows:
+        memory, _ = measure_memory(make, functions, seed)
+        elapsed = measure_time(make, functions, seed)
+        print('{:<22} {:>12} {:>12.1f} {:>12.0f}'.format(
+            name, memory, memory / nodes, nodes / elapsed))
+    factory = NodeFactory()
+    memory, program_only = measure_memory(
+        factory.make, functions, seed, factory)
+    factory = NodeFactory()
+    elapsed = measure_time(factory.make, functions, seed)
+    print('{:<22} {:>12} {:>12.1f} {:>12.0f}'.format(
+        'factory', memory, memory / nodes, nodes / elapsed))
+    print('{:<22} {:>12} {:>12.1f}'.format(
+        'factory, table freed', program_only, program_only / nodes))
+    print('unique nodes: {}'.format(len(factory)))
+
+    program = build_program(lambda cls, *fields: cls(*fields),
+                            functions, seed)
+    start = time.perf_counter()
+    for statement in program:
+        fold_constants(statement)
+    plain = time.perf_counter() - start
+    program = build_program(factory.make, functions, seed)
+    before = len(factory)
+    start = time.perf_counter()
+    # Один ConstantFolder на всю программу: общие поддеревья разных
+    # функций сворачиваются один раз.
+    folder = ConstantFolder()
+    folder.factory = factory
+    for statement in program:
+        folder.transform(statement)
+    shared = time.perf_counter() - start
+    print('fold_constants: {:.3f}s plain, {:.3f}s with factory '
+          '({} new unique nodes)'.format(plain, shared, len(factory) - before))
+
+
+if __name__ == '__main__':
+    main()
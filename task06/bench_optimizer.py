@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Время вычисления случайных программ на ЯТЬ до и после optimize.
+
+Каждая программа определяет несколько маленьких функций и рекурсивную
+функцию loop, в теле которой они вызываются внутри выражений с
+константами, нейтральными элементами и ветками с постоянным условием.
+
+Запуск: ./bench_optimizer.py [количество программ] [seed]
+"""
+import contextlib
+import io
+import random
+import sys
+import timeit
+from model import *
+from optimizer import optimize, count_nodes
+
+
+OPERATIONS = ['+', '-', '*', '<', '==', '>']
+
+
+class ProgramGenerator:
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.helpers = []
+
+    def program(self, helpers=4, depth=50):
+        statements = []
+        for index in range(helpers):
+            name = 'h{}'.format(index)
+            statements.append(FunctionDefinition(name, Function(
+                ['a', 'b'], [self.expression(['a', 'b'], 3)])))
+            self.helpers.append(name)
+        n = Reference('n')
+        statements.append(FunctionDefinition('loop', Function(['n'], [
+            Conditional(
+                BinaryOperation(n, '<', Number(1)),
+                [Number(0)],
+                [BinaryOperation(
+                    FunctionCall(Reference('loop'), [
+                        BinaryOperation(n, '-', Number(1))]),
+                    '+',
+                    BinaryOperation(self.expression(['n'], 4), '%',
+                                    Number(1000)))]),
+        ])))
+        statements.append(Print(
+            FunctionCall(Reference('loop'), [Number(depth)])))
+        return statements
+
+    def expression(self, names, depth):
+        choice = self.random.random()
+        if depth == 0 or choice < 0.15:
+            if self.random.random() < 0.5:
+                return Number(self.random.randint(0, 9))
+            return Reference(self.random.choice(names))
+        if choice < 0.3:
+            # Выражение без имён: его свернёт ConstantFolding.
+            return BinaryOperation(Number(self.random.randint(1, 9)),
+                                   self.random.choice(OPERATIONS),
+                                   Number(self.random.randint(1, 9)))
+        if choice < 0.4:
+            return BinaryOperation(self.expression(names, depth - 1),
+                                   self.random.choice(['+', '*']),
+                                   Number(0 if self.random.random() < 0.5
+                                          else 1))
+        if choice < 0.5:
+            return Conditional(
+                BinaryOperation(Number(1), '<', Number(2)),
+                [self.expression(names, depth - 1)],
+                [self.expression(names, depth - 1)])
+        if choice < 0.65 and self.helpers:
+            return FunctionCall(Reference(self.random.choice(self.helpers)), [
+                Reference(self.random.choice(names)),
+                Number(self.random.randint(0, 9))])
+        return BinaryOperation(self.expression(names, depth - 1),
+                               self.random.choice(OPERATIONS),
+                               self.expression(names, depth - 1))
+
+
+def run(statements):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        scope = Scope()
+        for statement in statements:
+            statement.evaluate(scope)
+    return output.getvalue()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    corpus = [ProgramGenerator(seed + index).program()
+              for index in range(count)]
+    optimized = [optimize(program)[0] for program in corpus]
+    for program, result in zip(corpus, optimized):
+        assert run(program) == run(result)
+    before = timeit.timeit(lambda: [run(p) for p in corpus], number=3)
+    after = timeit.timeit(lambda: [run(p) for p in optimized], number=3)
+    nodes_before = sum(count_nodes(program) for program in corpus)
+    nodes_after = sum(count_nodes(program) for program in optimized)
+    print('programs:  {}'.format(count))
+    print('nodes:     {} -> {}'.format(nodes_before, nodes_after))
+    print('time:      {:.3f}s -> {:.3f}s'.format(before, after))
+    print('speedup:   {:.2f}x'.format(before / after))
+
+
+if __name__ == '__main__':
+    main()
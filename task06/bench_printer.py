@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Скорость PrettyPrinter на больших программах: 10^6 команд, 10^4 уровней
+вложенных if и выражение глубины 10^5. Вывод пишется в двоичный
+os.devnull, так что измеряется форматирование и буферизация, а пиковая
+память (tracemalloc) показывает, что она не растёт с размером вывода.
+
+Запуск: ./bench_printer.py
+"""
+import os
+import time
+import tracemalloc
+from model import *
+from printer import PrettyPrinter
+
+
+def statements(count):
+    """Генератор команд: программа не хранится в памяти целиком."""
+    for index in range(count):
+        yield Print(BinaryOperation(
+            Reference('x'), '+',
+            BinaryOperation(Number(index), '*',
+                            FunctionCall(Reference('f'), [Number(2)]))))
+
+
+def nested_conditionals(depth):
+    node = Print(Number(0))
+    for _ in range(depth):
+        node = Conditional(Reference('x'), [node], [Number(1)])
+    return [node]
+
+
+def deep_expression(depth):
+    node = Reference('x')
+    for _ in range(depth):
+        node = BinaryOperation(Number(1), '-', node)
+    return [node]
+
+
+class CountingSink:
+    """Двоичный приёмник, который только считает записанные байты."""
+    mode = 'wb'
+
+    def __init__(self, out):
+        self.out = out
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+        return self.out.write(data)
+
+
+def run(program, indent='    '):
+    with open(os.devnull, 'wb') as devnull:
+        sink = CountingSink(devnull)
+        printer = PrettyPrinter(sink, indent=indent)
+        start = time.perf_counter()
+        printer.print_statements(program)
+        printer.flush()
+        return sink.written, time.perf_counter() - start
+
+
+def peak_memory(program, indent='    '):
+    tracemalloc.start()
+    run(program, indent)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    print('{:<28} {:>12} {:>9} {:>10}'.format(
+        'program', 'bytes', 'seconds', 'MB/s'))
+    cases = [
+        ('10^5 statements', lambda: statements(10 ** 5), '    '),
+        ('10^6 statements', lambda: statements(10 ** 6), '    '),
+        ('10^4 nested if (tab)', lambda: nested_conditionals(10 ** 4), '\t'),
+        ('expression depth 10^5', lambda: deep_expression(10 ** 5), '    '),
+    ]
+    for name, program, indent in cases:
+        written, elapsed = run(program(), indent)
+        print('{:<28} {:>12} {:>9.3f} {:>10.1f}'.format(
+            name, written, elapsed, written / elapsed / 2 ** 20))
+    for count in (10 ** 4, 10 ** 5):
+        print('peak memory, {} statements: {} bytes'.format(
+            count, peak_memory(statements(count))))
+
+
+if __name__ == '__main__':
+    main()
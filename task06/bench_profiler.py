@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Накладные расходы Profiler на рекурсивных числах Фибоначчи:
+без профилировщика, после его остановки, с учётом вызовов функций,
+с подсчётом всех узлов и, для сравнения, под cProfile.
+
+Запуск: ./bench_profiler.py [n]
+"""
+import cProfile
+import sys
+import timeit
+from model import *
+from profiler import Profiler
+
+
+def fib_program(n):
+    return [
+        FunctionDefinition('fib', Function(['n'], [
+            Conditional(
+                BinaryOperation(Reference('n'), '<', Number(2)),
+                [Reference('n')],
+                [
+                    BinaryOperation(
+                        FunctionCall(Reference('fib'), [
+                            BinaryOperation(Reference('n'), '-', Number(1))
+                        ]),
+                        '+',
+                        FunctionCall(Reference('fib'), [
+                            BinaryOperation(Reference('n'), '-', Number(2))
+                        ])
+                    )
+                ]
+            )
+        ])),
+        FunctionCall(Reference('fib'), [Number(n)]),
+    ]
+
+
+def run(program):
+    scope = Scope()
+    for statement in program:
+        statement.evaluate(scope)
+
+
+def measure(program):
+    return min(timeit.repeat(lambda: run(program), number=1, repeat=3))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    program = fib_program(n)
+    run(program)
+    baseline = measure(program)
+    rows = [('off', baseline)]
+    for name, count_nodes in (('on', False), ('on, count_nodes', True)):
+        with Profiler(count_nodes=count_nodes):
+            rows.append((name, measure(program)))
+    rows.append(('off after stop()', measure(program)))
+    profile = cProfile.Profile()
+    profile.enable()
+    elapsed = measure(program)
+    profile.disable()
+    rows.append(('cProfile', elapsed))
+    print('fib({})'.format(n))
+    for name, elapsed in rows:
+        print('{:<18} {:8.3f}s {:6.2f}x'.format(
+            name, elapsed, elapsed / baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Байт-код для программ на ЯТЬ: компиляция, двоичный формат, виртуальная
+машина и кэш на диске.
+
+compile_bytecode(statements) превращает список команд в Bytecode: таблицы
+имён и констант и список функций, нулевая из которых - сама программа.
+Код функции - плоская последовательность int32: пары (операция, аргумент)
+для стековой машины. dumps() записывает Bytecode в байты, а load()
+читает его из любого буфера (bytes, mmap) без копирования кода: VM
+исполняет memoryview прямо поверх буфера. Код функций выровнен по 4
+байтам от начала буфера, поэтому буфер тоже должен начинаться
+с выровненного адреса (bytes, bytearray и mmap это гарантируют).
+
+Формат (все числа little-endian):
+    b'YATB', версия (u32)
+    количество имён, констант и функций (3 x u32)
+    имена: длина (u32) и UTF-8
+    константы: длина (u32) и десятичная запись ASCII (числа в ЯТЬ
+        не ограничены по размеру)
+    нулевые байты до смещения, кратного 4
+    функции: количество аргументов и слов кода (2 x u32),
+        номера имён аргументов (u32), код (int32)
+
+VM, как и compiler.py из task04, хранит значения видимых имён в плоском
+списке env по номерам имён, а числа на стеке и в env - как int. Вызов
+функции запоминает значения её локальных имён (аргументов и имён из
+DEFINE и READ в её собственном коде), связывает аргументы прямо в env
+и при возврате восстанавливает запомненное, поэтому он стоит
+O(числа локальных имён), а не O(числа всех имён). Вызовы не используют
+стек Python, поэтому глубина рекурсии ограничена только памятью.
+Функции из дерева, пришедшие через Scope, компилируются в байт-код при
+первом вызове. Функции в VM - объекты BytecodeFunction, которые не
+покидают её: в Scope вместо них попадает исходный Function из дерева,
+а функции байт-кода, прочитанного load(), в Scope не записываются вовсе.
+
+BytecodeCache хранит скомпилированные программы в каталоге по SHA-256
+от исходного текста (или любых байтов, однозначно задающих программу):
+при попадании в кэш файл отображается в память через mmap, и ни дерево,
+ни байт-код заново не строятся.
+"""
+import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from model import *
+
+MAGIC = b'YATB'
+VERSION = 2
+
+(CONST, LOAD, BINARY, UNARY, JUMP_IF_FALSE, JUMP, CALL, RETURN, POP,
+ FUNCTION, DEFINE, READ, PRINT) = range(13)
+
+BINARY_OPS = ('+', '-', '*', '/', '%', '==', '!=', '<', '>', '<=', '>=',
+              '&&', '||')
+UNARY_OPS = ('-', '!')
+
+
+def compile_bytecode(statements):
+    """Компилирует список команд (или одну команду) в Bytecode."""
+    if isinstance(statements, ASTNode):
+        statements = [statements]
+    assembler = Assembler()
+    assembler.add_unit([], statements)
+    return Bytecode(assembler.names, assembler.constants, assembler.units)
+
+
+class Bytecode:
+    """
+    names и constants - таблицы имён и чисел; units - список
+    BytecodeFunction, нулевая функция - вся программа.
+    """
+    def __init__(self, names, constants, units, buffer=None):
+        self.names = names
+        self.constants = constants
+        self.units = units
+        # Буфер (например, mmap), поверх которого лежит код функций.
+        self.buffer = buffer
+
+    def run(self, scope):
+        """
+        Выполняет программу, как evaluate: имена из scope видны программе,
+        а имена, которые она определила на верхнем уровне, записываются
+        в scope. Возвращает результат последней команды.
+
+        Исходные Function этой программы, найденные в scope, исполняются
+        как байт-код, а не через дерево.
+        """
+        env = flatten(scope)
+        compiled = {id(unit.function): unit for unit in self.units
+                    if unit.function is not None}
+        for name, value in env.items():
+            if isinstance(value, Function) and id(value) in compiled:
+                env[name] = compiled[id(value)]
+        visible = dict(env)
+        try:
+            return box(execute(self, env, scope.stdin, scope.stdout))
+        finally:
+            for name, value in env.items():
+                if visible.get(name) is not value:
+                    value = box(value)
+                    if value is not None:
+                        scope[name] = value
+
+    def dumps(self):
+        parts = [MAGIC, struct.pack('<IIII', VERSION, len(self.names),
+                                    len(self.constants), len(self.units))]
+        for name in self.names:
+            data = name.encode('utf-8')
+            parts.append(struct.pack('<I', len(data)))
+            parts.append(data)
+        for constant in self.constants:
+            data = str(constant).encode('ascii')
+            parts.append(struct.pack('<I', len(data)))
+            parts.append(data)
+        parts.append(b'\0' * (-sum(map(len, parts)) % 4))
+        for unit in self.units:
+            parts.append(struct.pack('<II', len(unit.args), len(unit.code)))
+            parts.append(struct.pack('<{}I'.format(len(unit.args)),
+                                     *unit.arg_indices))
+            code = array.array('i', unit.code)
+            if sys.byteorder != 'little':
+                code.byteswap()
+            parts.append(code.tobytes())
+        return b''.join(parts)
+
+
+def load(buffer):
+    """
+    Читает Bytecode из буфера в формате dumps(). Код функций не
+    копируется, а остаётся видом (memoryview) на buffer.
+    """
+    view = memoryview(buffer)
+    if bytes(view[:4]) != MAGIC:
+        raise ValueError('not a ЯТЬ bytecode file')
+    version, name_count, constant_count, unit_count = struct.unpack_from(
+        '<IIII', view, 4)
+    if version != VERSION:
+        raise ValueError('unsupported bytecode version {}'.format(version))
+    offset = 20
+    names = []
+    for _ in range(name_count):
+        length, = struct.unpack_from('<I', view, offset)
+        names.append(str(view[offset + 4:offset + 4 + length], 'utf-8'))
+        offset += 4 + length
+    constants = []
+    for _ in range(constant_count):
+        length, = struct.unpack_from('<I', view, offset)
+        constants.append(int(bytes(view[offset + 4:offset + 4 + length])))
+        offset += 4 + length
+    padding = -offset % 4
+    if any(view[offset:offset + padding]):
+        raise ValueError('bad padding in bytecode')
+    # Дальше все поля по 4 байта, и код функций выровнен.
+    offset += padding
+    units = []
+    for _ in range(unit_count):
+        arg_count, code_length = struct.unpack_from('<II', view, offset)
+        offset += 8
+        arg_indices = struct.unpack_from('<{}I'.format(arg_count), view,
+                                         offset)
+        offset += 4 * arg_count
+        end = offset + 4 * code_length
+        if sys.byteorder == 'little':
+            code = view[offset:end].cast('i')
+        else:
+            code = array.array('i', view[offset:end])
+            code.byteswap()
+        offset = end
+        units.append(BytecodeFunction(
+            [names[index] for index in arg_indices], arg_indices, code))
+    if offset != len(view):
+        raise ValueError('trailing data in bytecode')
+    return Bytecode(names, constants, units, buffer)
+
+
+class BytecodeFunction:
+    """
+    Значение типа "функция" в VM: имена аргументов и код. function -
+    исходный Function, если байт-код построен из дерева, иначе None.
+    locals - номера локальных имён функции; VM находит их при первом
+    вызове.
+    """
+    __slots__ = ('args', 'arg_indices', 'code', 'function', 'locals')
+
+    def __init__(self, args, arg_indices, code, function=None):
+        self.args = args
+        self.arg_indices = arg_indices
+        self.code = code
+        self.function = function
+        self.locals = None
+
+
+def local_slots(unit):
+    """
+    Номера имён, которые связывает вызов unit: аргументы и имена из DEFINE
+    и READ в её коде. Код вложенных функций лежит в других BytecodeFunction
+    и сюда не попадает.
+    """
+    slots = dict.fromkeys(unit.arg_indices)
+    code = unit.code
+    for pc in range(0, len(code), 2):
+        if code[pc] == DEFINE or code[pc] == READ:
+            slots[code[pc + 1]] = None
+    return tuple(slots)
+
+
+def flatten(scope):
+    """Собирает видимые из scope имена в словарь; Number становятся int."""
+    chain = []
+    while scope is not None:
+        chain.append(scope.items())
+        scope = scope.parent
+    env = {}
+    for items in reversed(chain):
+        env.update(items)
+    for name, value in env.items():
+        if isinstance(value, Number):
+            env[name] = value.value
+    return env
+
+
+def box(value):
+    """
+    Переводит значение VM в значение ЯТЬ: int становится Number,
+    а BytecodeFunction - своим исходным Function (None, если его нет).
+    """
+    if isinstance(value, int):
+        return Number(value)
+    if isinstance(value, BytecodeFunction):
+        return value.function
+    return value
+
+
+class BytecodeCache:
+    """
+    Каталог со скомпилированными программами. Ключ - SHA-256 от source
+    (строки или байтов) и версии формата, так что изменение формата
+    не подхватит старые файлы.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, source):
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        digest = hashlib.sha256(MAGIC + struct.pack('<I', VERSION) + source)
+        return os.path.join(self.directory, digest.hexdigest() + '.yatb')
+
+    def load(self, source, build):
+        """
+        Возвращает Bytecode для source. При промахе вызывает build(),
+        который должен вернуть список команд, компилирует его
+        и сохраняет результат.
+        """
+        path = self.path(source)
+        try:
+            bytecode = self.load_file(path)
+        except (OSError, ValueError):
+            # Нет файла, он пуст или испорчен: компилируем заново.
+            pass
+        else:
+            self.hits += 1
+            return bytecode
+        self.misses += 1
+        bytecode = compile_bytecode(build())
+        self.store(path, bytecode)
+        return bytecode
+
+    def load_file(self, path):
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return load(buffer)
+
+    def store(self, path, bytecode):
+        # Файл появляется под своим именем только целиком, поэтому
+        # параллельный читатель не увидит недописанный байт-код.
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(bytecode.dumps())
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+class Assembler(ASTNodeVisitor):
+    """
+    Переводит дерево в код стековой машины, по функции на Function.
+    Таблицы можно начать с уже готовых names, constants и units, чтобы
+    дописывать функции к существующему байт-коду.
+    """
+    def __init__(self, names=(), constants=(), units=()):
+        self.names = list(names)
+        self.name_indices = {name: index
+                             for index, name in enumerate(self.names)}
+        self.constants = list(constants)
+        self.constant_indices = {value: index
+                                 for index, value in enumerate(self.constants)}
+        self.units = list(units)
+        # Узлы Function хранятся в BytecodeFunction.function, поэтому их
+        # id в unit_indices не достанутся другим объектам.
+        self.unit_indices = {id(unit.function): index
+                             for index, unit in enumerate(self.units)
+                             if unit.function is not None}
+        self.code = None
+
+    def name(self, name):
+        index = self.name_indices.get(name)
+        if index is None:
+            index = self.name_indices[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def constant(self, value):
+        index = self.constant_indices.get(value)
+        if index is None:
+            index = self.constant_indices[value] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def emit(self, op, arg=0):
+        self.code += (op, arg)
+        return len(self.code) - 1
+
+    def add_unit(self, args, body, function=None):
+        index = len(self.units)
+        arg_indices = tuple(self.name(arg) for arg in args)
+        unit = BytecodeFunction(list(args), arg_indices, [], function)
+        self.units.append(unit)
+        outer = self.code
+        self.code = unit.code
+        self.block(body)
+        self.emit(RETURN)
+        self.code = outer
+        return index
+
+    def block(self, block):
+        if not block:
+            self.emit(CONST, self.constant(0))
+            return
+        for position, expr in enumerate(block):
+            if position:
+                self.emit(POP)
+            expr.accept(self)
+
+    def visit_number(self, node):
+        self.emit(CONST, self.constant(node.value))
+
+    def function_unit(self, node):
+        """Номер функции для узла Function; компилирует его один раз."""
+        index = self.unit_indices.get(id(node))
+        if index is None:
+            index = self.unit_indices[id(node)] = self.add_unit(
+                node.args, node.body, node)
+        return index
+
+    def visit_function(self, node):
+        self.emit(FUNCTION, self.function_unit(node))
+
+    def visit_function_definition(self, node):
+        node.function.accept(self)
+        self.emit(DEFINE, self.name(node.name))
+
+    def visit_conditional(self, node):
+        node.condition.accept(self)
+        to_else = self.emit(JUMP_IF_FALSE)
+        self.block(node.if_true)
+        to_end = self.emit(JUMP)
+        self.code[to_else] = len(self.code)
+        self.block(node.if_false)
+        self.code[to_end] = len(self.code)
+
+    def visit_print(self, node):
+        node.expr.accept(self)
+        self.emit(PRINT)
+
+    def visit_read(self, node):
+        self.emit(READ, self.name(node.name))
+
+    def visit_function_call(self, node):
+        node.fun_expr.accept(self)
+        for arg in node.args:
+            arg.accept(self)
+        self.emit(CALL, len(node.args))
+
+    def visit_reference(self, node):
+        self.emit(LOAD, self.name(node.name))
+
+    def visit_binary_operation(self, node):
+        node.lhs.accept(self)
+        node.rhs.accept(self)
+        self.emit(BINARY, BINARY_OPS.index(node.op))
+
+    def visit_unary_operation(self, node):
+        node.expr.accept(self)
+        self.emit(UNARY, UNARY_OPS.index(node.op))
+
+
+def not_a_number():
+    """Ошибка, которую дерево бросает, получив функцию вместо числа."""
+    return AttributeError("'Function' object has no attribute 'value'")
+
+
+def execute(bytecode, variables, stdin=None, stdout=None):
+    """
+    Исполняет нулевую функцию bytecode, видя имена из словаря variables,
+    и записывает в него значения, связанные на верхнем уровне. Кадры
+    вызовов лежат в списке frames, стек значений - общий для всех кадров.
+    READ и PRINT работают с stdin и stdout, как Read и Print со Scope.
+    """
+    names = list(bytecode.names)
+    slots = {name: slot for slot, name in enumerate(names)}
+    # Имена из variables, которых нет в программе, тоже получают номера:
+    # их могут использовать функции из дерева.
+    names.extend(name for name in variables if name not in slots)
+    env = [variables.get(name, MISSING) for name in names]
+    constants = bytecode.constants
+    units = bytecode.units
+    assembler = None
+    binary = [BINARY_OPERATIONS[op] for op in BINARY_OPS]
+    unary = [UNARY_OPERATIONS[op] for op in UNARY_OPS]
+    code = units[0].code
+    pc = 0
+    stack = []
+    frames = []
+    try:
+        while True:
+            op = code[pc]
+            arg = code[pc + 1]
+            pc += 2
+            if op == LOAD:
+                value = env[arg]
+                if value is MISSING:
+                    raise KeyError(names[arg])
+                stack.append(value)
+            elif op == CONST:
+                stack.append(constants[arg])
+            elif op == BINARY:
+                rhs = stack.pop()
+                lhs = stack[-1]
+                if type(lhs) is not int or type(rhs) is not int:
+                    raise not_a_number()
+                stack[-1] = int(binary[arg](lhs, rhs))
+            elif op == JUMP_IF_FALSE:
+                value = stack.pop()
+                if type(value) is not int:
+                    raise not_a_number()
+                if not value:
+                    pc = arg
+            elif op == JUMP:
+                pc = arg
+            elif op == CALL:
+                args = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                function = stack.pop()
+                if type(function) is not BytecodeFunction:
+                    if not isinstance(function, Function):
+                        raise AttributeError(
+                            "'Number' object has no attribute 'call'")
+                    # Функция из дерева, пришедшая через Scope.
+                    if assembler is None:
+                        assembler = Assembler(names, constants, units)
+                        names = assembler.names
+                        constants = assembler.constants
+                        units = assembler.units
+                    function = units[assembler.function_unit(function)]
+                    env.extend([MISSING] * (len(names) - len(env)))
+                local = function.locals
+                if local is None:
+                    local = function.locals = local_slots(function)
+                frames.append((code, pc, local, [env[slot] for slot in local]))
+                for slot, value in zip(function.arg_indices, args):
+                    env[slot] = value
+                code = function.code
+                pc = 0
+            elif op == RETURN:
+                if not frames:
+                    return stack.pop()
+                code, pc, local, saved = frames.pop()
+                for slot, value in zip(local, saved):
+                    env[slot] = value
+            elif op == POP:
+                stack.pop()
+            elif op == UNARY:
+                value = stack[-1]
+                if type(value) is not int:
+                    raise not_a_number()
+                stack[-1] = int(unary[arg](value))
+            elif op == FUNCTION:
+                stack.append(units[arg])
+            elif op == DEFINE:
+                env[arg] = stack[-1]
+            elif op == READ:
+                value = read_number(stdin)
+                env[arg] = value
+                stack.append(value)
+            elif op == PRINT:
+                value = stack[-1]
+                if type(value) is not int:
+                    raise not_a_number()
+                print(value, file=stdout)
+            else:
+                raise ValueError('unknown opcode {}'.format(op))
+    finally:
+        # После исключения в env остались локальные имена прерванных
+        # вызовов: возвращаем значения верхнего уровня.
+        while frames:
+            _, _, local, saved = frames.pop()
+            for slot, value in zip(local, saved):
+                env[slot] = value
+        for name, value in zip(names, env):
+            if value is not MISSING:
+                variables[name] = value
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Вычисление программ на ЯТЬ без рекурсии на стеке Python.
+
+StackEvaluator хранит всю незавершённую работу в двух списках в куче:
+tasks - стек действий (вычислить узел или завершить начатую операцию),
+values - стек уже вычисленных значений. Поэтому глубина рекурсии в
+программе на ЯТЬ ограничена только памятью, а не sys.getrecursionlimit().
+
+Вызов функции не оставляет на стеке tasks ничего, кроме тела функции,
+так что хвостовые вызовы (например, обратный отсчёт) занимают O(1) места
+в tasks, а каждый кадр нехвостовой рекурсии - O(1) действий и один Scope.
+"""
+from model import *
+
+
+def evaluate(program, scope):
+    """Аналог program.evaluate(scope), не использующий стек Python."""
+    return StackEvaluator().evaluate(program, scope)
+
+
+class StackEvaluator(ASTNodeVisitor):
+    def __init__(self):
+        self.tasks = []
+        self.values = []
+        self.scope = None
+
+    def evaluate(self, node, scope):
+        self.schedule(node, scope)
+        tasks = self.tasks
+        while tasks:
+            action, argument, self.scope = tasks.pop()
+            action(argument)
+        return self.values.pop()
+
+    def visit(self, node):
+        node.accept(self)
+
+    def schedule(self, node, scope):
+        self.tasks.append((self.visit, node, scope))
+
+    def schedule_block(self, block, scope):
+        """
+        Планирует вычисление списка выражений: на стеке values останется
+        только результат последнего (или Number(0) для пустого списка).
+        """
+        if not block:
+            self.values.append(Number(0))
+            return
+        tasks = self.tasks
+        for position, expr in enumerate(reversed(block)):
+            if position:
+                tasks.append((self.discard, None, scope))
+            tasks.append((self.visit, expr, scope))
+
+    def discard(self, _):
+        self.values.pop()
+
+    def visit_number(self, node):
+        self.values.append(node)
+
+    def visit_function(self, node):
+        self.values.append(node)
+
+    def visit_function_definition(self, node):
+        self.values.append(node.evaluate(self.scope))
+
+    def visit_conditional(self, node):
+        self.tasks.append((self.finish_conditional, node, self.scope))
+        self.schedule(node.condition, self.scope)
+
+    def finish_conditional(self, node):
+        if self.values.pop().value:
+            self.schedule_block(node.if_true, self.scope)
+        else:
+            self.schedule_block(node.if_false, self.scope)
+
+    def visit_print(self, node):
+        self.tasks.append((self.finish_print, node, self.scope))
+        self.schedule(node.expr, self.scope)
+
+    def finish_print(self, node):
+        print(self.values[-1].value, file=self.scope.stdout)
+
+    def visit_read(self, node):
+        self.values.append(node.evaluate(self.scope))
+
+    def visit_function_call(self, node):
+        scope = self.scope
+        self.tasks.append((self.finish_function_call, node, scope))
+        for arg in reversed(node.args):
+            self.schedule(arg, scope)
+        self.schedule(node.fun_expr, scope)
+
+    def finish_function_call(self, node):
+        values = self.values
+        args = values[len(values) - len(node.args):]
+        del values[len(values) - len(node.args):]
+        function = values.pop()
+        call_scope = Scope(self.scope)
+        for name, value in zip(function.args, args):
+            call_scope[name] = value
+        self.schedule_block(function.body, call_scope)
+
+    def visit_reference(self, node):
+        self.values.append(self.scope[node.name])
+
+    def visit_binary_operation(self, node):
+        self.tasks.append((self.finish_binary_operation, node, self.scope))
+        self.schedule(node.rhs, self.scope)
+        self.schedule(node.lhs, self.scope)
+
+    def finish_binary_operation(self, node):
+        rhs = self.values.pop().value
+        lhs = self.values.pop().value
+        self.values.append(
+            Number(int(BINARY_OPERATIONS[node.op](lhs, rhs))))
+
+    def visit_unary_operation(self, node):
+        self.tasks.append((self.finish_unary_operation, node, self.scope))
+        self.schedule(node.expr, self.scope)
+
+    def finish_unary_operation(self, node):
+        value = self.values.pop().value
+        self.values.append(Number(int(UNARY_OPERATIONS[node.op](value))))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+from model import *
+from transformer import ASTTransformer
+
+
+def fold_constants(program, factory=None):
+    """
+    Сворачивает константы в program. Неизменённые поддеревья переиспользуются,
+    а новые узлы при заданной factory (NodeFactory) строятся через неё.
+    """
+    folder = ConstantFolder()
+    folder.factory = factory
+    return folder.transform(program)
+
+
+class ConstantFolder(ASTTransformer):
+    """
+    Вычисляет заранее операции над константами, а также 0 * x, x * 0
+    и x - x, где x - Reference.
+
+    С factory общие поддеревья сворачиваются один раз: результат для
+    каждого узла запоминается.
+    """
+    def __init__(self):
+        self.folded = {}
+
+    def transform(self, node):
+        if self.factory is None:
+            return super().transform(node)
+        folded = self.folded.get(id(node))
+        if folded is None:
+            # Сам узел хранится рядом с результатом, чтобы его id
+            # не достался другому объекту.
+            folded = self.folded[id(node)] = (node, super().transform(node))
+        return folded[1]
+
+    def visit_binary_operation(self, node):
+        node = super().visit_binary_operation(node)
+        lhs, rhs = node.lhs, node.rhs
+        if isinstance(lhs, Number) and isinstance(rhs, Number):
+            try:
+                return self.make(Number, node.evaluate(Scope()).value)
+            except ZeroDivisionError:
+                return node
+        if node.op == '*' and (
+                lhs == Number(0) and isinstance(rhs, Reference) or
+                rhs == Number(0) and isinstance(lhs, Reference)):
+            return self.make(Number, 0)
+        if (node.op == '-' and isinstance(lhs, Reference) and
+                isinstance(rhs, Reference) and lhs.name == rhs.name):
+            return self.make(Number, 0)
+        return node
+
+    def visit_unary_operation(self, node):
+        node = super().visit_unary_operation(node)
+        if isinstance(node.expr, Number):
+            return self.make(Number, node.evaluate(Scope()).value)
+        return node
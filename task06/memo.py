@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Мемоизация чистых функций ЯТЬ.
+
+Функция считается чистой, если её результат зависит только от аргументов:
+* в её теле нет Print, Read, FunctionDefinition и анонимных Function;
+* каждое имя в теле - либо её аргумент, либо стабильное имя;
+* вызываются только стабильные имена чистых функций.
+
+Из-за динамической области видимости любое свободное имя может оказаться
+чем угодно, поэтому стабильным считается только имя, которое во всей
+программе связывается ровно одним FunctionDefinition и никогда не
+встречается в Read или среди аргументов функций: пока оно определено,
+его значение всегда одно и то же.
+
+Вызовы чистых функций проходят через LRU-кэш по кортежу аргументов
+(Number хешируем). Мемоизация работает при вычислении через evaluate.
+"""
+import collections
+from model import *
+from transformer import ASTTransformer
+
+
+def memoize(statements, maxsize=128, enabled=True):
+    """
+    Возвращает новый список команд, в котором чистые функции заменены
+    на MemoizedFunction с кэшем на maxsize результатов. При enabled,
+    равном False, возвращает те же команды: включить мемоизацию позже
+    можно только через Memoizer.
+    """
+    if not enabled:
+        return list(statements)
+    return Memoizer(maxsize).memoize(statements)
+
+
+class Memoizer:
+    """
+    Находит чистые функции в программе, подменяет их на MemoizedFunction
+    и хранит их кэши, чтобы можно было узнать статистику или выключить
+    мемоизацию уже после построения программы.
+
+    Кэши хранятся по имени, к которому привязана функция: одинаковые
+    функции (например, один и тот же объект из NodeFactory) под разными
+    именами получают разные кэши. Функции подменяются и при выключенной
+    мемоизации, чтобы её можно было включить позже; память под значения
+    кэш занимает только при первой записи.
+    """
+    def __init__(self, maxsize=128, enabled=True):
+        self.maxsize = maxsize
+        self.caches = {}
+        self._enabled = enabled
+
+    def memoize(self, statements):
+        analysis = PurityAnalysis()
+        analysis.analyze(statements)
+        replacements = {}
+        for name, function in analysis.pure_functions().items():
+            cache = self.caches[name] = LRUCache(self.maxsize)
+            cache.enabled = self._enabled
+            replacements[name] = function, MemoizedFunction(
+                function.args, function.body, cache)
+        replacer = FunctionReplacer(replacements)
+        return [replacer.transform(statement) for statement in statements]
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value):
+        self._enabled = value
+        for cache in self.caches.values():
+            cache.enabled = value
+
+    @property
+    def hits(self):
+        return sum(cache.hits for cache in self.caches.values())
+
+    @property
+    def misses(self):
+        return sum(cache.misses for cache in self.caches.values())
+
+
+class LRUCache:
+    """
+    Кэш на не более чем maxsize значений, вытесняющий давно не
+    использованные. Пока enabled ложно, кэш не хранит и не выдаёт значений.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        # Создаётся при первой записи.
+        self.values = None
+
+    def __len__(self):
+        return len(self.values) if self.values is not None else 0
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        if self.values is None:
+            self.misses += 1
+            return default
+        try:
+            self.values.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return self.values[key]
+
+    def put(self, key, value):
+        if not self.enabled or self.maxsize <= 0:
+            return
+        if self.values is None:
+            self.values = collections.OrderedDict()
+        self.values[key] = value
+        self.values.move_to_end(key)
+        if len(self.values) > self.maxsize:
+            self.values.popitem(last=False)
+
+    def clear(self):
+        self.values = None
+        self.hits = 0
+        self.misses = 0
+
+
+class MemoizedFunction(Function):
+    """Function, результаты вызовов которой запоминаются в cache."""
+    __slots__ = ('cache',)
+
+    def __init__(self, args, body, cache):
+        super().__init__(args, body)
+        object.__setattr__(self, 'cache', cache)
+
+    def __reduce__(self):
+        return type(self), (self.args, self.body, self.cache)
+
+    def call(self, args, scope):
+        key = tuple(args)
+        result = self.cache.get(key)
+        if result is None:
+            result = super().call(args, scope)
+            self.cache.put(key, result)
+        return result
+
+
+class FunctionReplacer(ASTTransformer):
+    """
+    Подменяет функции в FunctionDefinition по словарю replacements:
+    имя -> (исходная функция, замена).
+    """
+    def __init__(self, replacements):
+        self.replacements = replacements
+
+    def visit_function_definition(self, node):
+        original, function = self.replacements.get(node.name, (None, None))
+        if node.function is not original:
+            return super().visit_function_definition(node)
+        return FunctionDefinition(node.name, function)
+
+
+class FunctionInfo:
+    def __init__(self, function):
+        self.function = function
+        self.has_effects = False
+        self.references = set()
+        self.callees = set()
+
+
+class PurityAnalysis(ASTNodeVisitor):
+    def __init__(self):
+        self.definitions = collections.defaultdict(list)
+        self.bound_names = set()
+        self.infos = {}
+        self.current = None
+
+    def analyze(self, statements):
+        for statement in statements:
+            statement.accept(self)
+
+    def stable_names(self):
+        return {name for name, functions in self.definitions.items()
+                if len(functions) == 1 and name not in self.bound_names}
+
+    def pure_functions(self):
+        """Возвращает словарь: стабильное имя -> чистая функция."""
+        stable = self.stable_names()
+        candidates = {}
+        for name in stable:
+            info = self.infos[self.definitions[name][0]]
+            allowed = stable | set(info.function.args)
+            if (not info.has_effects and info.references <= allowed and
+                    info.callees <= stable):
+                candidates[name] = info
+        changed = True
+        while changed:
+            changed = False
+            for name, info in list(candidates.items()):
+                if not info.callees <= candidates.keys():
+                    del candidates[name]
+                    changed = True
+        return {name: info.function for name, info in candidates.items()}
+
+    def mark_effect(self):
+        if self.current is not None:
+            self.current.has_effects = True
+
+    def visit_body(self, function):
+        outer = self.current
+        self.current = self.infos[function] = FunctionInfo(function)
+        self.bound_names.update(function.args)
+        for expr in function.body:
+            expr.accept(self)
+        self.current = outer
+
+    def visit_block(self, block):
+        for expr in block or []:
+            expr.accept(self)
+
+    def visit_number(self, node):
+        pass
+
+    def visit_function(self, node):
+        self.mark_effect()
+        self.visit_body(node)
+
+    def visit_function_definition(self, node):
+        self.mark_effect()
+        self.definitions[node.name].append(node.function)
+        self.visit_body(node.function)
+
+    def visit_conditional(self, node):
+        node.condition.accept(self)
+        self.visit_block(node.if_true)
+        self.visit_block(node.if_false)
+
+    def visit_print(self, node):
+        self.mark_effect()
+        node.expr.accept(self)
+
+    def visit_read(self, node):
+        self.mark_effect()
+        self.bound_names.add(node.name)
+
+    def visit_function_call(self, node):
+        if isinstance(node.fun_expr, Reference):
+            if self.current is not None:
+                self.current.callees.add(node.fun_expr.name)
+        else:
+            self.mark_effect()
+        node.fun_expr.accept(self)
+        self.visit_block(node.args)
+
+    def visit_reference(self, node):
+        if self.current is not None:
+            self.current.references.add(node.name)
+
+    def visit_binary_operation(self, node):
+        node.lhs.accept(self)
+        node.rhs.accept(self)
+
+    def visit_unary_operation(self, node):
+        node.expr.accept(self)
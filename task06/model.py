@@ -1,13 +1,163 @@
 #!/usr/bin/env python3
 import abc
+import operator
+
+
+class SlotTable:
+    """
+    Сопоставляет каждому имени постоянный номер ячейки (слот).
+    Одна таблица общая для всего дерева Scope, поэтому у имени везде
+    один и тот же слот.
+    """
+    __slots__ = ('slots', 'names', 'generation')
+
+    def __init__(self):
+        self.slots = {}
+        self.names = []
+        # Увеличивается, когда новое имя появляется в Scope, у которого
+        # уже есть дочерние: это делает устаревшими кэши владельцев.
+        self.generation = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def slot(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+        return slot
+
+
+MISSING = object()
 
 
 class Scope:
-    def __init__(self, parent=None):
-        raise NotImplementedError
+    """
+    Динамическая область видимости, значения которой хранятся в массиве
+    по слотам из общей SlotTable. Массив растёт только до самого большого
+    слота, связанного в самом этом Scope, поэтому кадр вызова функции
+    занимает место лишь под её собственные имена.
+
+    Если имени нет в текущем Scope, он запоминает в owners, какой из
+    предков хранит значение. Пока выполняется вызов функции, Scope выше
+    него не меняются, поэтому повторный поиск стоит O(1), а не O(глубины).
+
+    stdin и stdout - потоки, из которых Read читает и в которые Print
+    пишет; дочерний Scope по умолчанию наследует их от parent, а None
+    означает sys.stdin и sys.stdout на момент чтения или вывода.
+    """
+    __slots__ = ('parent', 'table', 'values', 'owners', 'generation',
+                 'has_children', 'stdin', 'stdout')
+
+    def __init__(self, parent=None, stdin=None, stdout=None):
+        self.parent = parent
+        if parent is None:
+            self.table = SlotTable()
+        else:
+            self.table = parent.table
+            parent.has_children = True
+            if stdin is None:
+                stdin = parent.stdin
+            if stdout is None:
+                stdout = parent.stdout
+        self.stdin = stdin
+        self.stdout = stdout
+        self.values = []
+        # Создаётся при первом промахе в самом этом Scope.
+        self.owners = None
+        self.generation = self.table.generation
+        self.has_children = False
+
+    def __getitem__(self, name):
+        slot = self.table.slots.get(name)
+        if slot is None:
+            raise KeyError(name)
+        return self.get_slot(slot)
+
+    def __setitem__(self, name, value):
+        self.set_slot(self.table.slot(name), value)
+
+    def get_slot(self, slot):
+        values = self.values
+        if slot < len(values):
+            value = values[slot]
+            if value is not MISSING:
+                return value
+        if not self.has_children and self.parent is not None:
+            # Кадр без дочерних - обычно только что созданный кадр вызова:
+            # заводить ему свой кэш дороже, чем спросить кэш родителя.
+            return self.parent.get_slot(slot)
+        owner = self.owner(slot)
+        if owner is None:
+            raise KeyError(self.table.names[slot])
+        return owner.values[slot]
+
+    def set_slot(self, slot, value):
+        values = self.values
+        if slot >= len(values):
+            values.extend([MISSING] * (slot + 1 - len(values)))
+        if values[slot] is MISSING and self.has_children:
+            self.table.generation += 1
+        values[slot] = value
+
+    def owner(self, slot):
+        """
+        Возвращает Scope, в котором связан слот (или None), и запоминает
+        ответ во всех Scope по пути до него.
+        """
+        generation = self.table.generation
+        path = []
+        scope = self
+        owner = None
+        while scope is not None:
+            values = scope.values
+            if slot < len(values) and values[slot] is not MISSING:
+                owner = scope
+                break
+            if (scope.generation == generation and
+                    scope.owners is not None and slot in scope.owners):
+                owner = scope.owners[slot]
+                break
+            path.append(scope)
+            scope = scope.parent
+        for scope in path:
+            if scope.generation != generation or scope.owners is None:
+                scope.owners = {}
+                scope.generation = generation
+            scope.owners[slot] = owner
+        return owner
+
+    def items(self):
+        """Возвращает пары (имя, значение), связанные в самом этом Scope."""
+        names = self.table.names
+        return [(names[slot], value) for slot, value in enumerate(self.values)
+                if value is not MISSING]
 
 
 class ASTNode(metaclass=abc.ABCMeta):
+    """
+    Узлы дерева неизменяемы: поля задаются только в конструкторе, а
+    присваивание полю готового узла вызывает AttributeError. Поэтому
+    один объект может быть потомком нескольких узлов (см. NodeFactory).
+    Поля хранятся в __slots__, в том же порядке, что и аргументы
+    конструктора.
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            '{} is immutable'.format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            '{} is immutable'.format(type(self).__name__))
+
+    def __reduce__(self):
+        """Аргументы конструктора; нужно для pickle и copy."""
+        return type(self), tuple(getattr(self, name)
+                                 for name in self.__slots__)
+
     @abc.abstractmethod
     def evaluate(self, scope):
         """
@@ -15,6 +165,55 @@ class ASTNode(metaclass=abc.ABCMeta):
         в заданной области видимости и возвращает результат вычисления.
         """
 
+    @abc.abstractmethod
+    def accept(self, visitor):
+        """
+        Вызывает метод посетителя visitor, соответствующий типу узла,
+        и возвращает его результат.
+        """
+
+
+class ASTNodeVisitor(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    def visit_number(self, node):
+        pass
+
+    @abc.abstractmethod
+    def visit_function(self, node):
+        pass
+
+    @abc.abstractmethod
+    def visit_function_definition(self, node):
+        pass
+
+    @abc.abstractmethod
+    def visit_conditional(self, node):
+        pass
+
+    @abc.abstractmethod
+    def visit_print(self, node):
+        pass
+
+    @abc.abstractmethod
+    def visit_read(self, node):
+        pass
+
+    @abc.abstractmethod
+    def visit_function_call(self, node):
+        pass
+
+    @abc.abstractmethod
+    def visit_reference(self, node):
+        pass
+
+    @abc.abstractmethod
+    def visit_binary_operation(self, node):
+        pass
+
+    @abc.abstractmethod
+    def visit_unary_operation(self, node):
+        pass
+
 
 class Number(ASTNode):
     """
@@ -29,11 +228,25 @@ class Number(ASTNode):
     быть можно положить в словарь в качестве ключа (см. специальные методы
     __eq__, __ne__, __hash__ — требуется реализовать две из них).
     """
+    __slots__ = ('value',)
+
     def __init__(self, value):
-        pass
+        object.__setattr__(self, 'value', value)
+
+    def __eq__(self, other):
+        return isinstance(other, Number) and self.value == other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return 'Number({})'.format(self.value)
 
     def evaluate(self, scope):
-        raise NotImplementedError
+        return self
+
+    def accept(self, visitor):
+        return visitor.visit_number(self)
 
 
 class Function(ASTNode):
@@ -47,11 +260,27 @@ class Function(ASTNode):
 
     Аналогично Number, метод evaluate должен возвращать self.
     """
+    __slots__ = ('args', 'body')
+
     def __init__(self, args, body):
-        pass
+        object.__setattr__(self, 'args', args)
+        object.__setattr__(self, 'body', body)
 
     def evaluate(self, scope):
-        raise NotImplementedError
+        return self
+
+    def call(self, args, scope):
+        """
+        Вычисляет тело функции в новом Scope, дочернем для scope,
+        в котором имена аргументов связаны со значениями args.
+        """
+        call_scope = Scope(scope)
+        for name, value in zip(self.args, args):
+            call_scope[name] = value
+        return evaluate_block(self.body, call_scope)
+
+    def accept(self, visitor):
+        return visitor.visit_function(self)
 
 
 class FunctionDefinition(ASTNode):
@@ -63,11 +292,18 @@ class FunctionDefinition(ASTNode):
     обновление текущего Scope,  т.е. в него добавляется новое значение типа
     Function под заданным именем, а возвращать evaluate должен саму функцию.
     """
+    __slots__ = ('name', 'function')
+
     def __init__(self, name, function):
-        pass
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'function', function)
 
     def evaluate(self, scope):
-        raise NotImplementedError
+        scope[self.name] = self.function
+        return self.function
+
+    def accept(self, visitor):
+        return visitor.visit_function_definition(self)
 
 
 class Conditional(ASTNode):
@@ -87,11 +323,22 @@ class Conditional(ASTNode):
     Если соответствующий список пуст или равен None, то возвращаемое значение
     остается на ваше усмотрение.
     """
+    __slots__ = ('condition', 'if_true', 'if_false')
+
     def __init__(self, condition, if_true, if_false=None):
-        pass
+        object.__setattr__(self, 'condition', condition)
+        object.__setattr__(self, 'if_true', if_true)
+        object.__setattr__(self, 'if_false', if_false)
 
     def evaluate(self, scope):
-        raise NotImplementedError
+        if self.condition.evaluate(scope).value:
+            block = self.if_true
+        else:
+            block = self.if_false
+        return evaluate_block(block, scope)
+
+    def accept(self, visitor):
+        return visitor.visit_conditional(self)
 
 
 class Print(ASTNode):
@@ -108,11 +355,18 @@ class Print(ASTNode):
     Возвращаемое значение метода evаluate - объект типа Number, который был
     выведен.
     """
+    __slots__ = ('expr',)
+
     def __init__(self, expr):
-        pass
+        object.__setattr__(self, 'expr', expr)
 
     def evaluate(self, scope):
-        raise NotImplementedError
+        result = self.expr.evaluate(scope)
+        print(result.value, file=scope.stdout)
+        return result
+
+    def accept(self, visitor):
+        return visitor.visit_print(self)
 
 
 class Read(ASTNode):
@@ -128,11 +382,28 @@ class Read(ASTNode):
     Каждое входное число располагается на отдельной строке (никаких пустых
     строк и лишних символов не будет).
     """
+    __slots__ = ('name',)
+
     def __init__(self, name):
-        pass
+        object.__setattr__(self, 'name', name)
 
     def evaluate(self, scope):
-        raise NotImplementedError
+        result = Number(read_number(scope.stdin))
+        scope[self.name] = result
+        return result
+
+    def accept(self, visitor):
+        return visitor.visit_read(self)
+
+
+def read_number(stdin=None):
+    """Читает число на отдельной строке из stdin (None - sys.stdin)."""
+    if stdin is None:
+        return int(input())
+    line = stdin.readline()
+    if not line:
+        raise EOFError('EOF when reading a line')
+    return int(line)
 
 
 class FunctionCall(ASTNode):
@@ -159,11 +430,19 @@ class FunctionCall(ASTNode):
     метода evaluate. Если результат вычисления последнего выражения
     неопределён, то возвращаемое значение остаётся на ваше усмотрение.
     """
+    __slots__ = ('fun_expr', 'args')
+
     def __init__(self, fun_expr, args):
-        pass
+        object.__setattr__(self, 'fun_expr', fun_expr)
+        object.__setattr__(self, 'args', args)
 
     def evaluate(self, scope):
-        raise NotImplementedError
+        function = self.fun_expr.evaluate(scope)
+        args = [arg.evaluate(scope) for arg in self.args]
+        return function.call(args, scope)
+
+    def accept(self, visitor):
+        return visitor.visit_function_call(self)
 
 
 class Reference(ASTNode):
@@ -172,11 +451,16 @@ class Reference(ASTNode):
     Метод evaluate должен найти в scope объект с именем name и вернуть его
     (см. подробнее про класс Scope).
     """
+    __slots__ = ('name',)
+
     def __init__(self, name):
-        pass
+        object.__setattr__(self, 'name', name)
 
     def evaluate(self, scope):
-        raise NotImplementedError
+        return scope[self.name]
+
+    def accept(self, visitor):
+        return visitor.visit_reference(self)
 
 
 class BinaryOperation(ASTNode):
@@ -199,11 +483,20 @@ class BinaryOperation(ASTNode):
     Гарантируется, что lhs и rhs при вычислении дадут объект типа Number,
     т.е. не может получиться так, что вам придется сравнивать две функции.
     """
+    __slots__ = ('lhs', 'op', 'rhs')
+
     def __init__(self, lhs, op, rhs):
-        pass
+        object.__setattr__(self, 'lhs', lhs)
+        object.__setattr__(self, 'op', op)
+        object.__setattr__(self, 'rhs', rhs)
 
     def evaluate(self, scope):
-        raise NotImplementedError
+        lhs = self.lhs.evaluate(scope).value
+        rhs = self.rhs.evaluate(scope).value
+        return Number(int(BINARY_OPERATIONS[self.op](lhs, rhs)))
+
+    def accept(self, visitor):
+        return visitor.visit_binary_operation(self)
 
 
 class UnaryOperation(ASTNode):
@@ -217,8 +510,136 @@ class UnaryOperation(ASTNode):
     Как и для BinaryOperation, Number, хранящий 0, считаем за False, а все
     остальные за True.
     """
+    __slots__ = ('op', 'expr')
+
     def __init__(self, op, expr):
-        pass
+        object.__setattr__(self, 'op', op)
+        object.__setattr__(self, 'expr', expr)
 
     def evaluate(self, scope):
-        raise NotImplementedError
+        value = self.expr.evaluate(scope).value
+        return Number(int(UNARY_OPERATIONS[self.op](value)))
+
+    def accept(self, visitor):
+        return visitor.visit_unary_operation(self)
+
+
+BINARY_OPERATIONS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.floordiv,
+    '%': operator.mod,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '&&': lambda lhs, rhs: bool(lhs) and bool(rhs),
+    '||': lambda lhs, rhs: bool(lhs) or bool(rhs),
+}
+
+UNARY_OPERATIONS = {
+    '-': operator.neg,
+    '!': operator.not_,
+}
+
+
+def evaluate_block(block, scope):
+    """
+    Вычисляет список выражений по порядку и возвращает результат последнего.
+    Для пустого списка или None возвращает Number(0).
+    """
+    result = Number(0)
+    for expr in block or []:
+        result = expr.evaluate(scope)
+    return result
+
+
+class NodeFactory:
+    """
+    Строит узлы с хеш-консингом: узел того же типа с теми же полями
+    (потомки сравниваются по идентичности) создаётся только один раз,
+    а повторный запрос возвращает уже построенный объект. Так Number(0)
+    или Reference('n') хранятся в программе в одном экземпляре.
+
+    Списки выражений и имён в построенных узлах хранятся как кортежи,
+    которые тоже не повторяются. Фабрика держит ссылки на все построенные
+    узлы, пока жива сама.
+    """
+    def __init__(self):
+        self.nodes = {}
+        self.tuples = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def make(self, cls, *fields):
+        values = []
+        key = [cls]
+        for field in fields:
+            if isinstance(field, (list, tuple)):
+                field = self.make_tuple(field)
+            values.append(field)
+            key.append(field_key(field))
+        node = self.nodes.get(tuple(key))
+        if node is None:
+            node = self.nodes[tuple(key)] = cls(*values)
+        return node
+
+    def make_tuple(self, items):
+        items = tuple(items)
+        return self.tuples.setdefault(tuple(map(field_key, items)), items)
+
+    def intern(self, node):
+        """
+        Возвращает построенную фабрикой копию дерева node. Дерево
+        обходится без рекурсии, поэтому глубина не ограничена стеком
+        Python; общие поддеревья обрабатываются один раз.
+        """
+        interned = {}
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if id(current) in interned:
+                stack.pop()
+                continue
+            cls, fields = current.__reduce__()
+            children = [child for child in child_nodes(fields)
+                        if id(child) not in interned]
+            if children:
+                stack.extend(children)
+                continue
+            stack.pop()
+            interned[id(current)] = self.make(
+                cls, *(intern_field(field, interned) for field in fields))
+        return interned[id(node)]
+
+
+def child_nodes(fields):
+    """Узлы среди полей fields, в том числе внутри списков и кортежей."""
+    for field in fields:
+        if isinstance(field, ASTNode):
+            yield field
+        elif isinstance(field, (list, tuple)):
+            yield from child_nodes(field)
+
+
+def intern_field(field, interned):
+    """Поле с узлами, заменёнными на их копии из interned."""
+    if isinstance(field, ASTNode):
+        return interned[id(field)]
+    if isinstance(field, (list, tuple)):
+        return tuple(intern_field(item, interned) for item in field)
+    return field
+
+
+def field_key(field):
+    if isinstance(field, (str, int)) or field is None:
+        # Тип входит в ключ, иначе True и 1 были бы одним и тем же полем.
+        return type(field), field
+    # Потомки и кортежи из фабрики сравниваются по идентичности. Узел
+    # ссылается на них, поэтому, пока он лежит в фабрике, их id не
+    # достанутся другим объектам.
+    return id(field)
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Конвейер оптимизирующих проходов над программой на ЯТЬ.
+
+Программа - это список команд. Каждый проход - наследник ASTTransformer
+(а значит, и ASTNodeVisitor) с методом run(statements), возвращающим
+новый список команд; исходное дерево не меняется. Pipeline запускает
+проходы по очереди, пока они что-то меняют, и для каждого прохода
+считает, сколько узлов он убрал.
+
+Узлы считаются по идентичности, поэтому SubexpressionSharer, который
+не меняет текст программы, а только делает одинаковые подвыражения одним
+объектом, тоже уменьшает их количество.
+"""
+import collections
+from model import *
+from transformer import ASTTransformer
+from folder import ConstantFolder
+from memo import PurityAnalysis
+
+
+def optimize(statements, passes=None, max_rounds=4, factory=None):
+    """Возвращает пару (оптимизированные команды, отчёт Pipeline.report)."""
+    pipeline = Pipeline(passes, max_rounds, factory)
+    return pipeline.run(statements), pipeline.report
+
+
+class Pipeline:
+    """
+    passes - список классов проходов; для каждого запуска создаётся новый
+    экземпляр. report - словарь: имя прохода -> сколько узлов он убрал
+    (отрицательное число, если проход, например Inliner, их добавил).
+    Новые узлы проходы строят через factory, если она задана.
+    """
+    def __init__(self, passes=None, max_rounds=4, factory=None):
+        if passes is None:
+            passes = DEFAULT_PASSES
+        self.passes = passes
+        self.max_rounds = max_rounds
+        self.factory = factory
+        self.report = collections.OrderedDict(
+            (optimization.__name__, 0) for optimization in passes)
+
+    def run(self, statements):
+        size = count_nodes(statements)
+        for _ in range(self.max_rounds):
+            changed = False
+            for optimization in self.passes:
+                optimizer = optimization()
+                optimizer.factory = self.factory
+                result = optimizer.run(statements)
+                if result is statements:
+                    continue
+                changed = True
+                statements = result
+                new_size = count_nodes(statements)
+                self.report[optimization.__name__] += size - new_size
+                size = new_size
+            if not changed:
+                break
+        return statements
+
+
+class Optimization(ASTTransformer):
+    def run(self, statements):
+        return self.transform_block(statements)
+
+
+class ConstantFolding(ConstantFolder, Optimization):
+    pass
+
+
+class DeadBranchEliminator(Optimization):
+    """
+    Убирает Conditional с условием-константой: в списке выражений он
+    заменяется на выражения выбранной ветки, в остальных местах
+    от него остаётся только выбранная ветка.
+    """
+    def transform_block(self, block):
+        if block is None:
+            return None
+        result = []
+        changed = False
+        for position, expr in enumerate(block):
+            new = self.transform(expr)
+            chosen = self.chosen_branch(new)
+            if chosen is None:
+                result.append(new)
+                changed = changed or new is not expr
+                continue
+            changed = True
+            result.extend(chosen)
+            if not chosen and position == len(block) - 1:
+                # Значение пустой ветки - Number(0), как у evaluate_block.
+                result.append(self.make(Number, 0))
+        return result if changed else block
+
+    def chosen_branch(self, node):
+        if (not isinstance(node, Conditional) or
+                not isinstance(node.condition, Number)):
+            return None
+        if node.condition.value:
+            return node.if_true or []
+        return node.if_false or []
+
+    def visit_conditional(self, node):
+        node = super().visit_conditional(node)
+        chosen = self.chosen_branch(node)
+        if chosen is None:
+            return node
+        if len(chosen) == 1:
+            return chosen[0]
+        if node.condition.value and node.if_false:
+            return self.make(Conditional, node.condition, node.if_true)
+        if not node.condition.value and node.if_true:
+            return self.make(Conditional, node.condition, [], node.if_false)
+        return node
+
+
+class AlgebraicSimplifier(Optimization):
+    """
+    Упрощает x + 0, 0 + x, x - 0, x * 1, 1 * x, x / 1 до x,
+    а x - x и x * 0, 0 * x до 0, если x не имеет побочных эффектов.
+    """
+    def visit_binary_operation(self, node):
+        node = super().visit_binary_operation(node)
+        lhs, rhs = node.lhs, node.rhs
+        if node.op in ('+', '-', '*', '/') and rhs == IDENTITIES[node.op]:
+            return lhs
+        if node.op in ('+', '*') and lhs == IDENTITIES[node.op]:
+            return rhs
+        if node.op == '*' and Number(0) in (lhs, rhs):
+            other = rhs if lhs == Number(0) else lhs
+            if is_pure_expression(other):
+                return self.make(Number, 0)
+        if (node.op == '-' and is_pure_expression(lhs) and
+                same_expression(lhs, rhs)):
+            return self.make(Number, 0)
+        return node
+
+
+IDENTITIES = {'+': Number(0), '-': Number(0), '*': Number(1), '/': Number(1)}
+
+
+class Inliner(Optimization):
+    """
+    Подставляет тело небольшой функции на место её вызова.
+
+    Подставляются только функции со стабильным именем (см. memo), телом
+    из одного выражения без вызовов, определений, Read и анонимных
+    функций (значит, они не рекурсивны и ничего не связывают в Scope
+    вызова), и только если все аргументы - числа или имена: их можно
+    вычислять сколько угодно раз в любом порядке.
+
+    Кроме того, к месту вызова определение функции должно уже выполниться
+    в том же Scope: стоять раньше в том же списке команд или в объемлющем
+    (ветки Conditional выполняются в том же Scope). Иначе имя может быть
+    ещё не связано, и вызов должен бросить KeyError. Тело функции может
+    выполниться в любом Scope, куда попадёт её значение, поэтому в телах
+    учитываются только определения с верхнего уровня программы.
+    """
+    max_size = 16
+
+    def run(self, statements):
+        analysis = PurityAnalysis()
+        analysis.analyze(statements)
+        self.functions = {}
+        for name in analysis.stable_names():
+            function = analysis.definitions[name][0]
+            if (len(function.body) == 1 and
+                    count_nodes(function.body) <= self.max_size and
+                    function.body[0].accept(InlinableCheck())):
+                self.functions[name] = function
+        self.defined = self.program_defined = set()
+        return self.transform_statements(statements)
+
+    def transform_statements(self, block):
+        """
+        Преобразует команды по порядку и добавляет в self.defined имена
+        подставляемых функций, определения которых уже выполнились.
+        """
+        if block is None:
+            return None
+        result = []
+        for node in block:
+            result.append(self.transform(node))
+            if (isinstance(node, FunctionDefinition) and
+                    node.name in self.functions):
+                self.defined.add(node.name)
+        if all(new is old for new, old in zip(result, block)):
+            return block
+        return result
+
+    def transform_block(self, block):
+        outer = self.defined
+        self.defined = set(outer)
+        try:
+            return self.transform_statements(block)
+        finally:
+            self.defined = outer
+
+    def visit_function(self, node):
+        outer = self.defined
+        self.defined = self.program_defined
+        try:
+            return super().visit_function(node)
+        finally:
+            self.defined = outer
+
+    def visit_function_call(self, node):
+        node = super().visit_function_call(node)
+        if (not isinstance(node.fun_expr, Reference) or
+                node.fun_expr.name not in self.defined):
+            return node
+        function = self.functions[node.fun_expr.name]
+        if (len(function.args) != len(node.args) or
+                not all(isinstance(arg, (Number, Reference))
+                        for arg in node.args)):
+            return node
+        substitution = Substitution(dict(zip(function.args, node.args)))
+        substitution.factory = self.factory
+        return substitution.transform(function.body[0])
+
+
+class InlinableCheck(ASTNodeVisitor):
+    def visit_number(self, node):
+        return True
+
+    def visit_function(self, node):
+        return False
+
+    def visit_function_definition(self, node):
+        return False
+
+    def visit_conditional(self, node):
+        return all(expr.accept(self) for expr in
+                   [node.condition] + (node.if_true or []) +
+                   (node.if_false or []))
+
+    def visit_print(self, node):
+        return node.expr.accept(self)
+
+    def visit_read(self, node):
+        return False
+
+    def visit_function_call(self, node):
+        return False
+
+    def visit_reference(self, node):
+        return True
+
+    def visit_binary_operation(self, node):
+        return node.lhs.accept(self) and node.rhs.accept(self)
+
+    def visit_unary_operation(self, node):
+        return node.expr.accept(self)
+
+
+class Substitution(ASTTransformer):
+    def __init__(self, values):
+        self.values = values
+
+    def visit_reference(self, node):
+        return self.values.get(node.name, node)
+
+
+class SubexpressionSharer(Optimization):
+    """
+    Делает одинаковые выражения без побочных эффектов (Number, Reference
+    и операции над ними) одним и тем же объектом.
+    """
+    def __init__(self):
+        self.shared = {}
+
+    def share(self, key, node):
+        return self.shared.setdefault(key, node)
+
+    def visit_number(self, node):
+        return self.share(('number', node.value), node)
+
+    def visit_reference(self, node):
+        return self.share(('reference', node.name), node)
+
+    def visit_binary_operation(self, node):
+        node = super().visit_binary_operation(node)
+        return self.share(
+            ('binary', id(node.lhs), node.op, id(node.rhs)), node)
+
+    def visit_unary_operation(self, node):
+        node = super().visit_unary_operation(node)
+        return self.share(('unary', node.op, id(node.expr)), node)
+
+
+DEFAULT_PASSES = [
+    Inliner,
+    ConstantFolding,
+    AlgebraicSimplifier,
+    DeadBranchEliminator,
+    SubexpressionSharer,
+]
+
+
+def is_pure_expression(node):
+    return node.accept(PureExpressionCheck())
+
+
+def same_expression(lhs, rhs):
+    """Сравнивает два выражения без побочных эффектов по структуре."""
+    return lhs.accept(ExpressionKey()) == rhs.accept(ExpressionKey())
+
+
+class PureExpressionCheck(InlinableCheck):
+    """Выражение из чисел, имён и операций над ними."""
+    def visit_conditional(self, node):
+        return False
+
+    def visit_print(self, node):
+        return False
+
+
+class ExpressionKey(ASTNodeVisitor):
+    def visit_number(self, node):
+        return ('number', node.value)
+
+    def visit_function(self, node):
+        return ('function', id(node))
+
+    def visit_function_definition(self, node):
+        return ('definition', id(node))
+
+    def visit_conditional(self, node):
+        return ('conditional', id(node))
+
+    def visit_print(self, node):
+        return ('print', id(node))
+
+    def visit_read(self, node):
+        return ('read', id(node))
+
+    def visit_function_call(self, node):
+        return ('call', id(node))
+
+    def visit_reference(self, node):
+        return ('reference', node.name)
+
+    def visit_binary_operation(self, node):
+        return ('binary', node.lhs.accept(self), node.op,
+                node.rhs.accept(self))
+
+    def visit_unary_operation(self, node):
+        return ('unary', node.op, node.expr.accept(self))
+
+
+def count_nodes(statements):
+    """Количество различных (по идентичности) узлов в списке команд."""
+    counter = NodeCounter()
+    for statement in statements:
+        statement.accept(counter)
+    return len(counter.seen)
+
+
+class NodeCounter(ASTNodeVisitor):
+    def __init__(self):
+        self.seen = set()
+
+    def visit_block(self, block):
+        for expr in block or []:
+            expr.accept(self)
+
+    def enter(self, node):
+        if id(node) in self.seen:
+            return False
+        self.seen.add(id(node))
+        return True
+
+    def visit_number(self, node):
+        self.enter(node)
+
+    def visit_function(self, node):
+        if self.enter(node):
+            self.visit_block(node.body)
+
+    def visit_function_definition(self, node):
+        if self.enter(node):
+            node.function.accept(self)
+
+    def visit_conditional(self, node):
+        if self.enter(node):
+            node.condition.accept(self)
+            self.visit_block(node.if_true)
+            self.visit_block(node.if_false)
+
+    def visit_print(self, node):
+        if self.enter(node):
+            node.expr.accept(self)
+
+    def visit_read(self, node):
+        self.enter(node)
+
+    def visit_function_call(self, node):
+        if self.enter(node):
+            node.fun_expr.accept(self)
+            self.visit_block(node.args)
+
+    def visit_reference(self, node):
+        self.enter(node)
+
+    def visit_binary_operation(self, node):
+        if self.enter(node):
+            node.lhs.accept(self)
+            node.rhs.accept(self)
+
+    def visit_unary_operation(self, node):
+        if self.enter(node):
+            node.expr.accept(self)
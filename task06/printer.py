@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Форматирование программ на ЯТЬ.
+
+PrettyPrinter не строит текст программы целиком: он пишет его кусками
+в буфер и сбрасывает буфер в out, как только там набирается buffer_size
+символов. out - любой файлоподобный объект, текстовый (sys.stdout,
+io.StringIO) или двоичный (файл, открытый в режиме 'wb', канал,
+io.BytesIO); в двоичный текст пишется в кодировке encoding. Без out
+PrettyPrinter ничего не выводит, а собирает текст, который возвращает
+getvalue(); в стандартный поток вывода пишет только pretty_print.
+
+Как и StackEvaluator, PrettyPrinter не использует рекурсию: вся
+незавершённая работа лежит в стеке tasks, поэтому глубина вложенности
+программы ограничена только памятью, а время работы линейно по размеру
+вывода.
+"""
+import io
+import sys
+from model import *
+
+BUFFER_SIZE = 64 * 1024
+
+
+def pretty_print(program, out=None):
+    """Выводит команду program в out (по умолчанию - sys.stdout)."""
+    printer = PrettyPrinter(sys.stdout if out is None else out)
+    printer.print_statement(program)
+    printer.flush()
+
+
+def is_binary(out):
+    return (isinstance(out, (io.RawIOBase, io.BufferedIOBase)) or
+            'b' in getattr(out, 'mode', ''))
+
+
+class PrettyPrinter(ASTNodeVisitor):
+    def __init__(self, out=None, indent='    ', buffer_size=BUFFER_SIZE,
+                 encoding='utf-8'):
+        if out is None:
+            out = io.StringIO()
+        self.out = out
+        self.binary = is_binary(out)
+        self.encoding = encoding
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.buffered = 0
+        self.indent = indent
+        self.indents = ['']
+        self.level = 0
+        self.closed_block = False
+        self.tasks = []
+
+    def print_statement(self, node):
+        """Выводит одну команду; в out она попадёт не позже flush()."""
+        self.tasks.append((self.statement, node))
+        tasks = self.tasks
+        while tasks:
+            action, argument = tasks.pop()
+            action(argument)
+
+    def print_statements(self, statements):
+        """Выводит команды по одной; statements может быть генератором."""
+        for statement in statements:
+            self.print_statement(statement)
+
+    def flush(self):
+        self.write_buffer()
+        flush = getattr(self.out, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def getvalue(self):
+        """
+        Возвращает выведенный текст, если PrettyPrinter создан без out.
+        """
+        self.write_buffer()
+        return self.out.getvalue()
+
+    def write(self, text):
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.buffer_size:
+            self.write_buffer()
+
+    def write_buffer(self):
+        if not self.buffer:
+            return
+        text = ''.join(self.buffer)
+        self.buffer = []
+        self.buffered = 0
+        if self.binary:
+            self.out.write(text.encode(self.encoding))
+        else:
+            self.out.write(text)
+
+    def schedule(self, *steps):
+        """
+        Планирует шаги (действие, аргумент) в порядке перечисления;
+        чтобы посетить узел, планируется (node.accept, self).
+        """
+        self.tasks.extend(reversed(steps))
+
+    def statement(self, node):
+        self.write(self.indents[self.level])
+        self.closed_block = False
+        self.schedule((node.accept, self), (self.end_statement, None))
+
+    def end_statement(self, _):
+        # После команды, закончившейся на '}', точка с запятой не нужна.
+        self.write('\n' if self.closed_block else ';\n')
+
+    def block(self, statements):
+        """Шаги для блока команд в фигурных скобках."""
+        steps = [(self.write, ' {\n'), (self.enter, None)]
+        steps += [(self.statement, statement)
+                  for statement in statements or []]
+        steps.append((self.leave, None))
+        return steps
+
+    def enter(self, _):
+        self.level += 1
+        if self.level == len(self.indents):
+            self.indents.append(self.indents[-1] + self.indent)
+
+    def leave(self, _):
+        self.level -= 1
+        self.write(self.indents[self.level] + '}')
+        self.closed_block = True
+
+    def operand(self, node, priority):
+        """Шаги для подвыражения, которое связывает не слабее priority."""
+        if node.accept(PRIORITY) >= priority:
+            return [(node.accept, self)]
+        return [(self.write, '('), (node.accept, self), (self.write, ')')]
+
+    def visit_number(self, node):
+        self.write(str(node.value))
+
+    def visit_function(self, node):
+        self.write('(' + ', '.join(node.args) + ')')
+        self.schedule(*self.block(node.body))
+
+    def visit_function_definition(self, node):
+        self.write('def ' + node.name)
+        self.schedule((node.function.accept, self))
+
+    def visit_conditional(self, node):
+        self.write('if (')
+        steps = [(node.condition.accept, self), (self.write, ')')]
+        steps += self.block(node.if_true)
+        if node.if_false:
+            steps.append((self.write, ' else'))
+            steps += self.block(node.if_false)
+        self.schedule(*steps)
+
+    def visit_print(self, node):
+        self.write('print ')
+        self.schedule((node.expr.accept, self))
+
+    def visit_read(self, node):
+        self.write('read ' + node.name)
+
+    def visit_function_call(self, node):
+        steps = self.operand(node.fun_expr, ATOM)
+        steps.append((self.write, '('))
+        for position, arg in enumerate(node.args):
+            if position:
+                steps.append((self.write, ', '))
+            steps.append((arg.accept, self))
+        steps.append((self.write, ')'))
+        self.schedule(*steps)
+
+    def visit_reference(self, node):
+        self.write(node.name)
+
+    def visit_binary_operation(self, node):
+        priority = BINARY_PRIORITIES[node.op]
+        # Все бинарные операции левоассоциативны.
+        self.schedule(*(self.operand(node.lhs, priority) +
+                        [(self.write, ' ' + node.op + ' ')] +
+                        self.operand(node.rhs, priority + 1)))
+
+    def visit_unary_operation(self, node):
+        self.write(node.op)
+        # Две унарные операции подряд разделяются скобками: -(-x).
+        self.schedule(*self.operand(node.expr, UNARY + 1))
+
+
+BINARY_PRIORITIES = {
+    '||': 1,
+    '&&': 2,
+    '==': 3, '!=': 3,
+    '<': 4, '<=': 4, '>': 4, '>=': 4,
+    '+': 5, '-': 5,
+    '*': 6, '/': 6, '%': 6,
+}
+
+UNARY = 7
+
+ATOM = 8
+
+
+class Priority(ASTNodeVisitor):
+    """Приоритет выражения: насколько сильно оно связывает операнды."""
+    def visit_number(self, node):
+        # Отрицательное число выглядит как унарный минус.
+        return UNARY if node.value < 0 else ATOM
+
+    def visit_function(self, node):
+        return ATOM
+
+    def visit_function_definition(self, node):
+        return ATOM
+
+    def visit_conditional(self, node):
+        return ATOM
+
+    def visit_print(self, node):
+        return ATOM
+
+    def visit_read(self, node):
+        return ATOM
+
+    def visit_function_call(self, node):
+        return ATOM
+
+    def visit_reference(self, node):
+        return ATOM
+
+    def visit_binary_operation(self, node):
+        return BINARY_PRIORITIES[node.op]
+
+    def visit_unary_operation(self, node):
+        return UNARY
+
+
+PRIORITY = Priority()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Профилирование программ на ЯТЬ, вычисляемых через ASTNode.evaluate.
+
+Profiler включается явно (start/stop или with) и только на это время
+подменяет FunctionCall.evaluate (а с count_nodes=True - и evaluate всех
+остальных узлов) на версии, которые ведут учёт. stop() возвращает
+исходные методы, поэтому выключенный профилировщик ничего не стоит.
+
+Для каждой функции ЯТЬ считаются вызовы, время с вложенными вызовами
+(inclusive; рекурсивные вызовы внутри уже идущего не считаются повторно,
+как в cProfile), собственное время (exclusive) и наибольшая глубина
+рекурсии. Функция называется по имени, через которое её вызвали;
+если вызывали не по имени, - '<anonymous>'.
+
+Результат можно записать в формате pstats (dump_stats, читается
+pstats.Stats и snakeviz) или как свёрнутые стеки для flamegraph.pl
+(write_folded): строка "main;f;g 123" - собственное время стека
+в микросекундах.
+"""
+import collections
+import marshal
+import time
+from model import *
+
+NODE_CLASSES = [
+    Number, Function, FunctionDefinition, Conditional, Print, Read,
+    FunctionCall, Reference, BinaryOperation, UnaryOperation,
+]
+
+ANONYMOUS = '<anonymous>'
+
+
+class FunctionStats:
+    __slots__ = ('calls', 'primitive_calls', 'inclusive', 'exclusive',
+                 'max_depth', 'callers')
+
+    def __init__(self):
+        self.calls = 0
+        self.primitive_calls = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.max_depth = 0
+        # Имя вызывающей функции (None - верхний уровень) ->
+        # [calls, primitive_calls, exclusive, inclusive], в том же
+        # порядке, что и (nc, cc, tt, ct) у вызывающих в pstats.
+        self.callers = collections.defaultdict(lambda: [0, 0, 0.0, 0.0])
+
+
+class CallTreeNode:
+    __slots__ = ('children', 'exclusive')
+
+    def __init__(self):
+        self.children = {}
+        self.exclusive = 0.0
+
+
+class Profiler:
+    # Запущенный профилировщик: методы классов подменяются глобально,
+    # поэтому одновременно может работать только один.
+    active = None
+
+    def __init__(self, count_nodes=False, clock=time.perf_counter):
+        self.count_nodes = count_nodes
+        self.clock = clock
+        self.stats = collections.defaultdict(FunctionStats)
+        self.node_counts = collections.Counter()
+        self.call_tree = CallTreeNode()
+        # Кадры: [имя, начало, время вложенных вызовов, узел дерева].
+        self.frames = []
+        self.depths = collections.Counter()
+        self.originals = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def enabled(self):
+        return self.originals is not None
+
+    def start(self):
+        if Profiler.active is not None:
+            raise RuntimeError('another Profiler is already running')
+        Profiler.active = self
+        self.originals = {cls: cls.evaluate for cls in NODE_CLASSES}
+        if self.count_nodes:
+            for cls in NODE_CLASSES:
+                cls.evaluate = self.counting(cls.evaluate, cls.__name__)
+        FunctionCall.evaluate = self.profiled_call()
+
+    def stop(self):
+        if self.originals is None:
+            return
+        for cls, evaluate in self.originals.items():
+            cls.evaluate = evaluate
+        self.originals = None
+        Profiler.active = None
+
+    def counting(self, evaluate, name):
+        node_counts = self.node_counts
+
+        def counted_evaluate(node, scope):
+            node_counts[name] += 1
+            return evaluate(node, scope)
+        return counted_evaluate
+
+    def profiled_call(self):
+        """
+        Версия FunctionCall.evaluate с учётом времени: аргументы
+        вычисляются в кадре вызывающего, тело - в кадре вызываемого.
+        """
+        profiler = self
+        node_counts = self.node_counts
+        count_nodes = self.count_nodes
+
+        def profiled_evaluate(node, scope):
+            if count_nodes:
+                node_counts['FunctionCall'] += 1
+            function = node.fun_expr.evaluate(scope)
+            args = [arg.evaluate(scope) for arg in node.args]
+            name = node.fun_expr.name if isinstance(
+                node.fun_expr, Reference) else ANONYMOUS
+            profiler.enter(name)
+            try:
+                return function.call(args, scope)
+            finally:
+                profiler.leave()
+        return profiled_evaluate
+
+    def enter(self, name):
+        parent = self.frames[-1][3] if self.frames else self.call_tree
+        tree_node = parent.children.get(name)
+        if tree_node is None:
+            tree_node = parent.children[name] = CallTreeNode()
+        self.depths[name] += 1
+        self.frames.append([name, self.clock(), 0.0, tree_node])
+
+    def leave(self):
+        name, start, children, tree_node = self.frames.pop()
+        elapsed = self.clock() - start
+        exclusive = elapsed - children
+        tree_node.exclusive += exclusive
+        depth = self.depths[name]
+        self.depths[name] = depth - 1
+        primitive = depth == 1
+        stats = self.stats[name]
+        stats.calls += 1
+        stats.exclusive += exclusive
+        stats.max_depth = max(stats.max_depth, depth)
+        caller = None
+        if self.frames:
+            self.frames[-1][2] += elapsed
+            caller = self.frames[-1][0]
+        edge = stats.callers[caller]
+        edge[0] += 1
+        edge[2] += exclusive
+        if primitive:
+            stats.primitive_calls += 1
+            stats.inclusive += elapsed
+            edge[1] += 1
+            edge[3] += elapsed
+
+    def pstats_data(self):
+        """Словарь в формате, который pstats.Stats читает из файла."""
+        data = {}
+        for name, stats in self.stats.items():
+            callers = {function_key(caller): tuple(edge)
+                       for caller, edge in stats.callers.items()
+                       if caller is not None}
+            data[function_key(name)] = (
+                stats.primitive_calls, stats.calls, stats.exclusive,
+                stats.inclusive, callers)
+        return data
+
+    def dump_stats(self, path):
+        with open(path, 'wb') as file:
+            marshal.dump(self.pstats_data(), file)
+
+    def folded_stacks(self):
+        """Пары (стек через ';', собственное время в микросекундах)."""
+        result = []
+        stack = [(name, child) for name, child in
+                 reversed(list(self.call_tree.children.items()))]
+        while stack:
+            path, node = stack.pop()
+            microseconds = round(node.exclusive * 10 ** 6)
+            if microseconds:
+                result.append((path, microseconds))
+            for name, child in reversed(list(node.children.items())):
+                stack.append((path + ';' + name, child))
+        return result
+
+    def write_folded(self, out):
+        for path, microseconds in self.folded_stacks():
+            out.write('{} {}\n'.format(path, microseconds))
+
+
+def function_key(name):
+    return ('<ЯТЬ>', 0, name)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import concurrent.futures
+import pytest
+from model import *
+from batch import *
+
+
+def echo_program():
+    return [
+        Read('x'),
+        Print(BinaryOperation(Reference('x'), '*', Number(2))),
+    ]
+
+
+def forever_program():
+    return [
+        FunctionDefinition('loop', Function([], [
+            FunctionCall(Reference('loop'), [])
+        ])),
+        Print(Number(1)),
+        FunctionCall(Reference('loop'), []),
+    ]
+
+
+def test_run_job():
+    assert run_job((echo_program(), '21\n')) == JobResult('42\n', None)
+
+
+def test_run_job_single_statement():
+    assert run_job((Print(Number(5)), '')) == JobResult('5\n', None)
+
+
+def test_run_job_keeps_streams(capsys):
+    run_job((echo_program(), '1\n'))
+    assert capsys.readouterr().out == ''
+
+
+def test_run_jobs_in_threads():
+    program = [
+        FunctionDefinition('echo', Function(['n'], [
+            Read('x'),
+            Print(Reference('x')),
+            Conditional(Reference('n'), [
+                FunctionCall(Reference('echo'), [
+                    BinaryOperation(Reference('n'), '-', Number(1))
+                ]),
+            ]),
+        ])),
+        FunctionCall(Reference('echo'), [Number(99)]),
+    ]
+    jobs = [(program, ''.join('{}\n'.format(i * 1000 + j)
+                              for j in range(100)))
+            for i in range(8)]
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(run_job, jobs))
+    assert results == [JobResult(stdin, None) for _, stdin in jobs]
+
+
+def test_run_job_error():
+    result = run_job((echo_program(), ''))
+    assert result.output == ''
+    assert result.error.startswith('EOFError')
+
+
+def test_run_job_timeout():
+    result = run_job((forever_program(), ''), timeout=0.2)
+    assert result == JobResult('1\n', 'timeout')
+
+
+def test_run_job_timeout_in_thread():
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        future = executor.submit(run_job, (Print(Number(1)), ''), 1)
+        assert future.result() == JobResult('1\n', None)
+
+
+def test_run_batch_order():
+    jobs = [(echo_program(), '{}\n'.format(i)) for i in range(20)]
+    results = run_batch(jobs, workers=2, chunksize=3)
+    assert [result.output for result in results] == [
+        '{}\n'.format(2 * i) for i in range(20)]
+    assert all(result.error is None for result in results)
+
+
+def test_run_batch_timeout_does_not_block_others():
+    jobs = [(echo_program(), '1\n'), (forever_program(), ''),
+            (echo_program(), '2\n')]
+    results = run_batch(jobs, workers=2, timeout=0.5)
+    assert results == [JobResult('2\n', None), JobResult('1\n', 'timeout'),
+                       JobResult('4\n', None)]
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+import io
+import math
+import mmap
+import pytest
+from model import *
+from bytecode import *
+
+
+def factorial_program():
+    return [
+        FunctionDefinition('fac', Function(['n'], [
+            Conditional(
+                BinaryOperation(Reference('n'), '==', Number(0)),
+                [Number(1)],
+                [
+                    BinaryOperation(
+                        Reference('n'),
+                        '*',
+                        FunctionCall(Reference('fac'), [
+                            BinaryOperation(Reference('n'), '-', Number(1))
+                        ])
+                    )
+                ]
+            )
+        ])),
+        Read('n'),
+        Print(FunctionCall(Reference('fac'), [Reference('n')])),
+    ]
+
+
+def test_factorial(capsys, monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('5\n'))
+    assert compile_bytecode(factorial_program()).run(Scope()) == Number(120)
+    assert capsys.readouterr().out == '120\n'
+
+
+@pytest.mark.parametrize('op,expected', [
+    ('+', 9), ('-', 5), ('*', 14), ('/', 3), ('%', 1),
+    ('==', 0), ('!=', 1), ('<', 0), ('>', 1), ('<=', 0), ('>=', 1),
+    ('&&', 1), ('||', 1),
+])
+def test_binary_operation(op, expected):
+    program = BinaryOperation(Number(7), op, Number(2))
+    assert compile_bytecode(program).run(Scope()) == Number(expected)
+
+
+def test_unary_operation():
+    assert compile_bytecode(UnaryOperation('-', Number(3))).run(
+        Scope()) == Number(-3)
+    assert compile_bytecode(UnaryOperation('!', Number(3))).run(
+        Scope()) == Number(0)
+
+
+def test_conditional_and_empty_blocks():
+    program = [
+        Conditional(Number(0), [Number(1)]),
+        Conditional(Number(0), [Number(1)], [Number(2), Number(3)]),
+    ]
+    assert compile_bytecode(program[:1]).run(Scope()) == Number(0)
+    assert compile_bytecode(program).run(Scope()) == Number(3)
+    assert compile_bytecode([]).run(Scope()) == Number(0)
+
+
+def test_dynamic_scope(capsys):
+    program = [
+        FunctionDefinition('show', Function([], [Print(Reference('x'))])),
+        FunctionDefinition('f', Function(['x'], [
+            FunctionCall(Reference('show'), [])
+        ])),
+        FunctionCall(Reference('f'), [Number(7)]),
+    ]
+    compile_bytecode(program).run(Scope())
+    assert capsys.readouterr().out == '7\n'
+
+
+def test_scope_in_and_out(monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('4\n'))
+    parent = Scope()
+    parent['y'] = Number(10)
+    parent['double'] = Function(['a'], [
+        BinaryOperation(Reference('a'), '*', Number(2))
+    ])
+    scope = Scope(parent)
+    program = [
+        Read('x'),
+        FunctionCall(Reference('double'), [
+            BinaryOperation(Reference('x'), '+', Reference('y'))
+        ]),
+    ]
+    assert compile_bytecode(program).run(scope) == Number(28)
+    assert scope['x'] == Number(4)
+    assert scope.items() == [('x', Number(4))]
+
+
+def test_deep_recursion():
+    program = [
+        FunctionDefinition('sum', Function(['n'], [
+            Conditional(Reference('n'), [
+                BinaryOperation(Reference('n'), '+', FunctionCall(
+                    Reference('sum'), [
+                        BinaryOperation(Reference('n'), '-', Number(1))
+                    ]))
+            ])
+        ])),
+        FunctionCall(Reference('sum'), [Number(10 ** 5)]),
+    ]
+    result = compile_bytecode(program).run(Scope())
+    assert result == Number(10 ** 5 * (10 ** 5 + 1) // 2)
+
+
+def test_tree_function_from_scope(capsys):
+    scope = Scope()
+    scope['apply'] = Function(['f', 'x'], [
+        FunctionDefinition('inner', Function([], [Reference('x')])),
+        Print(FunctionCall(Reference('f'), [Reference('x')])),
+        FunctionCall(Reference('inner'), []),
+    ])
+    program = [
+        FunctionDefinition('square', Function(['y'], [
+            BinaryOperation(Reference('y'), '*', Reference('y'))
+        ])),
+        FunctionCall(Reference('apply'), [Reference('square'), Number(7)]),
+    ]
+    assert load(compile_bytecode(program).dumps()).run(scope) == Number(7)
+    assert capsys.readouterr().out == '49\n'
+    assert [name for name, _ in scope.items()] == ['apply']
+
+
+def test_call_restores_scope_after_error():
+    program = [
+        FunctionDefinition('f', Function(['n'], [
+            Read('x'),
+            Reference('missing'),
+        ])),
+        FunctionCall(Reference('f'), [Number(1)]),
+    ]
+    scope = Scope(stdin=io.StringIO('5\n'))
+    with pytest.raises(KeyError, match='missing'):
+        compile_bytecode(program).run(scope)
+    assert [name for name, _ in scope.items()] == ['f']
+
+
+@pytest.mark.parametrize('expr', [
+    Print(Reference('f')),
+    Conditional(Reference('f'), [Number(1)]),
+    BinaryOperation(Reference('f'), '==', Reference('f')),
+    BinaryOperation(Number(1), '&&', Reference('f')),
+    UnaryOperation('!', Reference('f')),
+    FunctionCall(Number(1), []),
+])
+def test_type_errors_match_tree(expr):
+    program = [FunctionDefinition('f', Function([], [])), expr]
+    scope = Scope()
+    with pytest.raises(AttributeError) as tree_error:
+        for statement in program:
+            statement.evaluate(scope)
+    with pytest.raises(AttributeError) as vm_error:
+        compile_bytecode(program).run(Scope())
+    assert str(vm_error.value) == str(tree_error.value)
+
+
+def test_dumps_and_load(capsys, monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('30\n'))
+    data = compile_bytecode(factorial_program()).dumps()
+    assert data.startswith(MAGIC)
+    bytecode = load(data)
+    assert sorted(bytecode.names) == ['fac', 'n']
+    assert bytecode.run(Scope()) == Number(math.factorial(30))
+    assert capsys.readouterr().out == '{}\n'.format(math.factorial(30))
+
+
+def test_functions_stay_in_vm(capsys, monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('5\n5\n4\n'))
+    program = factorial_program()
+    bytecode = compile_bytecode(program)
+    scope = Scope()
+    bytecode.run(scope)
+    assert scope['fac'] is program[0].function
+    assert FunctionCall(Reference('fac'), [Number(3)]).evaluate(
+        scope) == Number(6)
+    bytecode.run(scope)
+    scope = Scope()
+    load(bytecode.dumps()).run(scope)
+    assert scope.items() == [('n', Number(4))]
+    assert capsys.readouterr().out == '120\n120\n24\n'
+
+
+def test_code_is_aligned():
+    program = [
+        FunctionDefinition('abc', Function(['xy'], [Reference('xy')])),
+        FunctionCall(Reference('abc'), [Number(12345)]),
+    ]
+    bytecode = compile_bytecode(program)
+    data = bytecode.dumps()
+    units = sum(8 + 4 * len(unit.args) + 4 * len(unit.code)
+                for unit in bytecode.units)
+    assert (len(data) - units) % 4 == 0
+    assert load(data).run(Scope()) == Number(12345)
+    padding = len(data) - units - 1
+    assert data[padding] == 0
+    with pytest.raises(ValueError):
+        load(data[:padding] + b'\1' + data[padding + 1:])
+
+
+def test_big_constants():
+    program = BinaryOperation(Number(10 ** 30), '+', Number(-1))
+    data = compile_bytecode(program).dumps()
+    assert load(data).run(Scope()) == Number(10 ** 30 - 1)
+
+
+def test_load_rejects_garbage():
+    with pytest.raises(ValueError):
+        load(b'nope')
+    data = compile_bytecode(Number(1)).dumps()
+    with pytest.raises(ValueError):
+        load(data + b'\0')
+
+
+def test_cache(tmp_path):
+    cache = BytecodeCache(str(tmp_path))
+    built = []
+
+    def build():
+        built.append(1)
+        return [BinaryOperation(Number(2), '*', Number(21))]
+
+    assert cache.load('2 * 21;', build).run(Scope()) == Number(42)
+    assert cache.load('2 * 21;', build).run(Scope()) == Number(42)
+    assert len(built) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert isinstance(cache.load('2 * 21;', build).buffer, mmap.mmap)
+    cache.load('other', build)
+    assert len(built) == 2
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_cache_rebuilds_broken_file(tmp_path):
+    cache = BytecodeCache(str(tmp_path))
+    path = cache.path('x')
+    with open(path, 'wb') as file:
+        file.write(b'garbage')
+    assert cache.load('x', lambda: [Number(5)]).run(Scope()) == Number(5)
+    assert cache.load('x', lambda: []).run(Scope()) == Number(5)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+import io
+import pytest
+from model import *
+from evaluator import evaluate
+
+
+def factorial_definition():
+    return FunctionDefinition('fac', Function(['n'], [
+        Conditional(
+            BinaryOperation(Reference('n'), '==', Number(0)),
+            [Number(1)],
+            [
+                BinaryOperation(
+                    Reference('n'),
+                    '*',
+                    FunctionCall(Reference('fac'), [
+                        BinaryOperation(Reference('n'), '-', Number(1))
+                    ])
+                )
+            ]
+        )
+    ]))
+
+
+def countdown_definition():
+    return FunctionDefinition('down', Function(['n'], [
+        Conditional(Reference('n'), [
+            FunctionCall(Reference('down'), [
+                BinaryOperation(Reference('n'), '-', Number(1))
+            ])
+        ], [Number(0)])
+    ]))
+
+
+def test_factorial(capsys, monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('5\n'))
+    scope = Scope()
+    evaluate(factorial_definition(), scope)
+    evaluate(Read('n'), scope)
+    result = evaluate(
+        Print(FunctionCall(Reference('fac'), [Reference('n')])), scope)
+    assert result == Number(120)
+    assert capsys.readouterr().out == '120\n'
+
+
+def test_function_call(capsys):
+    scope = Scope()
+    evaluate(FunctionDefinition('foo', Function(['a', 'b'], [
+        Print(BinaryOperation(Reference('a'), '+', Reference('b'))),
+    ])), scope)
+    evaluate(FunctionCall(Reference('foo'), [
+        Number(1),
+        BinaryOperation(Number(2), '+', Number(3))
+    ]), scope)
+    assert capsys.readouterr().out == '6\n'
+
+
+def test_conditional():
+    scope = Scope()
+    assert evaluate(Conditional(Number(1), [Number(2)], [Number(3)]),
+                    scope) == Number(2)
+    assert evaluate(Conditional(Number(0), [Number(2)], [Number(3)]),
+                    scope) == Number(3)
+    assert evaluate(Conditional(Number(0), [Number(2)]), scope) == Number(0)
+
+
+def test_block_result_and_order(capsys):
+    result = evaluate(FunctionCall(Function([], [
+        Print(Number(1)), Print(Number(2)), Number(3)
+    ]), []), Scope())
+    assert result == Number(3)
+    assert capsys.readouterr().out == '1\n2\n'
+
+
+@pytest.mark.parametrize('op', [
+    '+', '-', '*', '/', '%', '==', '!=', '<', '>', '<=', '>=', '&&', '||',
+])
+def test_binary_operation(op):
+    operation = BinaryOperation(Number(7), op, Number(2))
+    assert evaluate(operation, Scope()) == operation.evaluate(Scope())
+
+
+def test_unary_operation():
+    assert evaluate(UnaryOperation('-', Number(3)), Scope()) == Number(-3)
+    assert evaluate(UnaryOperation('!', Number(3)), Scope()) == Number(0)
+
+
+def test_dynamic_scope(capsys):
+    scope = Scope()
+    evaluate(FunctionDefinition('show', Function([], [
+        Print(Reference('x'))
+    ])), scope)
+    evaluate(FunctionDefinition('outer', Function(['x'], [
+        FunctionCall(Reference('show'), [])
+    ])), scope)
+    evaluate(FunctionCall(Reference('outer'), [Number(5)]), scope)
+    assert capsys.readouterr().out == '5\n'
+
+
+def test_missing_name():
+    with pytest.raises(KeyError):
+        evaluate(Reference('zoo'), Scope())
+
+
+def test_deep_recursion():
+    scope = Scope()
+    evaluate(countdown_definition(), scope)
+    call = FunctionCall(Reference('down'), [Number(100000)])
+    with pytest.raises(RecursionError):
+        call.evaluate(scope)
+    assert evaluate(call, scope) == Number(0)
+
+
+if __name__ == "__main__":
+    pytest.main()
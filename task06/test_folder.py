@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import pytest
+from model import *
+from folder import fold_constants
+
+
+def test_binary_operation_of_numbers():
+    result = fold_constants(BinaryOperation(Number(3), '*', Number(4)))
+    assert result == Number(12)
+
+
+def test_unary_operation_of_number():
+    assert fold_constants(UnaryOperation('-', Number(3))) == Number(-3)
+
+
+def test_zero_times_reference():
+    result = fold_constants(BinaryOperation(Number(0), '*', Reference('x')))
+    assert result == Number(0)
+
+
+def test_reference_times_zero():
+    result = fold_constants(BinaryOperation(Reference('x'), '*', Number(0)))
+    assert result == Number(0)
+
+
+def test_reference_minus_itself():
+    result = fold_constants(
+        BinaryOperation(Reference('x'), '-', Reference('x')))
+    assert result == Number(0)
+
+
+def test_reference_minus_other_reference():
+    node = BinaryOperation(Reference('x'), '-', Reference('y'))
+    assert fold_constants(node) is node
+
+
+def test_division_by_zero_is_kept():
+    node = BinaryOperation(Number(1), '/', Number(0))
+    assert fold_constants(node) is node
+
+
+def test_end_to_end():
+    result = fold_constants(
+        BinaryOperation(
+            Number(10),
+            '-',
+            UnaryOperation(
+                '-',
+                BinaryOperation(
+                    Number(3),
+                    '+',
+                    BinaryOperation(
+                        Reference('x'),
+                        '-',
+                        Reference('x')
+                    )
+                )
+            )
+        )
+    )
+    assert result == Number(13)
+
+
+def test_nested_structure():
+    node = FunctionDefinition('f', Function(['x'], [
+        Print(BinaryOperation(Reference('x'), '+',
+                              BinaryOperation(Number(1), '+', Number(2)))),
+        Conditional(UnaryOperation('!', Number(0)), [Read('y')]),
+    ]))
+    result = fold_constants(node)
+    body = result.function.body
+    assert result is not node
+    assert result.function.args == ['x']
+    assert body[0].expr.lhs is node.function.body[0].expr.lhs
+    assert body[0].expr.rhs == Number(3)
+    assert body[1].condition == Number(1)
+    assert body[1].if_true is node.function.body[1].if_true
+    assert node.function.body[0].expr.rhs.op == '+'
+
+
+def test_factory():
+    factory = NodeFactory()
+    x = factory.make(Reference, 'x')
+    node = factory.make(Print, factory.make(
+        BinaryOperation, x, '+',
+        factory.make(BinaryOperation, factory.make(Number, 1), '+',
+                     factory.make(Number, 2))))
+    result = fold_constants(node, factory)
+    assert result.expr.lhs is x
+    assert result.expr.rhs is factory.make(Number, 3)
+    assert fold_constants(node, factory) is result
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+import pytest
+from model import *
+from memo import *
+
+
+def fib_definition(name='fib'):
+    return FunctionDefinition(name, Function(['n'], [
+        Conditional(
+            BinaryOperation(Reference('n'), '<', Number(2)),
+            [Reference('n')],
+            [
+                BinaryOperation(
+                    FunctionCall(Reference(name), [
+                        BinaryOperation(Reference('n'), '-', Number(1))
+                    ]),
+                    '+',
+                    FunctionCall(Reference(name), [
+                        BinaryOperation(Reference('n'), '-', Number(2))
+                    ])
+                )
+            ]
+        )
+    ]))
+
+
+def pure_names(statements):
+    analysis = PurityAnalysis()
+    analysis.analyze(statements)
+    return set(analysis.pure_functions())
+
+
+def run(statements):
+    scope = Scope()
+    result = None
+    for statement in statements:
+        result = statement.evaluate(scope)
+    return result
+
+
+def test_fib_is_pure():
+    assert pure_names([fib_definition()]) == {'fib'}
+
+
+def test_pure_callee():
+    statements = [
+        fib_definition(),
+        FunctionDefinition('twice', Function(['x'], [
+            BinaryOperation(
+                FunctionCall(Reference('fib'), [Reference('x')]),
+                '*', Number(2))
+        ])),
+    ]
+    assert pure_names(statements) == {'fib', 'twice'}
+
+
+@pytest.mark.parametrize('body', [
+    [Print(Reference('n'))],
+    [Read('n')],
+    [Reference('free')],
+    [FunctionCall(Reference('impure'), [])],
+    [FunctionCall(Function([], []), [])],
+    [FunctionDefinition('inner', Function([], []))],
+])
+def test_impure(body):
+    statements = [
+        FunctionDefinition('impure', Function([], [Print(Number(1))])),
+        FunctionDefinition('f', Function(['n'], body)),
+    ]
+    assert 'f' not in pure_names(statements)
+
+
+def test_unstable_names_are_impure():
+    statements = [fib_definition(), fib_definition()]
+    assert pure_names(statements) == set()
+    statements = [fib_definition(), Read('fib')]
+    assert pure_names(statements) == set()
+    statements = [
+        fib_definition(),
+        FunctionDefinition('g', Function(['fib'], [])),
+    ]
+    assert pure_names(statements) == {'g'}
+
+
+def test_memoized_fib_is_linear():
+    memoizer = Memoizer(maxsize=16)
+    program = memoizer.memoize([
+        fib_definition(),
+        FunctionCall(Reference('fib'), [Number(30)]),
+    ])
+    assert run(program) == Number(832040)
+    assert memoizer.misses == 31
+    assert memoizer.hits == 28
+
+
+def test_memoize_does_not_change_program():
+    definition = fib_definition()
+    function = definition.function
+    program = memoize([definition])
+    assert definition.function is function
+    assert isinstance(program[0].function, MemoizedFunction)
+    assert program[0].function.body is function.body
+
+
+def test_disabled():
+    statements = [fib_definition()]
+    assert memoize(statements, enabled=False) == statements
+    memoizer = Memoizer()
+    program = memoizer.memoize(statements + [
+        FunctionCall(Reference('fib'), [Number(10)])
+    ])
+    memoizer.enabled = False
+    assert run(program) == Number(55)
+    assert memoizer.hits == memoizer.misses == 0
+
+
+def test_enabled_later():
+    memoizer = Memoizer(enabled=False)
+    program = memoizer.memoize([
+        fib_definition(),
+        FunctionCall(Reference('fib'), [Number(20)]),
+    ])
+    assert run(program) == Number(6765)
+    assert memoizer.hits == memoizer.misses == 0
+    assert len(memoizer.caches['fib']) == 0
+    memoizer.enabled = True
+    assert run(program) == Number(6765)
+    assert memoizer.misses == 21
+    assert memoizer.hits == 18
+
+
+def test_caches_by_binding():
+    factory = NodeFactory()
+    first = factory.intern(fib_definition('f'))
+    function = first.function
+    second = FunctionDefinition('g', function)
+    memoizer = Memoizer()
+    program = memoizer.memoize([
+        first,
+        second,
+        FunctionCall(Reference('f'), [Number(3)]),
+        FunctionCall(Reference('g'), [Number(3)]),
+    ])
+    assert program[0].function is not program[1].function
+    assert program[0].function.cache is memoizer.caches['f']
+    assert program[1].function.cache is memoizer.caches['g']
+    run(program)
+    assert memoizer.caches['f'].misses == 4
+    assert memoizer.caches['g'].misses == 1
+    assert memoizer.caches['g'].hits == 0
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_cache_zero_size():
+    cache = LRUCache(0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,4 +1,8 @@
 #!/usr/bin/env python3
+import copy as copy_module
+import io
+import pickle
+import sys
 import pytest
 from model import *
 
@@ -29,5 +33,168 @@ def test_construction():
     )
 
 
+class RecordingVisitor(ASTNodeVisitor):
+    def visit_number(self, node):
+        return 'number'
+
+    def visit_function(self, node):
+        return 'function'
+
+    def visit_function_definition(self, node):
+        return 'function_definition'
+
+    def visit_conditional(self, node):
+        return 'conditional'
+
+    def visit_print(self, node):
+        return 'print'
+
+    def visit_read(self, node):
+        return 'read'
+
+    def visit_function_call(self, node):
+        return 'function_call'
+
+    def visit_reference(self, node):
+        return 'reference'
+
+    def visit_binary_operation(self, node):
+        return 'binary_operation'
+
+    def visit_unary_operation(self, node):
+        return 'unary_operation'
+
+
+@pytest.mark.parametrize('node,expected', [
+    (Number(1), 'number'),
+    (Function([], []), 'function'),
+    (FunctionDefinition('f', Function([], [])), 'function_definition'),
+    (Conditional(Number(1), []), 'conditional'),
+    (Print(Number(1)), 'print'),
+    (Read('x'), 'read'),
+    (FunctionCall(Reference('f'), []), 'function_call'),
+    (Reference('x'), 'reference'),
+    (BinaryOperation(Number(1), '+', Number(2)), 'binary_operation'),
+    (UnaryOperation('-', Number(1)), 'unary_operation'),
+])
+def test_accept(node, expected):
+    assert node.accept(RecordingVisitor()) == expected
+
+
+def test_nodes_are_immutable():
+    node = BinaryOperation(Reference('x'), '+', Number(1))
+    with pytest.raises(AttributeError):
+        node.op = '-'
+    with pytest.raises(AttributeError):
+        del node.lhs
+    with pytest.raises(AttributeError):
+        node.extra = 1
+    assert not hasattr(Number(1), '__dict__')
+
+
+def test_pickle_and_copy():
+    node = Conditional(Reference('x'), [Number(1)], None)
+    for copy in (pickle.loads(pickle.dumps(node)), copy_module.deepcopy(node)):
+        assert type(copy) is Conditional
+        assert copy.condition.name == 'x'
+        assert copy.if_true == [Number(1)]
+        assert copy.if_false is None
+
+
+def test_scope_sized_by_own_names():
+    root = Scope()
+    for index in range(100):
+        root['name_{}'.format(index)] = Number(index)
+    frame = Scope(root)
+    assert frame.values == []
+    assert frame['name_42'] == Number(42)
+    frame['name_3'] = Number(-3)
+    assert len(frame.values) == root.table.slots['name_3'] + 1
+    child = Scope(frame)
+    assert child['name_3'] == Number(-3)
+    assert child['name_99'] == Number(99)
+    root['late'] = Number(7)
+    assert child['late'] == Number(7)
+    with pytest.raises(KeyError):
+        child['missing']
+
+
+def test_scope_streams(capsys):
+    program = [
+        FunctionDefinition('echo', Function([], [
+            Read('x'),
+            Print(Reference('x')),
+        ])),
+        FunctionCall(Reference('echo'), []),
+    ]
+    stdout = io.StringIO()
+    scope = Scope(stdin=io.StringIO('7\n'), stdout=stdout)
+    for statement in program:
+        statement.evaluate(scope)
+    assert stdout.getvalue() == '7\n'
+    assert Scope(Scope(scope)).stdout is stdout
+    assert capsys.readouterr().out == ''
+    with pytest.raises(EOFError):
+        Read('y').evaluate(scope)
+
+
+def test_factory_shares_nodes():
+    factory = NodeFactory()
+    n = factory.make(Reference, 'n')
+    assert factory.make(Reference, 'n') is n
+    assert factory.make(Number, 0) is factory.make(Number, 0)
+    lhs = factory.make(BinaryOperation, n, '-', factory.make(Number, 1))
+    rhs = factory.make(BinaryOperation, n, '-', factory.make(Number, 1))
+    assert lhs is rhs
+    assert factory.make(BinaryOperation, n, '+', factory.make(Number, 1)) \
+        is not lhs
+    assert len(factory) == 5
+
+
+def test_factory_stores_tuples():
+    factory = NodeFactory()
+    body = [factory.make(Reference, 'x')]
+    function = factory.make(Function, ['x'], body)
+    assert function.args == ('x',)
+    assert function.body == tuple(body)
+    assert factory.make(Function, ['y'], body).body is function.body
+    assert factory.make(Function, ('x',), tuple(body)) is function
+    assert factory.make(Function, ['y'], body) is not function
+
+
+def test_factory_keeps_field_types():
+    factory = NodeFactory()
+    assert factory.make(Number, True) is not factory.make(Number, 1)
+    assert type(factory.make(Number, 1).value) is int
+    assert factory.make(Reference, 'x') is factory.make(Reference, 'x')
+
+
+def test_factory_intern_deep_tree():
+    factory = NodeFactory()
+    depth = sys.getrecursionlimit() * 2
+    node = Number(1)
+    for _ in range(depth):
+        node = UnaryOperation('-', node)
+    copy = factory.intern(node)
+    assert len(factory) == depth + 1
+    assert factory.intern(node) is copy
+
+
+def test_factory_intern():
+    factory = NodeFactory()
+    definition = factory.intern(FunctionDefinition('f', Function(['n'], [
+        BinaryOperation(Reference('n'), '*', Reference('n')),
+        Conditional(Reference('n'), [Number(0)], [Number(0)]),
+    ])))
+    square, conditional = definition.function.body
+    assert square.lhs is square.rhs
+    assert conditional.if_true is conditional.if_false
+    assert factory.intern(Reference('n')) is square.lhs
+    scope = Scope()
+    definition.evaluate(scope)
+    result = FunctionCall(Reference('f'), [Number(3)]).evaluate(scope)
+    assert result == Number(0)
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+import pytest
+from model import *
+from optimizer import *
+
+
+def run(statements):
+    scope = Scope()
+    result = Number(0)
+    for statement in statements:
+        result = statement.evaluate(scope)
+    return result
+
+
+def optimize_with(optimization, statements):
+    return optimization().run(statements)
+
+
+def test_dead_branch_in_block():
+    statements = [
+        Conditional(Number(1), [Read('x'), Print(Number(1))], [Number(2)]),
+        Conditional(BinaryOperation(Reference('x'), '<', Number(0)),
+                    [Number(3)]),
+    ]
+    result = optimize_with(DeadBranchEliminator, statements)
+    assert result[:2] == statements[0].if_true
+    assert result[2] is statements[1]
+
+
+def test_dead_branch_empty_last():
+    result = optimize_with(DeadBranchEliminator, [
+        Print(Number(1)),
+        Conditional(Number(0), [Print(Number(2))]),
+    ])
+    assert len(result) == 2
+    assert result[1] == Number(0)
+
+
+def test_dead_branch_in_expression():
+    node = Print(Conditional(Number(0), [Number(1)], [Reference('y')]))
+    result = optimize_with(DeadBranchEliminator, [node])
+    assert result[0].expr is node.expr.if_false[0]
+
+
+def test_dead_branch_keeps_taken_branch():
+    node = Print(Conditional(Number(5), [Read('x'), Reference('x')],
+                             [Number(1)]))
+    result = optimize_with(DeadBranchEliminator, [node])[0].expr
+    assert result.if_true is node.expr.if_true
+    assert not result.if_false
+
+
+@pytest.mark.parametrize('node,expected', [
+    (BinaryOperation(Reference('x'), '+', Number(0)), Reference('x')),
+    (BinaryOperation(Number(0), '+', Reference('x')), Reference('x')),
+    (BinaryOperation(Reference('x'), '*', Number(1)), Reference('x')),
+    (BinaryOperation(Number(1), '*', Reference('x')), Reference('x')),
+    (BinaryOperation(Reference('x'), '/', Number(1)), Reference('x')),
+])
+def test_algebraic_identity(node, expected):
+    result = optimize_with(AlgebraicSimplifier, [node])[0]
+    assert result is node.lhs or result is node.rhs
+    assert result.name == expected.name
+
+
+def test_algebraic_self_subtraction():
+    expr = BinaryOperation(Reference('x'), '*', Reference('y'))
+    same = BinaryOperation(Reference('x'), '*', Reference('y'))
+    result = optimize_with(AlgebraicSimplifier,
+                           [BinaryOperation(expr, '-', same)])
+    assert result[0] == Number(0)
+
+
+def test_algebraic_keeps_side_effects():
+    call = FunctionCall(Reference('f'), [])
+    nodes = [
+        BinaryOperation(call, '-', call),
+        BinaryOperation(call, '*', Number(0)),
+    ]
+    assert optimize_with(AlgebraicSimplifier, nodes) is nodes
+
+
+def test_inliner():
+    statements = [
+        FunctionDefinition('sq', Function(['x'], [
+            BinaryOperation(Reference('x'), '*', Reference('x'))
+        ])),
+        Print(FunctionCall(Reference('sq'), [Reference('y')])),
+    ]
+    result = optimize_with(Inliner, statements)
+    expr = result[1].expr
+    assert expr.op == '*'
+    assert expr.lhs is expr.rhs is statements[1].expr.args[0]
+
+
+@pytest.mark.parametrize('body,args', [
+    ([FunctionCall(Reference('sq'), [Reference('x')])], [Number(1)]),
+    ([Read('x')], [Number(1)]),
+    ([Reference('x')], [FunctionCall(Reference('g'), [])]),
+    ([Reference('x'), Reference('x')], [Number(1)]),
+])
+def test_inliner_skips(body, args):
+    statements = [
+        FunctionDefinition('sq', Function(['x'], body)),
+        Print(FunctionCall(Reference('sq'), args)),
+    ]
+    assert optimize_with(Inliner, statements) is statements
+
+
+def test_inliner_skips_unstable_names():
+    statements = [
+        FunctionDefinition('id', Function(['x'], [Reference('x')])),
+        FunctionDefinition('id', Function(['x'], [Number(0)])),
+        FunctionCall(Reference('id'), [Number(1)]),
+    ]
+    assert optimize_with(Inliner, statements) is statements
+
+
+def square_definition():
+    return FunctionDefinition('sq', Function(['x'], [
+        BinaryOperation(Reference('x'), '*', Reference('x'))
+    ]))
+
+
+@pytest.mark.parametrize('statements', [
+    # sq определена только в теле другой функции.
+    [
+        FunctionDefinition('g', Function([], [square_definition()])),
+        FunctionCall(Reference('sq'), [Number(3)]),
+    ],
+    # Вызов стоит раньше определения.
+    [
+        FunctionCall(Reference('sq'), [Number(3)]),
+        square_definition(),
+    ],
+    # Определение в ветке, которая не выполняется.
+    [
+        Conditional(Number(0), [square_definition()]),
+        FunctionCall(Reference('sq'), [Number(3)]),
+    ],
+    # Функция, использующая sq, выходит из Scope, где sq определена.
+    [
+        FunctionDefinition('g', Function([], [
+            square_definition(),
+            Function([], [FunctionCall(Reference('sq'), [Number(3)])]),
+        ])),
+        FunctionCall(FunctionCall(Reference('g'), []), []),
+    ],
+])
+def test_inliner_keeps_unbound_calls(statements):
+    with pytest.raises(KeyError, match='sq'):
+        run(statements)
+    result, _ = optimize(statements, [Inliner])
+    assert result is statements
+    with pytest.raises(KeyError, match='sq'):
+        run(result)
+
+
+def test_inliner_after_definition():
+    call = FunctionCall(Reference('sq'), [Number(3)])
+    statements = [
+        square_definition(),
+        FunctionDefinition('f', Function([], [call])),
+        Conditional(Number(1), [call]),
+        FunctionCall(Reference('f'), []),
+    ]
+    result = optimize_with(Inliner, statements)
+    assert result[1].function.body[0].op == '*'
+    assert result[2].if_true[0].op == '*'
+    assert run(result) == run(statements) == Number(9)
+
+
+def test_subexpression_sharer():
+    statements = [
+        Print(BinaryOperation(Reference('a'), '+', Number(1))),
+        Print(BinaryOperation(Reference('a'), '+', Number(1))),
+    ]
+    result = optimize_with(SubexpressionSharer, statements)
+    assert result[0].expr is result[1].expr
+    assert count_nodes(result) == count_nodes(statements) - 3
+
+
+def test_count_nodes():
+    shared = Number(1)
+    assert count_nodes([BinaryOperation(shared, '+', shared)]) == 2
+    assert count_nodes([Conditional(Number(1), [Number(2)], None)]) == 3
+
+
+def test_pipeline(capsys):
+    statements = [
+        FunctionDefinition('add', Function(['a', 'b'], [
+            BinaryOperation(Reference('a'), '+', Reference('b'))
+        ])),
+        Read('x'),
+        Print(Conditional(
+            BinaryOperation(Number(1), '<', Number(2)),
+            [FunctionCall(Reference('add'), [Reference('x'), Number(0)])],
+            [Number(5)],
+        )),
+    ]
+    result, report = optimize(statements)
+    assert result[2].expr is result[1].name or result[2].expr.name == 'x'
+    assert list(report) == [cls.__name__ for cls in DEFAULT_PASSES]
+    assert sum(report.values()) == (
+        count_nodes(statements) - count_nodes(result))
+    assert report['DeadBranchEliminator'] > 0
+
+
+def test_pipeline_preserves_semantics(capsys, monkeypatch):
+    statements = [
+        FunctionDefinition('inc', Function(['a'], [
+            BinaryOperation(Reference('a'), '+', Number(1))
+        ])),
+        FunctionDefinition('f', Function(['n'], [
+            Conditional(
+                BinaryOperation(Reference('n'), '<', Number(1)),
+                [Number(0)],
+                [BinaryOperation(
+                    FunctionCall(Reference('f'), [
+                        BinaryOperation(Reference('n'), '-', Number(1))
+                    ]),
+                    '+',
+                    BinaryOperation(
+                        FunctionCall(Reference('inc'), [Reference('n')]),
+                        '*', BinaryOperation(Number(2), '-', Number(1))))])
+        ])),
+        Print(FunctionCall(Reference('f'), [Number(10)])),
+    ]
+    expected = run(statements)
+    result, _ = optimize(statements)
+    assert run(result) == expected
+    assert capsys.readouterr().out == '65\n65\n'
+
+
+if __name__ == "__main__":
+    pytest.main()
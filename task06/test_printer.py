@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+import io
+import pytest
+from model import *
+from folder import fold_constants
+from printer import *
+
+
+def pretty(node, **kwargs):
+    out = io.StringIO()
+    printer = PrettyPrinter(out, **kwargs)
+    printer.print_statement(node)
+    printer.flush()
+    return out.getvalue()
+
+
+def test_conditional():
+    assert pretty(Conditional(Number(42), [], [])) == 'if (42) {\n}\n'
+
+
+def test_conditional_else():
+    assert pretty(Conditional(Number(1), None, [Reference('x')])) == (
+        'if (1) {\n'
+        '} else {\n'
+        '    x;\n'
+        '}\n'
+    )
+
+
+def test_function_definition():
+    assert pretty(FunctionDefinition('foo', Function([], []))) == (
+        'def foo() {\n'
+        '}\n'
+    )
+
+
+def test_function_definition_with_args():
+    definition = FunctionDefinition('f', Function(['a', 'b'], [Read('a')]))
+    assert pretty(definition) == 'def f(a, b) {\n    read a;\n}\n'
+
+
+def test_print():
+    assert pretty(Print(Number(42))) == 'print 42;\n'
+
+
+def test_read():
+    assert pretty(Read('x')) == 'read x;\n'
+
+
+def test_number():
+    assert pretty(Number(10)) == '10;\n'
+
+
+def test_reference():
+    assert pretty(Reference('x')) == 'x;\n'
+
+
+def test_binary_operation():
+    add = BinaryOperation(Number(2), '+', Number(3))
+    mul = BinaryOperation(Number(1), '*', add)
+    assert pretty(mul) == '1 * (2 + 3);\n'
+
+
+@pytest.mark.parametrize('node,expected', [
+    (BinaryOperation(BinaryOperation(Number(1), '-', Number(2)), '-',
+                     Number(3)), '1 - 2 - 3'),
+    (BinaryOperation(Number(1), '-',
+                     BinaryOperation(Number(2), '-', Number(3))),
+     '1 - (2 - 3)'),
+    (BinaryOperation(BinaryOperation(Number(1), '*', Number(2)), '+',
+                     Number(3)), '1 * 2 + 3'),
+    (BinaryOperation(BinaryOperation(Reference('a'), '<', Reference('b')),
+                     '&&',
+                     BinaryOperation(Reference('c'), '||', Reference('d'))),
+     'a < b && (c || d)'),
+    (BinaryOperation(Number(1), '+', Number(-2)), '1 + -2'),
+    (UnaryOperation('-', Number(-2)), '-(-2)'),
+    (UnaryOperation('!', BinaryOperation(Reference('a'), '==', Number(0))),
+     '!(a == 0)'),
+    (BinaryOperation(UnaryOperation('-', Reference('a')), '*', Number(2)),
+     '-a * 2'),
+])
+def test_priorities(node, expected):
+    assert pretty(node) == expected + ';\n'
+
+
+def test_unary_operation():
+    assert pretty(UnaryOperation('-', Number(42))) == '-42;\n'
+
+
+def test_unary_operations_in_a_row():
+    node = UnaryOperation('-', UnaryOperation('-', Number(42)))
+    assert pretty(node) == '-(-42);\n'
+
+
+def test_function_call():
+    call = FunctionCall(Reference('foo'), [Number(1), Number(2), Number(3)])
+    assert pretty(call) == 'foo(1, 2, 3);\n'
+
+
+def test_function_call_without_args():
+    assert pretty(FunctionCall(Reference('foo'), [])) == 'foo();\n'
+
+
+def test_indent():
+    node = Conditional(Number(1), [Conditional(Number(2), [Number(3)])])
+    assert pretty(node, indent='\t') == (
+        'if (1) {\n'
+        '\tif (2) {\n'
+        '\t\t3;\n'
+        '\t}\n'
+        '}\n'
+    )
+
+
+def test_binary_sink():
+    out = io.BytesIO()
+    printer = PrettyPrinter(out)
+    printer.print_statements([Read('x'), Print(Reference('x'))])
+    printer.flush()
+    assert out.getvalue() == b'read x;\nprint x;\n'
+
+
+def test_string_by_default(capsys):
+    printer = PrettyPrinter(buffer_size=4)
+    printer.print_statements([Read('x'), Print(Reference('x'))])
+    assert printer.getvalue() == 'read x;\nprint x;\n'
+    printer.print_statement(Number(1))
+    assert printer.getvalue() == 'read x;\nprint x;\n1;\n'
+    assert capsys.readouterr().out == ''
+
+
+def test_buffer_is_flushed_when_full():
+    out = io.StringIO()
+    printer = PrettyPrinter(out, buffer_size=16)
+    printer.print_statements(Print(Number(i)) for i in range(10))
+    assert 0 < len(out.getvalue()) < len('print 0;\n') * 10
+    printer.flush()
+    assert out.getvalue() == ''.join(
+        'print {};\n'.format(i) for i in range(10))
+
+
+def test_deep_nesting():
+    depth = 10 ** 4
+    node = Number(0)
+    for _ in range(depth):
+        node = Conditional(Number(1), [node])
+    lines = pretty(node, indent=' ').splitlines()
+    assert len(lines) == 2 * depth + 1
+    assert lines[depth] == ' ' * depth + '0;'
+
+
+def test_deep_expression():
+    node = Reference('x')
+    for _ in range(10 ** 5):
+        node = BinaryOperation(Number(1), '-', node)
+    text = pretty(node)
+    assert text.startswith('1 - (1 - (')
+    assert text.endswith('x' + ')' * (10 ** 5 - 1) + ';\n')
+
+
+def test_end_to_end(capsys):
+    pretty_print(FunctionDefinition('main', Function(['arg1'], [
+        Read('x'),
+        Print(Reference('x')),
+        Conditional(
+            BinaryOperation(Number(2), '==', Number(3)),
+            [
+                Conditional(Number(1), [], [])
+            ],
+            [
+                FunctionCall(Reference('exit'), [
+                    UnaryOperation('-', Reference('arg1'))
+                ])
+            ],
+        ),
+    ])))
+    assert capsys.readouterr().out == (
+        'def main(arg1) {\n'
+        '    read x;\n'
+        '    print x;\n'
+        '    if (2 == 3) {\n'
+        '        if (1) {\n'
+        '        }\n'
+        '    } else {\n'
+        '        exit(-arg1);\n'
+        '    }\n'
+        '}\n'
+    )
+
+
+def test_folded_end_to_end(capsys):
+    pretty_print(fold_constants(
+        BinaryOperation(
+            Number(10),
+            '-',
+            UnaryOperation(
+                '-',
+                BinaryOperation(
+                    Number(3),
+                    '+',
+                    BinaryOperation(
+                        Reference('x'),
+                        '-',
+                        Reference('x')
+                    )
+                )
+            )
+        )
+    ))
+    assert capsys.readouterr().out == '13;\n'
+
+
+if __name__ == "__main__":
+    pytest.main()
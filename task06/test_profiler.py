@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import io
+import itertools
+import pstats
+import pytest
+from model import *
+from profiler import *
+
+
+def program():
+    n = Reference('n')
+    return [
+        FunctionDefinition('leaf', Function([], [Number(1)])),
+        FunctionDefinition('down', Function(['n'], [
+            Conditional(n, [
+                FunctionCall(Reference('leaf'), []),
+                FunctionCall(Reference('down'), [
+                    BinaryOperation(n, '-', Number(1))
+                ]),
+            ]),
+        ])),
+        FunctionCall(Reference('down'), [Number(3)]),
+    ]
+
+
+def run(statements):
+    scope = Scope()
+    for statement in statements:
+        statement.evaluate(scope)
+
+
+def ticking_clock():
+    return itertools.count().__next__
+
+
+def test_disabled_profiler_restores_methods():
+    original = FunctionCall.evaluate
+    with Profiler(count_nodes=True) as profiler:
+        assert profiler.enabled
+        assert FunctionCall.evaluate is not original
+        run(program())
+    assert not profiler.enabled
+    assert FunctionCall.evaluate is original
+    assert Number.evaluate.__qualname__ == 'Number.evaluate'
+
+
+def test_only_one_profiler():
+    with Profiler():
+        with pytest.raises(RuntimeError):
+            Profiler().start()
+    Profiler().stop()
+
+
+def test_calls_and_depth():
+    with Profiler() as profiler:
+        run(program())
+    down = profiler.stats['down']
+    assert down.calls == 4
+    assert down.primitive_calls == 1
+    assert down.max_depth == 4
+    assert profiler.stats['leaf'].calls == 3
+    assert profiler.stats['leaf'].max_depth == 1
+
+
+def test_times():
+    with Profiler(clock=ticking_clock()) as profiler:
+        run(program())
+    # Каждый enter и leave читают часы один раз.
+    leaf = profiler.stats['leaf']
+    assert leaf.inclusive == leaf.exclusive == 3
+    down = profiler.stats['down']
+    assert down.inclusive == 13
+    assert down.exclusive == 13 - 3
+    assert profiler.stats['down'].callers[None][:2] == [1, 1]
+    assert profiler.stats['down'].callers['down'][:2] == [3, 0]
+
+
+def test_node_counts():
+    with Profiler(count_nodes=True) as profiler:
+        run(program())
+    assert profiler.node_counts['FunctionCall'] == 7
+    assert profiler.node_counts['FunctionDefinition'] == 2
+    assert profiler.node_counts['Conditional'] == 4
+
+
+def test_anonymous_function():
+    with Profiler() as profiler:
+        FunctionCall(Function([], [Number(1)]), []).evaluate(Scope())
+    assert profiler.stats[ANONYMOUS].calls == 1
+
+
+def test_exception_leaves_frames():
+    with Profiler() as profiler:
+        with pytest.raises(KeyError):
+            FunctionCall(Reference('f'), []).evaluate(Scope())
+        scope = Scope()
+        FunctionDefinition('f', Function([], [Reference('x')])).evaluate(
+            scope)
+        with pytest.raises(KeyError):
+            FunctionCall(Reference('f'), []).evaluate(scope)
+    assert profiler.frames == []
+    assert profiler.stats['f'].calls == 1
+
+
+def test_pstats(tmp_path):
+    with Profiler() as profiler:
+        run(program())
+    path = str(tmp_path / 'yat.prof')
+    profiler.dump_stats(path)
+    stats = pstats.Stats(path, stream=io.StringIO())
+    assert stats.total_calls == 7
+    assert stats.prim_calls == 4
+    cc, nc, tt, ct, callers = stats.stats[('<ЯТЬ>', 0, 'leaf')]
+    assert (cc, nc) == (3, 3)
+    assert list(callers) == [('<ЯТЬ>', 0, 'down')]
+
+
+def test_pstats_recursive_callers(tmp_path):
+    with Profiler() as profiler:
+        run(program())
+    path = str(tmp_path / 'yat.prof')
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    down = ('<ЯТЬ>', 0, 'down')
+    cc, nc, tt, ct, callers = stats.stats[down]
+    assert (cc, nc) == (1, 4)
+    # У вызывающих pstats ждёт (nc, cc, tt, ct): все три вызова down из
+    # down рекурсивные.
+    assert callers[down][:2] == (3, 0)
+    assert stats.stats[('<ЯТЬ>', 0, 'leaf')][4][down][:2] == (3, 3)
+    stats.print_callers('leaf')
+    assert 'down' in out.getvalue()
+
+
+def test_folded_stacks():
+    with Profiler(clock=ticking_clock()) as profiler:
+        run(program())
+    out = io.StringIO()
+    profiler.write_folded(out)
+    lines = out.getvalue().splitlines()
+    assert lines[0] == 'down 3000000'
+    assert 'down;leaf 1000000' in lines
+    assert 'down;down;down;down 1000000' in lines
+    assert sum(int(line.split()[1]) for line in lines) == 13 * 10 ** 6
+
+
+if __name__ == "__main__":
+    pytest.main()
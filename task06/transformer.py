@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+from model import *
+
+
+class ASTTransformer(ASTNodeVisitor):
+    """
+    Посетитель, который строит по дереву новое дерево.
+
+    Сам по себе ничего не меняет: наследники переопределяют нужные методы
+    visit_*. Если ни один потомок узла не изменился, возвращается сам узел,
+    так что неизменённые поддеревья не копируются.
+
+    Новые узлы строятся через make: если задана factory (NodeFactory),
+    одинаковые новые узлы будут одним объектом.
+    """
+    factory = None
+
+    def make(self, cls, *fields):
+        if self.factory is None:
+            return cls(*fields)
+        return self.factory.make(cls, *fields)
+
+    def transform(self, node):
+        return node.accept(self)
+
+    def transform_list(self, nodes):
+        if nodes is None:
+            return None
+        result = [self.transform(node) for node in nodes]
+        if all(new is old for new, old in zip(result, nodes)):
+            return nodes
+        return result
+
+    def transform_block(self, block):
+        """
+        Преобразует список выражений, результатом которого является
+        результат последнего (тело функции, ветка Conditional).
+        """
+        return self.transform_list(block)
+
+    def visit_number(self, node):
+        return node
+
+    def visit_function(self, node):
+        body = self.transform_block(node.body)
+        if body is node.body:
+            return node
+        return self.make(Function, node.args, body)
+
+    def visit_function_definition(self, node):
+        function = self.transform(node.function)
+        if function is node.function:
+            return node
+        return self.make(FunctionDefinition, node.name, function)
+
+    def visit_conditional(self, node):
+        condition = self.transform(node.condition)
+        if_true = self.transform_block(node.if_true)
+        if_false = self.transform_block(node.if_false)
+        if (condition is node.condition and if_true is node.if_true and
+                if_false is node.if_false):
+            return node
+        return self.make(Conditional, condition, if_true, if_false)
+
+    def visit_print(self, node):
+        expr = self.transform(node.expr)
+        if expr is node.expr:
+            return node
+        return self.make(Print, expr)
+
+    def visit_read(self, node):
+        return node
+
+    def visit_function_call(self, node):
+        fun_expr = self.transform(node.fun_expr)
+        args = self.transform_list(node.args)
+        if fun_expr is node.fun_expr and args is node.args:
+            return node
+        return self.make(FunctionCall, fun_expr, args)
+
+    def visit_reference(self, node):
+        return node
+
+    def visit_binary_operation(self, node):
+        lhs = self.transform(node.lhs)
+        rhs = self.transform(node.rhs)
+        if lhs is node.lhs and rhs is node.rhs:
+            return node
+        return self.make(BinaryOperation, lhs, node.op, rhs)
+
+    def visit_unary_operation(self, node):
+        expr = self.transform(node.expr)
+        if expr is node.expr:
+            return node
+        return self.make(UnaryOperation, node.op, expr)